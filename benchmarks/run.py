@@ -0,0 +1,357 @@
+"""
+Benchmark suite.
+
+Runs offline on a plain Linux box: screen capture uses synthetic buffers
+(plus a live grab when mss and a display such as Xvfb are available), and OCR
+goes to the local Gemini stub in benchmarks/stub_server.py instead of the real
+API, both called directly and end to end through OcrScheduler.
+
+Usage:
+    python -m benchmarks [--suite capture preprocess history ocr] [-o results.json]
+    python -m benchmarks --compare baseline.json -o current.json
+
+Results are written as JSON: run metadata plus one record per benchmark with
+the sample count and mean/p50/p95/min/max in milliseconds.
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional
+
+SUITES = ("capture", "preprocess", "history", "ocr")
+
+
+def summarize(name: str, samples_ms: List[float], **extra) -> Dict:
+    """Statistics for one benchmark; extra keyword values are recorded alongside."""
+    ordered = sorted(samples_ms)
+    record = {
+        "name": name,
+        "n": len(ordered),
+        "mean_ms": round(statistics.fmean(ordered), 3),
+        "p50_ms": round(ordered[len(ordered) // 2], 3),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 3),
+        "min_ms": round(ordered[0], 3),
+        "max_ms": round(ordered[-1], 3),
+    }
+    record.update(extra)
+    return record
+
+
+def measure(name: str, fn: Callable, repeat: int = 20, warmup: int = 2, **extra) -> Dict:
+    """Time fn() `repeat` times after `warmup` untimed calls."""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return summarize(name, samples, **extra)
+
+
+def skipped(name: str, reason: str) -> Dict:
+    return {"name": name, "skipped": reason}
+
+
+def text_image(width: int, height: int, line_height: int = 18):
+    """Synthetic screenshot: dark text lines on a light background."""
+    from PIL import Image, ImageDraw
+
+    image = Image.new("RGB", (width, height), (250, 250, 250))
+    draw = ImageDraw.Draw(image)
+    line = "Lorem ipsum dolor sit amet, consectetur adipiscing elit 0123456789 " * 4
+    for y in range(8, height - line_height, line_height + 6):
+        draw.text((8, y), line, fill=(20, 20, 20))
+    return image
+
+
+# -- suites ---------------------------------------------------------------------
+
+
+def bench_capture(quick: bool) -> List[Dict]:
+    from src.core.capture import Frame, get_capturer
+
+    width, height = 1920, 1080
+    # Synthetic BGRA desktop: the same buffer layout the grabber returns
+    raw = bytes(range(256)) * (width * height * 4 // 256)
+    frame = Frame(raw, width, height)
+    repeat = 10 if quick else 50
+    results = [
+        measure("capture.frame_crop_800x200", lambda: frame.crop(400, 300, 800, 200), repeat),
+        measure("capture.frame_crop_to_image_800x200", lambda: frame.crop(400, 300, 800, 200).to_image(), repeat),
+        measure("capture.frame_to_image_1920x1080", frame.to_image, repeat),
+    ]
+    from src.core.watch import ChangeGate, WatchOptions
+    changed = Frame(bytes(reversed(raw)), width, height)
+    gate = ChangeGate(WatchOptions(debounce=0))
+    gate.update(frame)
+    # One watch tick on a full-screen region that alternates between two frames (diffs against reference and previous)
+    frames = iter([changed, frame] * (repeat + 2))
+    results.append(measure("capture.watch_gate_1920x1080", lambda: gate.update(next(frames)), repeat))
+    # Only the live grabs need mss; the synthetic cases above run without it
+    try:
+        import mss  # noqa: F401
+    except ImportError as e:
+        results.append(skipped("capture.capture_region_800x200", f"missing dependency: {e}"))
+        return results
+    if not (os.environ.get("DISPLAY") or os.environ.get("WAYLAND_DISPLAY")) and sys.platform.startswith("linux"):
+        results.append(skipped("capture.capture_region_800x200", "no display (run under xvfb-run)"))
+        return results
+    try:
+        capturer = get_capturer()
+        results.append(measure("capture.capture_region_800x200",
+                               lambda: capturer.capture_image(0, 0, 800, 200), repeat))
+        results.append(measure("capture.grab_desktop", capturer.grab_desktop, repeat))
+    except Exception as e:
+        results.append(skipped("capture.capture_region_800x200", str(e)))
+    return results
+
+
+def bench_preprocess(quick: bool) -> List[Dict]:
+    from PIL import Image
+
+    from src.core.preprocess import PreprocessOptions, encode_compact, prepare_image
+
+    repeat = 5 if quick else 20
+    results = []
+    for width, height in ((400, 100), (1600, 900)):
+        image = text_image(width, height)
+        prepared = prepare_image(image, PreprocessOptions())
+        results.append(measure(f"preprocess.prepare_image_{width}x{height}",
+                               lambda: prepare_image(image, PreprocessOptions()), repeat,
+                               bytes=len(prepared.data), format=prepared.stats.get("format")))
+        data, fmt, _ = encode_compact(image, 300 * 1024)
+        results.append(measure(f"preprocess.encode_compact_{width}x{height}",
+                               lambda: encode_compact(image, 300 * 1024), repeat, bytes=len(data), format=fmt))
+        results.append(measure(f"preprocess.disabled_{width}x{height}",
+                               lambda: prepare_image(image, PreprocessOptions(enabled=False)), repeat))
+
+    from src.core.tiling import TileOptions, plan_tiles
+
+    # Triple-monitor selection: three screens side by side with a gap between them
+    wide = Image.new("RGB", (7680, 2160), (250, 250, 250))
+    for i in range(3):
+        wide.paste(text_image(2400, 2160), (i * 2640, 0))
+    tiles = plan_tiles(wide, TileOptions())
+    results.append(measure("preprocess.plan_tiles_7680x2160", lambda: plan_tiles(wide, TileOptions()),
+                           repeat, tiles=len(tiles)))
+    return results
+
+
+def _populate(db_path: str, entries: int):
+    """Bulk-insert synthetic entries (one transaction; the FTS triggers still run)."""
+    from src.core import history
+
+    conn = sqlite3.connect(db_path)
+    now = time.time()
+    rows = ((now - entries + i, "1:00p 1/1/25", f"entry {i} lorem ipsum dolor sit amet {i % 97}",
+             f"entry {i} lorem ipsum", None) for i in range(entries))
+    with conn:
+        conn.executemany(
+            "INSERT INTO entries (created_at, timestamp, text, snippet, metadata) VALUES (?, ?, ?, ?, ?)", rows)
+    conn.close()
+    history.close()
+
+
+def bench_history(quick: bool) -> List[Dict]:
+    from src.core import history
+
+    sizes = (10, 10_000) if quick else (10, 10_000, 100_000)
+    results = []
+    workdir = tempfile.mkdtemp(prefix="lexiclip-bench-")
+    saved = history.HISTORY_DB, history.HISTORY_FILE
+    try:
+        for size in sizes:
+            history.close()
+            history.HISTORY_DB = os.path.join(workdir, f"history-{size}.db")
+            history.HISTORY_FILE = os.path.join(workdir, "absent.json")
+            history.count()  # Create the schema
+            start = time.perf_counter()
+            _populate(history.HISTORY_DB, size)
+            populate_ms = (time.perf_counter() - start) * 1000
+            results.append(measure(f"history.add_entry@{size}", lambda: history.add_entry("benchmark text"),
+                                   50, populate_ms=round(populate_ms, 1)))
+            results.append(measure(f"history.load_page@{size}",
+                                   lambda: history.load_history(history.PAGE_SIZE, 0, with_text=False), 50))
+            results.append(measure(f"history.load_page_deep@{size}",
+                                   lambda: history.load_history(history.PAGE_SIZE, size // 2, with_text=False), 20))
+            results.append(measure(f"history.search@{size}",
+                                   lambda: history.search("lorem ips", history.PAGE_SIZE, 0, with_text=False), 20))
+    finally:
+        history.close()
+        history.HISTORY_DB, history.HISTORY_FILE = saved
+        shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+
+_qt_app = None
+
+
+def _scheduler_roundtrip(engine, image, repeat: int, streaming: bool) -> List[float]:
+    """Submit-to-delivery times of jobs through OcrScheduler's thread pool, as the app runs them."""
+    from PySide6.QtCore import QCoreApplication, QEventLoop
+    from src.ui.scheduler import OcrScheduler
+
+    global _qt_app
+    _qt_app = QCoreApplication.instance() or QCoreApplication([])  # Kept for the run; delivers queued signals
+    scheduler = OcrScheduler(engine, max_concurrency=1, supersede=False)
+    loop = QEventLoop()
+    errors = []
+
+    def failed(job_id, error, context, report):
+        errors.append(error)
+        loop.quit()
+
+    scheduler.resultReady.connect(lambda *args: loop.quit())
+    scheduler.jobFailed.connect(failed)
+    samples = []
+    try:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            scheduler.submit(image, streaming=streaming)
+            loop.exec()
+            if errors:
+                raise RuntimeError(f"OCR job failed: {errors[0]}")
+            samples.append((time.perf_counter() - start) * 1000)
+    finally:
+        scheduler.shutdown()
+    return samples
+
+
+def bench_ocr(quick: bool) -> List[Dict]:
+    from benchmarks.stub_server import StubBehavior, StubServer
+    from src.core import backends
+    from src.core.ocr import OcrEngine
+
+    repeat = 5 if quick else 20
+    image = text_image(800, 200)
+    results = []
+    scenarios = (
+        ("instant", StubBehavior()),
+        ("300ms", StubBehavior(latency_ms=300)),
+        ("300ms_stream8x50ms", StubBehavior(latency_ms=300, chunks=8, chunk_delay_ms=50)),
+    )
+    for label, behavior in scenarios:
+        with StubServer(behavior) as server:
+            os.environ[backends.ENDPOINT_ENV] = server.endpoint
+            try:
+                engine = OcrEngine(api_key="benchmark", routing="remote")
+                engine.warm_up()
+                expected = behavior.latency_ms + behavior.chunk_delay_ms * (behavior.chunks - 1)
+                result = measure(f"ocr.extract_text[{label}]", lambda: engine.extract_text(image), repeat,
+                                 server_ms=expected)
+                result["overhead_p50_ms"] = round(result["p50_ms"] - behavior.latency_ms, 3)
+                results.append(result)
+
+                first, total = [], []
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    for i, _piece in enumerate(engine.stream_text(image)):
+                        if i == 0:
+                            first.append((time.perf_counter() - start) * 1000)
+                    total.append((time.perf_counter() - start) * 1000)
+                results.append(summarize(f"ocr.stream_first_chunk[{label}]", first, server_ms=behavior.latency_ms))
+                results.append(summarize(f"ocr.stream_complete[{label}]", total, server_ms=expected))
+                results[-1]["bytes_uploaded"] = engine.last_upload_stats.get("bytes", 0)
+
+                name = f"ocr.scheduler_roundtrip[{label}]"
+                try:
+                    samples = _scheduler_roundtrip(engine, image, repeat, streaming=behavior.chunks > 1)
+                except ImportError as e:
+                    results.append(skipped(name, f"missing dependency: {e}"))
+                else:
+                    results.append(summarize(name, samples, server_ms=expected))
+            finally:
+                os.environ.pop(backends.ENDPOINT_ENV, None)
+    return results
+
+
+BENCHMARKS = {
+    "capture": bench_capture,
+    "preprocess": bench_preprocess,
+    "history": bench_history,
+    "ocr": bench_ocr,
+}
+
+
+# -- driver ---------------------------------------------------------------------
+
+
+def metadata() -> Dict:
+    try:
+        revision = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                  cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        revision = ""
+    return {
+        "timestamp": time.time(),
+        "revision": revision,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def compare(baseline: Dict, current: Dict, threshold: float) -> int:
+    """Print p50 ratios against a baseline; returns how many benchmarks regressed beyond threshold."""
+    before = {r["name"]: r for r in baseline.get("results", []) if "p50_ms" in r}
+    regressions = 0
+    for record in current["results"]:
+        old = before.get(record["name"])
+        if old is None or "p50_ms" not in record or not old["p50_ms"]:
+            continue
+        ratio = record["p50_ms"] / old["p50_ms"]
+        flag = ""
+        if ratio > 1 + threshold:
+            flag = "  REGRESSION"
+            regressions += 1
+        print(f"{record['name']:<48} {old['p50_ms']:>10.3f} -> {record['p50_ms']:>10.3f} ms  x{ratio:.2f}{flag}",
+              file=sys.stderr)
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="benchmarks", description="Lexiclip benchmark suite")
+    parser.add_argument("--suite", nargs="+", choices=SUITES, default=list(SUITES), help="Suites to run")
+    parser.add_argument("-o", "--output", help="Write JSON results to this file instead of stdout")
+    parser.add_argument("--quick", action="store_true", help="Fewer repetitions and smaller history sizes")
+    parser.add_argument("--compare", metavar="BASELINE", help="Compare p50 against an earlier results file")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="Relative p50 slowdown reported as a regression (default: 0.2)")
+    args = parser.parse_args(argv)
+
+    report = {"meta": metadata(), "results": []}
+    for suite in args.suite:
+        print(f"Running {suite}...", file=sys.stderr)
+        try:
+            # The app logs with print(); keep stdout for the JSON report
+            with contextlib.redirect_stdout(sys.stderr):
+                report["results"].extend(BENCHMARKS[suite](args.quick))
+        except ImportError as e:
+            report["results"].append(skipped(suite, f"missing dependency: {e}"))
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare) as f:
+            return 1 if compare(json.load(f), report, args.threshold) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
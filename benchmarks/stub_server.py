@@ -0,0 +1,216 @@
+"""
+Local stand-in for the Gemini REST endpoint.
+
+Serves just enough of the v1beta API for the app's OCR path:
+
+    GET  /v1beta/models/<model>                           (warm-up)
+    POST /v1beta/models/<model>:generateContent
+    POST /v1beta/models/<model>:streamGenerateContent     (JSON array, or SSE with alt=sse)
+
+Latency, streaming granularity and failure rate are configurable so
+benchmarks can separate client overhead from network time. Point the app at
+it with LEXICLIP_GEMINI_ENDPOINT=http://127.0.0.1:<port>.
+
+Usage:
+    python -m benchmarks.stub_server --port 8765 --latency-ms 300 --chunks 4
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+from urllib.parse import parse_qs, urlparse
+
+DEFAULT_TEXT = "The quick brown fox jumps over the lazy dog.\nPack my box with five dozen liquor jugs."
+
+
+@dataclass
+class StubBehavior:
+    """How the stub answers requests."""
+
+    text: str = DEFAULT_TEXT
+    latency_ms: float = 0.0       # Delay before the first byte of a response
+    chunks: int = 1               # Number of pieces a streamed response is split into
+    chunk_delay_ms: float = 0.0   # Delay between streamed pieces
+    error_rate: float = 0.0       # Fraction of generate requests answered with HTTP 503
+
+
+class StubStats:
+    """Request counters, readable at GET /stats."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.bytes_received = 0
+
+    def record(self, size: int, error: bool = False):
+        with self._lock:
+            self.requests += 1
+            self.bytes_received += size
+            self.errors += int(error)
+
+    def to_dict(self) -> Dict:
+        with self._lock:
+            return {"requests": self.requests, "errors": self.errors, "bytesReceived": self.bytes_received}
+
+
+def split_text(text: str, pieces: int) -> List[str]:
+    """Split text into at most `pieces` contiguous parts."""
+    pieces = max(1, min(pieces, len(text) or 1))
+    size = -(-len(text) // pieces) or 1
+    return [text[i:i + size] for i in range(0, len(text), size)] or [""]
+
+
+def candidate(text: str, final: bool) -> Dict:
+    body = {"candidates": [{"content": {"parts": [{"text": text}], "role": "model"}, "index": 0}]}
+    if final:
+        body["candidates"][0]["finishReason"] = "STOP"
+        body["usageMetadata"] = {"promptTokenCount": 300, "candidatesTokenCount": max(1, len(text) // 4),
+                                 "totalTokenCount": 300 + max(1, len(text) // 4)}
+    return body
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    behavior: StubBehavior = StubBehavior()
+    stats: StubStats = StubStats()
+
+    def log_message(self, format, *args):
+        pass  # Keep benchmark output clean
+
+    def _send_json(self, status: int, body: Dict):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        if path == "/stats":
+            self._send_json(200, self.stats.to_dict())
+            return
+        if path.startswith("/v1beta/models/"):
+            name = path[len("/v1beta/"):]
+            self._send_json(200, {
+                "name": name, "baseModelId": name.split("/")[-1], "version": "stub",
+                "displayName": "Stub", "inputTokenLimit": 1048576, "outputTokenLimit": 65536,
+                "supportedGenerationMethods": ["generateContent"],
+            })
+            return
+        self._send_json(404, {"error": {"code": 404, "message": f"Unknown path {path}", "status": "NOT_FOUND"}})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        size = int(self.headers.get("Content-Length") or 0)
+        self.rfile.read(size)
+        behavior = self.behavior
+        failed = random.random() < behavior.error_rate
+        self.stats.record(size, failed)
+        time.sleep(behavior.latency_ms / 1000)
+        if failed:
+            self._send_json(503, {"error": {"code": 503, "message": "Stub overloaded", "status": "UNAVAILABLE"}})
+        elif url.path.endswith(":generateContent"):
+            self._send_json(200, candidate(behavior.text, final=True))
+        elif url.path.endswith(":streamGenerateContent"):
+            self._stream(parse_qs(url.query).get("alt", [""])[0] == "sse")
+        else:
+            self._send_json(404, {"error": {"code": 404, "message": f"Unknown path {url.path}",
+                                            "status": "NOT_FOUND"}})
+
+    def _stream(self, sse: bool):
+        """Send the text in pieces with chunked transfer encoding."""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream" if sse else "application/json")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        pieces = split_text(self.behavior.text, self.behavior.chunks)
+        for i, piece in enumerate(pieces):
+            if i:
+                time.sleep(self.behavior.chunk_delay_ms / 1000)
+            body = json.dumps(candidate(piece, final=i == len(pieces) - 1))
+            if sse:
+                data = f"data: {body}\r\n\r\n"
+            else:
+                data = ("[" if i == 0 else ",\r\n") + body + ("]" if i == len(pieces) - 1 else "")
+            self._write_chunk(data.encode())
+        self._write_chunk(b"")
+
+    def _write_chunk(self, data: bytes):
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+
+class StubServer:
+    """Runs the stub on a background thread; usable as a context manager."""
+
+    def __init__(self, behavior: StubBehavior = None, host: str = "127.0.0.1", port: int = 0):
+        handler = type("BoundStubHandler", (StubHandler,), {
+            "behavior": behavior or StubBehavior(),
+            "stats": StubStats(),
+        })
+        self._server = ThreadingHTTPServer((host, port), handler)
+        self._server.daemon_threads = True
+        self._handler = handler
+        self._thread = None
+
+    @property
+    def behavior(self) -> StubBehavior:
+        return self._handler.behavior
+
+    @property
+    def stats(self) -> StubStats:
+        return self._handler.stats
+
+    @property
+    def endpoint(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "StubServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="gemini-stub", daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        """Serve on the calling thread until interrupted."""
+        self._server.serve_forever()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local stand-in for the Gemini REST API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=0, help="Delay before the first byte")
+    parser.add_argument("--chunks", type=int, default=1, help="Pieces per streamed response")
+    parser.add_argument("--chunk-delay-ms", type=float, default=0, help="Delay between streamed pieces")
+    parser.add_argument("--error-rate", type=float, default=0, help="Fraction of requests failing with 503")
+    parser.add_argument("--text", default=DEFAULT_TEXT, help="Text returned for every image")
+    args = parser.parse_args(argv)
+    behavior = StubBehavior(args.text, args.latency_ms, args.chunks, args.chunk_delay_ms, args.error_rate)
+    server = StubServer(behavior, args.host, args.port)
+    print(f"Gemini stub listening on {server.endpoint} (LEXICLIP_GEMINI_ENDPOINT={server.endpoint})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
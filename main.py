@@ -1,14 +1,23 @@
+from src.core import startup  # First, so startup timings include every import below
+
 import sys
 import signal
 import os
 import pathlib
+
+if __name__ == "__main__" and len(sys.argv) > 1 and not sys.argv[1].startswith("-"):
+    # Batch OCR (main.py ocr ...) and commands for the running instance (main.py capture-region ...);
+    # dispatched before Qt is imported so forwarding a command takes milliseconds
+    from src.cli import main as cli_main
+    sys.exit(cli_main())
+
 from PySide6.QtWidgets import QApplication, QSystemTrayIcon, QMenu
 from PySide6.QtGui import QIcon, QAction
-from PySide6.QtCore import QSharedMemory, QBuffer, QIODevice
+from PySide6.QtCore import QSharedMemory, QBuffer, QIODevice, QTimer
 from PySide6.QtQml import QQmlApplicationEngine
 from src.ui.controller import Controller
-from pynput import keyboard
 
+from src.core import persistence
 from src.core.platform_utils import PlatformUtils
 
 def ensure_autostart():
@@ -17,9 +26,6 @@ def ensure_autostart():
     config = Config()
     PlatformUtils.ensure_autostart(config.get_autostart_enabled())
 
-# Call the function early so the shortcut exists before the UI shows
-ensure_autostart()
-
 def main():
     # Load environment variables
     from dotenv import load_dotenv
@@ -32,6 +38,15 @@ def main():
     app.setQuitOnLastWindowClosed(False)
     app.setOrganizationName("Lexiclip")
     app.setApplicationName("Lexiclip OCR")
+    startup.mark("qt_app")
+
+    # Optionally let Qt's event loop drive the asyncio OCR path (needs qasync)
+    from src.core.config import Config
+    config = Config()
+    qt_loop = None
+    if config.get_async_ocr_enabled() and config.get_async_loop() == "qt":
+        from src.core import async_loop
+        qt_loop = async_loop.install_qt_loop(app)
 
     # Single Instance Check using QLockFile (robust against crashes)
     from PySide6.QtCore import QLockFile, QDir
@@ -53,7 +68,13 @@ def main():
         
         error = lock_file.error()
         if error == QLockFile.LockError.LockFailedError:
-             print("Lexiclip is already running.")
+             # Bring up the running instance's window instead of starting another
+             from src.core import ipc
+             try:
+                 ipc.send(ipc.SHOW)
+                 print("Lexiclip is already running; showing its window.")
+             except (OSError, ValueError):
+                 print("Lexiclip is already running.")
              sys.exit(0)
         else:
              # Some other error, maybe permissions?
@@ -101,21 +122,29 @@ def main():
     
     # Detect monitors and pass to controller
     from PySide6.QtGui import QGuiApplication
-    screens = QGuiApplication.screens()
-    monitors = []
-    for screen in screens:
-        geom = screen.geometry()
-        monitors.append({
-            "x": geom.x(),
-            "y": geom.y(),
-            "width": geom.width(),
-            "height": geom.height()
-        })
-    controller.setMonitors(monitors)
-    print(f"Detected {len(monitors)} monitor(s): {monitors}")
+    
+    def update_monitors(*_):
+        monitors = []
+        for screen in QGuiApplication.screens():
+            geom = screen.geometry()
+            monitors.append({
+                "x": geom.x(),
+                "y": geom.y(),
+                "width": geom.width(),
+                "height": geom.height(),
+                "scale": screen.devicePixelRatio()  # Physical pixels per logical pixel on this screen
+            })
+        controller.setMonitors(monitors)
+        print(f"Detected {len(monitors)} monitor(s): {monitors}")
+    
+    update_monitors()
+    app.screenAdded.connect(update_monitors)
+    app.screenRemoved.connect(update_monitors)
     
     # Expose controller to QML
     engine.rootContext().setContextProperty("bridge", controller)
+    engine.addImageProvider("frozen", controller.frameProvider())
+    engine.addImageProvider("thumbs", controller.thumbnailProvider())
     
     # Load QML files
     base_path = os.path.dirname(os.path.abspath(__file__))
@@ -128,6 +157,7 @@ def main():
     if not engine.rootObjects():
         print("Error: Could not load QML files.")
         sys.exit(-1)
+    startup.mark("qml_loaded")
         
     main_window = engine.rootObjects()[0]
 
@@ -153,28 +183,39 @@ def main():
     else:
         # Optional: Show main window on startup anyway for better UX
         main_window.show()
+    startup.mark("tray")
+    
+    # Shortcut and autostart files are not needed for this session; write them off the GUI thread
+    persistence.get_worker().submit("autostart", ensure_autostart)
     
+    def show_main_window():
+        main_window.showNormal()  # Ensure it's not minimized
+        main_window.raise_()
+        main_window.requestActivate()
+
     # Handle tray activation (click)
     def on_tray_activated(reason):
         if reason == QSystemTrayIcon.Trigger:
             if main_window.isVisible():
                 main_window.hide()
             else:
-                main_window.showNormal()  # Ensure it's not minimized
-                main_window.requestActivate()
+                show_main_window()
                 
     tray_icon.activated.connect(on_tray_activated)
 
+    # Command channel: scripts and keybindings drive this instance (python main.py capture-region ...)
+    from src.ui.command_server import CommandServer
+    command_server = CommandServer(controller, show_main_window, parent=app)
+    command_server.listen()
+
     # Hotkey Listener with dynamic configuration
-    from src.core.config import Config
-    config = Config()
-    
     listener = None  # Will hold the current hotkey listener
     
     def on_activate():
         """Callback when hotkey is pressed."""
         print(f"Hotkey pressed!")
-        controller.triggerCapture()
+        # Runs on pynput's listener thread; the capture itself is started on the GUI thread
+        controller.hotkeyActivated.emit()
     
     def start_hotkey_listener(hotkey_combo: str):
         """Start or restart the hotkey listener with the given combination."""
@@ -188,6 +229,9 @@ def main():
                 pass
         
         try:
+            # pynput loads the platform input backend on import; keep it off the path to the tray
+            from pynput import keyboard
+            
             # Start new listener
             listener = keyboard.GlobalHotKeys({
                 hotkey_combo: on_activate
@@ -209,13 +253,31 @@ def main():
     def on_autostart_update_requested(enabled: bool):
         """Handler for when user toggles autostart."""
         print(f"Autostart {'enabled' if enabled else 'disabled'}")
-        ensure_autostart()
+        # Toggling quickly rewrites the entry once, with the final setting
+        persistence.get_worker().submit("autostart", ensure_autostart, delay=persistence.SETTINGS_DELAY)
     
     controller.autostartUpdateRequested.connect(on_autostart_update_requested)
     
+    def finish_startup():
+        """Deferred until the event loop runs, so the window and tray paint first."""
+        start_hotkey_listener(config.get_hotkey())
+        startup.mark("hotkey_ready")
+        print("Startup timings:\n" + startup.report())
+        # The history database may need migrating; open it off the GUI thread now the tray is up
+        controller.loadHistory()
+        # Build the OCR client in the background so the first capture doesn't pay for it
+        controller.warmUpOcr()
+    
     # Start with configured hotkey
-    start_hotkey_listener(config.get_hotkey())
+    QTimer.singleShot(0, finish_startup)
 
+    app.aboutToQuit.connect(command_server.close)
+    app.aboutToQuit.connect(controller.shutdown)
+    
+    if qt_loop is not None:
+        with qt_loop:
+            qt_loop.run_forever()
+        sys.exit(0)
     sys.exit(app.exec())
 
 if __name__ == "__main__":
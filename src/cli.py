@@ -0,0 +1,269 @@
+"""
+Headless command line interface.
+
+Usage:
+    python -m src ocr <paths...> [-j WORKERS] [--rate N] [-o results.jsonl]
+    python -m src capture | capture-region X,Y,W,H [--wait] | ocr-file PATH [--wait] | get-last-result | show
+
+Each image produces one JSON line with its text (or error), timing and upload
+size. When writing to a file, images already recorded there are skipped, so an
+interrupted run can simply be restarted.
+
+The other commands are sent to the running Lexiclip instance over its command
+channel and return at once; they load neither Qt nor the Gemini SDK.
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Iterable, List, Set
+
+IMAGE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".webp", ".bmp", ".gif", ".tif", ".tiff"}
+
+
+class RateLimiter:
+    """Token bucket shared by worker threads."""
+
+    def __init__(self, rate: float, burst: int = 1):
+        """
+        Args:
+            rate: Requests per second (0 for unlimited)
+            burst: Maximum requests allowed back to back
+        """
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self._tokens = float(self.capacity)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+def collect_images(paths: Iterable[str]) -> List[str]:
+    """Expand files and directories (recursively) into a sorted list of image paths."""
+    found = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, files in os.walk(path):
+                for name in files:
+                    if os.path.splitext(name)[1].lower() in IMAGE_EXTENSIONS:
+                        found.append(os.path.join(root, name))
+        elif os.path.isfile(path):
+            found.append(path)
+        else:
+            print(f"Skipping missing path: {path}", file=sys.stderr)
+    return sorted({os.path.abspath(p) for p in found})
+
+
+def completed_paths(output: str) -> Set[str]:
+    """Paths that already have a successful result in an existing JSONL file."""
+    done = set()
+    if not output or not os.path.exists(output):
+        return done
+    with open(output, "r") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # Partial line from an interrupted run
+            if record.get("status") == "ok":
+                done.add(record["path"])
+    return done
+
+
+def ocr_file(engine, path: str, limiter: RateLimiter) -> dict:
+    """OCR one image file and return its JSONL record."""
+    from PIL import Image
+
+    record = {"path": path}
+    usage = {}
+    try:
+        with Image.open(path) as img:
+            img.load()
+            image = img.convert("RGB")
+        record.update(width=image.width, height=image.height)
+        limiter.acquire()
+        start = time.perf_counter()
+        try:
+            text = engine.extract_text(image)
+        finally:
+            usage = engine.last_usage
+        record.update(status="ok", text=text, latency_ms=round((time.perf_counter() - start) * 1000, 1),
+                      bytes_uploaded=engine.last_upload_stats.get("bytes", 0),
+                      prompt_tokens=usage.get("prompt_tokens", 0), response_tokens=usage.get("response_tokens", 0))
+    except Exception as e:
+        record.update(status="error", error=str(e))
+    record["usage"] = usage  # For accounting; removed before the record is written
+    return record
+
+
+def run_ocr(args) -> int:
+    from src.core import history, ocr
+    from src.core.config import Config
+
+    # Transport settings are read from the environment when the engine is configured
+    for variable, value in (("LEXICLIP_OCR_TRANSPORT", args.transport), ("LEXICLIP_CASSETTE", args.cassette),
+                            ("LEXICLIP_REPLAY_SPEED", args.replay_speed)):
+        if value is not None:
+            os.environ[variable] = str(value)
+
+    paths = collect_images(args.paths)
+    skipped = completed_paths(args.output) if args.resume else set()
+    pending = [p for p in paths if p not in skipped]
+    if skipped:
+        print(f"Resuming: {len(skipped)} already done, {len(pending)} to go", file=sys.stderr)
+
+    engine = ocr.get_engine()
+    if args.routing:
+        engine.configure(routing=args.routing)
+    budget = Config().get_daily_token_budget()
+    if budget and history.tokens_used() >= budget:
+        engine.set_over_budget(True)
+    limiter = RateLimiter(args.rate, burst=args.workers)
+    out = open(args.output, "a") if args.output else sys.stdout
+
+    ok = failed = uploaded = tokens = 0
+    start = time.perf_counter()
+    executor = ThreadPoolExecutor(max_workers=args.workers)
+    try:
+        futures = [executor.submit(ocr_file, engine, path, limiter) for path in pending]
+        for future in as_completed(futures):
+            record = future.result()
+            usage = record.pop("usage")
+            entry_id = None
+            if record["status"] == "ok":
+                ok += 1
+                uploaded += record.get("bytes_uploaded", 0)
+                tokens += record["prompt_tokens"] + record["response_tokens"]
+                if args.history:
+                    entry_id = history.add_entry(record["text"], {"source": record["path"]}).get("id")
+            else:
+                failed += 1
+            history.record_usage(usage, entry_id)
+            if budget and not engine.over_budget and history.tokens_used() >= budget:
+                # Images not started yet use the budget settings
+                engine.set_over_budget(True)
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            out.flush()
+            if args.progress:
+                done = ok + failed
+                elapsed = time.perf_counter() - start
+                print(f"\r{done}/{len(pending)}  {done / elapsed:.2f} img/s", end="", file=sys.stderr)
+    except KeyboardInterrupt:
+        print("\nInterrupted; re-run the same command to resume.", file=sys.stderr)
+        return 130
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+        if out is not sys.stdout:
+            out.close()
+        elapsed = time.perf_counter() - start
+        done = ok + failed
+        if args.progress and done:
+            print(file=sys.stderr)
+        print(f"{done} images in {elapsed:.1f}s ({done / elapsed if elapsed else 0:.2f} img/s), "
+              f"{ok} ok, {failed} failed, {uploaded / 1024:.1f} KiB uploaded "
+              f"({uploaded / elapsed / 1024 if elapsed else 0:.1f} KiB/s), {tokens} tokens", file=sys.stderr)
+    return 0 if failed == 0 else 1
+
+
+def _region(value: str):
+    try:
+        x, y, width, height = (int(part) for part in value.split(","))
+    except ValueError:
+        raise argparse.ArgumentTypeError("expected X,Y,WIDTH,HEIGHT, e.g. 100,200,640,480")
+    if width <= 0 or height <= 0:
+        raise argparse.ArgumentTypeError("width and height must be positive")
+    return {"x": x, "y": y, "width": width, "height": height}
+
+
+def run_command(args) -> int:
+    """Forward a command to the running instance and print its result."""
+    from src.core import ipc
+
+    params = {}
+    if args.command == ipc.CAPTURE_REGION:
+        params = dict(args.region, wait=args.wait)
+    elif args.command == ipc.OCR_FILE:
+        params = {"path": os.path.abspath(args.path), "wait": args.wait}
+    wait = getattr(args, "wait", False)
+    try:
+        reply = ipc.send(args.command, params, timeout=ipc.WAIT_TIMEOUT if wait else ipc.TIMEOUT)
+    except ipc.NotRunning:
+        print("Lexiclip is not running.", file=sys.stderr)
+        return 2
+    except (OSError, ValueError) as e:
+        print(f"Command failed: {e}", file=sys.stderr)
+        return 1
+    if not reply.get("ok"):
+        print(f"Error: {reply.get('error', 'unknown error')}", file=sys.stderr)
+        return 1
+    if "text" in reply:
+        print(reply["text"])
+    elif "job" in reply:
+        print(f"Queued as OCR job {reply['job']}", file=sys.stderr)
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="lexiclip", description="Lexiclip OCR command line tools")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("ocr", help="OCR image files and print JSON lines")
+    p.add_argument("paths", nargs="+", help="Image files or directories (searched recursively)")
+    p.add_argument("-j", "--workers", type=int, default=4, help="Concurrent requests (default: 4)")
+    p.add_argument("--rate", type=float, default=0, help="Maximum requests per second (default: unlimited)")
+    p.add_argument("-o", "--output", help="Append results to this JSONL file instead of stdout")
+    p.add_argument("--no-resume", dest="resume", action="store_false",
+                   help="Re-process images already recorded in the output file")
+    p.add_argument("--history", action="store_true", help="Also add results to the Lexiclip history")
+    p.add_argument("--routing", choices=["remote", "local", "auto", "fallback"],
+                   help="Override the configured OCR routing policy")
+    p.add_argument("--progress", action="store_true", help="Show progress on stderr")
+    p.add_argument("--transport", choices=["live", "record", "replay"],
+                   help="Call the API, record its responses to a cassette, or replay them offline")
+    p.add_argument("--cassette", help="Cassette file for --transport record/replay")
+    p.add_argument("--replay-speed", type=float,
+                   help="Replay speed multiplier (1 = recorded timing, 0 = no delays)")
+    p.set_defaults(func=run_ocr)
+
+    # Commands for the running instance
+    p = sub.add_parser("capture", help="Open the selection overlay of the running instance")
+    p.set_defaults(func=run_command)
+    p = sub.add_parser("capture-region", help="OCR a screen region in the running instance")
+    p.add_argument("region", type=_region, help="X,Y,WIDTH,HEIGHT in screen coordinates")
+    p.add_argument("--wait", action="store_true", help="Wait for the text and print it")
+    p.set_defaults(func=run_command)
+    p = sub.add_parser("ocr-file", help="OCR an image file in the running instance (added to history)")
+    p.add_argument("path", help="Image file")
+    p.add_argument("--wait", action="store_true", help="Wait for the text and print it")
+    p.set_defaults(func=run_command)
+    p = sub.add_parser("get-last-result", help="Print the latest OCR text of the running instance")
+    p.set_defaults(func=run_command)
+    p = sub.add_parser("show", help="Show the window of the running instance")
+    p.set_defaults(func=run_command)
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,87 @@
+"""
+The asyncio event loop behind the async OCR path.
+
+By default the loop runs on a daemon thread of its own: coroutines are handed
+over thread-safely and report back to Qt through queued signals, so the GUI
+thread never runs OCR code. With the optional qasync package the loop can
+instead be Qt's own event loop (async_loop setting 'qt'); coroutines then run
+on the GUI thread between Qt events, and CPU work still goes to the executor.
+"""
+
+import asyncio
+import concurrent.futures
+import threading
+from typing import Coroutine, Optional
+
+_qt_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def install_qt_loop(app) -> Optional[asyncio.AbstractEventLoop]:
+    """
+    Make the Qt event loop drive asyncio. Call before the app starts.
+
+    Returns:
+        The loop (run it with `loop.run_forever()` instead of `app.exec()`),
+        or None if qasync is not installed
+    """
+    global _qt_loop
+    try:
+        import qasync
+    except ImportError:
+        print("qasync not installed; running the async OCR loop on its own thread")
+        return None
+    _qt_loop = qasync.QEventLoop(app)
+    asyncio.set_event_loop(_qt_loop)
+    return _qt_loop
+
+
+class LoopRunner:
+    """Submits coroutines to an event loop from any thread."""
+
+    def __init__(self, loop: Optional[asyncio.AbstractEventLoop] = None, name: str = "ocr-async"):
+        """
+        Args:
+            loop: A loop run elsewhere (e.g. by Qt); when None a loop is started on a daemon thread
+            name: Name of that thread
+        """
+        self._thread = None
+        if loop is None:
+            loop = asyncio.new_event_loop()
+            self._thread = threading.Thread(target=self._run, args=(loop,), name=name, daemon=True)
+            self._thread.start()
+        self.loop = loop
+
+    @staticmethod
+    def _run(loop: asyncio.AbstractEventLoop):
+        asyncio.set_event_loop(loop)
+        loop.run_forever()
+
+    def submit(self, coro: Coroutine) -> concurrent.futures.Future:
+        """Schedule a coroutine; cancelling the returned future cancels its task."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def stop(self, timeout: float = 2.0):
+        """Cancel outstanding tasks and stop the loop if this runner owns it."""
+        if self._thread is None:
+            return
+
+        def cancel_all():
+            for task in asyncio.all_tasks(self.loop):
+                task.cancel()
+            self.loop.call_soon(self.loop.stop)
+
+        self.loop.call_soon_threadsafe(cancel_all)
+        self._thread.join(timeout)
+
+
+_runner: Optional[LoopRunner] = None
+_runner_lock = threading.Lock()
+
+
+def get_runner() -> LoopRunner:
+    """Return the process-wide runner, on the Qt loop if one was installed."""
+    global _runner
+    with _runner_lock:
+        if _runner is None:
+            _runner = LoopRunner(_qt_loop)
+        return _runner
@@ -0,0 +1,603 @@
+"""OCR backend implementations (remote Gemini and local Tesseract)."""
+
+import asyncio
+import json
+import os
+import shutil
+import threading
+import time
+from typing import AsyncIterator, Callable, Iterator, List, Optional, Tuple
+
+from PIL import Image, ImageOps
+
+from src.core import cassette as cassette_mod
+from src.core import tracing
+from src.core.retry import CallFailed, ResilientCaller, request_usage
+from src.core.preprocess import PreprocessOptions, prepare_image
+
+try:
+    import pytesseract
+except ImportError:  # Local OCR is optional
+    pytesseract = None
+
+genai = None  # google.generativeai, imported on first use (it is slow to import)
+
+# Alternative Gemini endpoint (e.g. the local stub in benchmarks/), served over REST
+ENDPOINT_ENV = "LEXICLIP_GEMINI_ENDPOINT"
+
+
+def _load_genai():
+    global genai
+    if genai is None:
+        import google.generativeai
+        genai = google.generativeai
+    return genai
+
+
+# Prompt optimized for pure OCR
+PROMPT = "Extract the text from this image. Return ONLY the extracted text. Do not describe the image. Do not use markdown code blocks."
+
+# Prompt for several regions packed into one request; {count} is the number of images
+MULTI_PROMPT = ("Extract the text from each of the following {count} images separately. "
+                "Return ONLY a JSON array of {count} strings, one per image in the order given, "
+                "containing exactly the extracted text. Do not describe the images.")
+
+
+class OcrBackend:
+    """Base class for OCR backends."""
+
+    name = "base"
+    local = False
+
+    def is_available(self) -> bool:
+        """Return True if the backend can serve requests right now."""
+        return True
+
+    def extract_text(self, image: Image.Image, timeout: Optional[float] = None) -> str:
+        """
+        Extract text from an image.
+
+        Args:
+            image: Captured image
+            timeout: Optional per-request timeout in seconds
+
+        Returns:
+            Extracted text
+        """
+        raise NotImplementedError
+
+    def stream_text(self, image: Image.Image, timeout: Optional[float] = None) -> Iterator[str]:
+        """
+        Extract text incrementally, yielding chunks as they become available.
+
+        Backends without native streaming yield the full result once.
+        """
+        yield self.extract_text(image, timeout)
+
+    def extract_regions(self, images: List[Image.Image], timeout: Optional[float] = None) -> List[str]:
+        """
+        Extract text from several images, one result per image.
+
+        Backends without a batched request run them one after another.
+        """
+        return [self.extract_text(image, timeout) for image in images]
+
+
+class GeminiBackend(OcrBackend):
+    """
+    Remote OCR through the Gemini API.
+
+    Holds the configured client and model so that captures reuse the same
+    connection instead of paying setup cost on every call. The session is only
+    rebuilt when the API key or model name changes.
+    """
+
+    name = "gemini"
+
+    def __init__(self, api_key: str = "", model_name: str = "gemini-2.5-flash"):
+        self._lock = threading.Lock()
+        self._api_key = api_key
+        self._model_name = model_name
+        self._model = None
+        self._warm = False
+        self.preprocess_options = PreprocessOptions()
+        self._local = threading.local()  # Per-thread upload report, safe with concurrent requests
+        self.transport = cassette_mod.LIVE
+        self.cassette: Optional[cassette_mod.Cassette] = None
+        self.caller = ResilientCaller()  # Deadline, retry and hedging policy (caller.policy)
+
+    @property
+    def model_name(self) -> str:
+        return self._model_name
+
+    @property
+    def api_key(self) -> str:
+        return self._api_key
+
+    def set_transport(self, transport: str, cassette: Optional[cassette_mod.Cassette] = None):
+        """
+        Choose between live requests, recording them to a cassette, or replaying from one.
+
+        Args:
+            transport: cassette.LIVE, RECORD or REPLAY
+            cassette: Required for RECORD and REPLAY
+        """
+        if transport not in cassette_mod.TRANSPORTS:
+            raise ValueError(f"Unknown OCR transport: {transport}")
+        if transport != cassette_mod.LIVE and cassette is None:
+            raise ValueError(f"The {transport} transport needs a cassette")
+        self.transport = transport
+        self.cassette = cassette
+
+    @property
+    def last_upload_stats(self) -> dict:
+        """Preprocessing report of the last upload made by the calling thread."""
+        return getattr(self._local, "stats", {})
+
+    @property
+    def last_call(self) -> dict:
+        """Attempts and outcome of the last request made by the calling thread."""
+        return getattr(self._local, "call", {})
+
+    @property
+    def last_usage(self) -> dict:
+        """Token counts (prompt_tokens, response_tokens) of the last request made by the calling thread."""
+        return getattr(self._local, "usage", {})
+
+    def clear_upload_stats(self):
+        self._local.stats = {}
+        self._local.call = {}
+        self._local.usage = {}
+
+    def reports(self) -> Tuple[dict, dict, dict]:
+        """The calling thread's (upload stats, call report, token usage), e.g. to hand them to another thread."""
+        return self.last_upload_stats, self.last_call, self.last_usage
+
+    def set_reports(self, stats: dict, call: dict, usage: dict):
+        """Make reports gathered on other threads the calling thread's."""
+        self._local.stats = stats
+        self._local.call = call
+        self._local.usage = usage
+
+    def configure(self, api_key: str, model_name: str):
+        """
+        Update the API key and model name.
+
+        The client is dropped only if a value actually changed; it is
+        recreated lazily on the next request (or by warm_up()).
+        """
+        with self._lock:
+            if api_key == self._api_key and model_name == self._model_name:
+                return
+            self._api_key = api_key
+            self._model_name = model_name
+            self._model = None
+            self._warm = False
+
+    def is_available(self) -> bool:
+        return bool(self._api_key) or self.transport == cassette_mod.REPLAY
+
+    def _get_model(self):
+        """Return the cached model, building the client if needed."""
+        with self._lock:
+            if self._model is None:
+                if not self._api_key:
+                    raise ValueError("Gemini API key not configured. Please set it in Settings or GEMINI_API_KEY environment variable.")
+                endpoint = os.getenv(ENDPOINT_ENV)
+                if endpoint:
+                    _load_genai().configure(api_key=self._api_key, transport="rest",
+                                            client_options={"api_endpoint": endpoint})
+                else:
+                    _load_genai().configure(api_key=self._api_key)
+                self._model = genai.GenerativeModel(self._model_name)
+            return self._model
+
+    @property
+    def is_warm(self) -> bool:
+        return self._warm
+
+    def warm_up(self):
+        """
+        Build the client and open its connection ahead of the first capture.
+
+        Fetches the model metadata, which does not consume generation quota.
+        Does nothing if the current session is already warm. Errors are logged
+        and ignored; the real request will surface them.
+        """
+        if self._warm or self.transport == cassette_mod.REPLAY:
+            return
+        try:
+            self._get_model()
+            _load_genai().get_model(f"models/{self._model_name}")
+            self._warm = True
+            print(f"OCR engine warmed up ({self._model_name})")
+        except Exception as e:
+            print(f"OCR warm-up skipped: {e}")
+
+    def prepare(self, image: Image.Image):
+        """Preprocess and encode an image for upload, recording the report."""
+        prepared = prepare_image(image, self.preprocess_options)
+        self._local.stats = prepared.stats
+        self._prepared(prepared)
+        return prepared
+
+    @staticmethod
+    def _prepared(prepared):
+        tracing.mark(tracing.ENCODE)
+        s = prepared.stats
+        print(f"Upload prepared: {s['original_size']} -> {s['final_size']} {s['format']} {s['params']}, "
+              f"{s['bytes']} bytes in {s['elapsed_ms']:.1f}ms")
+
+    def extract_text(self, image: Image.Image, timeout: Optional[float] = None) -> str:
+        prepared = self.prepare(image)
+        return self._request([PROMPT, prepared.blob()], timeout=timeout)
+
+    def extract_regions(self, images: List[Image.Image], timeout: Optional[float] = None) -> List[str]:
+        """Send all regions in a single request and split the JSON array answer."""
+        if len(images) == 1:
+            return [self.extract_text(images[0], timeout)]
+        parts = [MULTI_PROMPT.format(count=len(images))]
+        total_bytes = 0
+        for i, image in enumerate(images, 1):
+            prepared = prepare_image(image, self.preprocess_options)
+            total_bytes += prepared.stats["bytes"]
+            parts += [f"Image {i}:", prepared.blob()]
+        tracing.mark(tracing.ENCODE)
+        self._local.stats = {"bytes": total_bytes, "regions": len(images)}
+        print(f"Uploading {len(images)} regions in one request ({total_bytes} bytes)")
+        answer = self._request(parts, generation_config={"response_mime_type": "application/json"},
+                               timeout=timeout)
+        texts = json.loads(answer)
+        if not isinstance(texts, list) or len(texts) != len(images):
+            raise ValueError(f"Expected {len(images)} region results, got: {answer[:200]}")
+        return [str(t) for t in texts]
+
+    def stream_text(self, image: Image.Image, timeout: Optional[float] = None) -> Iterator[str]:
+        prepared = self.prepare(image)
+        parts = [PROMPT, prepared.blob()]
+
+        def first_chunk(remaining):
+            # Retries are only possible until text starts arriving
+            usage = request_usage()
+            pieces = self._generate(parts, stream=True, timeout=remaining, usage=usage)
+            return pieces, next(pieces, None), usage
+
+        (pieces, first, self._local.usage), self._local.call = self._call(first_chunk, timeout, hedge=False)
+        if first is not None:
+            yield first
+            yield from pieces
+
+    def _request(self, parts: List, generation_config: Optional[dict] = None,
+                 timeout: Optional[float] = None) -> str:
+        """One complete (non-streamed) request under the retry policy."""
+
+        def attempt(remaining):
+            # Each attempt fills its own usage, so a hedged loser cannot overwrite the winner's
+            usage = request_usage()
+            text = "".join(self._generate(parts, generation_config=generation_config, timeout=remaining,
+                                          usage=usage))
+            return text, usage
+
+        (text, self._local.usage), self._local.call = self._call(attempt, timeout)
+        _bill_abandoned(self._local.call, self._local.usage)
+        return text
+
+    def _call(self, attempt, timeout: Optional[float], hedge: bool = True):
+        try:
+            return self.caller.call(attempt, timeout, hedge)
+        except CallFailed as e:
+            self._local.call = e.report
+            raise
+
+    def _generate(self, parts: List, stream: bool = False, generation_config: Optional[dict] = None,
+                  timeout: Optional[float] = None, usage: Optional[dict] = None) -> Iterator[str]:
+        """
+        Send one request through the configured transport and yield its text as it arrives.
+
+        Token counts reported by the API are written into `usage` once the response is complete.
+        """
+        usage = {} if usage is None else usage
+        cassette = self.cassette
+        if self.transport == cassette_mod.REPLAY:
+            interaction = cassette.lookup(cassette_mod.fingerprint(self._model_name, parts, generation_config))
+            tracing.mark(tracing.UPLOAD)
+            for text in cassette.replay(interaction):
+                tracing.mark(tracing.FIRST_BYTE)
+                yield text
+            usage.update(interaction.get("usage") or {})
+            return
+
+        pieces = self._generate_live(parts, stream, generation_config, timeout, usage)
+        if self.transport != cassette_mod.RECORD:
+            yield from pieces
+            return
+        key = cassette_mod.fingerprint(self._model_name, parts, generation_config)
+        start = time.perf_counter()
+        chunks = []
+        try:
+            for text in pieces:
+                chunks.append(((time.perf_counter() - start) * 1000, text))
+                yield text
+        except Exception as e:
+            cassette.record(key, chunks, (time.perf_counter() - start) * 1000, error=e, usage=usage)
+            raise
+        cassette.record(key, chunks, (time.perf_counter() - start) * 1000, usage=usage)
+
+    def _generate_live(self, parts: List, stream: bool, generation_config: Optional[dict],
+                       timeout: Optional[float], usage: dict) -> Iterator[str]:
+        model = self._get_model()
+        request_options = {"timeout": timeout} if timeout else None
+        extra = {"generation_config": generation_config} if generation_config else {}
+        tracing.mark(tracing.UPLOAD)
+        response = model.generate_content(parts, stream=stream, request_options=request_options, **extra)
+        if not stream:
+            tracing.mark(tracing.FIRST_BYTE)
+            usage.update(_token_counts(response))
+            yield response.text
+            return
+        for chunk in response:
+            # Counts arrive with the chunks; the last one carries the totals
+            usage.update(_token_counts(chunk))
+            tracing.mark(tracing.FIRST_BYTE)
+            try:
+                text = chunk.text
+            except ValueError:
+                # Chunks without text parts (e.g. trailing finish metadata)
+                continue
+            if text:
+                yield text
+
+    # -- asyncio path -----------------------------------------------------------------
+    # The same requests for callers on an event loop. Many can be in flight on one
+    # thread, and cancelling the awaiting task cancels the request. Rather than
+    # thread-local state, each call returns its report: {"stats", "call", "usage"}.
+    # A CallFailed raised here carries the upload stats as `stats`, and so does the
+    # CancelledError of a cancelled call (next to its `report`).
+
+    async def extract_text_async(self, image: Image.Image, timeout: Optional[float] = None) -> Tuple[str, dict]:
+        prepared = await self._prepare_async(image)
+        parts = [PROMPT, prepared.blob()]
+
+        async def attempt(remaining):
+            usage = request_usage()
+            pieces = [text async for text in self._generate_async(parts, timeout=remaining, usage=usage)]
+            return "".join(pieces), usage
+
+        (text, usage), call = await self._call_async(attempt, timeout, prepared.stats)
+        _bill_abandoned(call, usage)
+        return text, {"stats": prepared.stats, "call": call, "usage": usage}
+
+    async def stream_text_async(self, image: Image.Image, on_chunk: Callable[[str], None],
+                                timeout: Optional[float] = None) -> Tuple[str, dict]:
+        """Streamed extract_text_async(); `on_chunk` is called with each piece as it arrives."""
+        prepared = await self._prepare_async(image)
+        parts = [PROMPT, prepared.blob()]
+
+        async def first_chunk(remaining):
+            # Retries are only possible until text starts arriving
+            usage = request_usage()
+            pieces = self._generate_async(parts, stream=True, timeout=remaining, usage=usage)
+            try:
+                first = await pieces.__anext__()
+            except StopAsyncIteration:
+                first = None
+            return pieces, first, usage
+
+        (pieces, first, usage), call = await self._call_async(first_chunk, timeout, prepared.stats, hedge=False)
+        texts = []
+        if first is not None:
+            texts.append(first)
+            on_chunk(first)
+            try:
+                async for piece in pieces:
+                    texts.append(piece)
+                    on_chunk(piece)
+            except asyncio.CancelledError as e:
+                e.stats, e.report = prepared.stats, call
+                raise
+        return "".join(texts), {"stats": prepared.stats, "call": call, "usage": usage}
+
+    async def _prepare_async(self, image: Image.Image):
+        # Resizing and encoding are CPU work; keep them off the loop
+        prepared = await asyncio.get_running_loop().run_in_executor(None, prepare_image, image,
+                                                                     self.preprocess_options)
+        self._prepared(prepared)
+        return prepared
+
+    async def _call_async(self, attempt, timeout: Optional[float], stats: dict, hedge: bool = True):
+        try:
+            return await self.caller.call_async(attempt, timeout, hedge)
+        except (CallFailed, asyncio.CancelledError) as e:
+            e.stats = stats
+            raise
+
+    async def _generate_async(self, parts: List, stream: bool = False, generation_config: Optional[dict] = None,
+                              timeout: Optional[float] = None, usage: Optional[dict] = None) -> AsyncIterator[str]:
+        """_generate() on the event loop."""
+        usage = {} if usage is None else usage
+        cassette = self.cassette
+        if self.transport == cassette_mod.REPLAY:
+            interaction = cassette.lookup(cassette_mod.fingerprint(self._model_name, parts, generation_config))
+            tracing.mark(tracing.UPLOAD)
+            async for text in cassette.replay_async(interaction):
+                tracing.mark(tracing.FIRST_BYTE)
+                yield text
+            usage.update(interaction.get("usage") or {})
+            return
+
+        pieces = self._generate_live_async(parts, stream, generation_config, timeout, usage)
+        if self.transport != cassette_mod.RECORD:
+            async for text in pieces:
+                yield text
+            return
+        key = cassette_mod.fingerprint(self._model_name, parts, generation_config)
+        start = time.perf_counter()
+        chunks = []
+        try:
+            async for text in pieces:
+                chunks.append(((time.perf_counter() - start) * 1000, text))
+                yield text
+        except Exception as e:
+            cassette.record(key, chunks, (time.perf_counter() - start) * 1000, error=e, usage=usage)
+            raise
+        cassette.record(key, chunks, (time.perf_counter() - start) * 1000, usage=usage)
+
+    async def _generate_live_async(self, parts: List, stream: bool, generation_config: Optional[dict],
+                                   timeout: Optional[float], usage: dict) -> AsyncIterator[str]:
+        model = self._get_model()
+        if os.getenv(ENDPOINT_ENV):
+            # The REST transport has no async client; pull the blocking stream from a worker thread
+            pieces = self._generate_live(parts, stream, generation_config, timeout, usage)
+            while True:
+                text = await asyncio.to_thread(next, pieces, None)
+                if text is None:
+                    return
+                yield text
+        request_options = {"timeout": timeout} if timeout else None
+        extra = {"generation_config": generation_config} if generation_config else {}
+        tracing.mark(tracing.UPLOAD)
+        response = await model.generate_content_async(parts, stream=stream, request_options=request_options,
+                                                      **extra)
+        if not stream:
+            tracing.mark(tracing.FIRST_BYTE)
+            usage.update(_token_counts(response))
+            yield response.text
+            return
+        async for chunk in response:
+            tracing.mark(tracing.FIRST_BYTE)
+            usage.update(_token_counts(chunk))
+            try:
+                text = chunk.text
+            except ValueError:
+                continue
+            if text:
+                yield text
+
+
+class TesseractBackend(OcrBackend):
+    """
+    Local CPU OCR through Tesseract.
+
+    Requires the optional `pytesseract` package and the `tesseract` binary.
+    """
+
+    name = "tesseract"
+    local = True
+
+    def __init__(self, language: str = "eng"):
+        self.language = language
+        self._available = None
+
+    def is_available(self) -> bool:
+        if self._available is None:
+            if pytesseract is None:
+                self._available = False
+            else:
+                cmd = getattr(pytesseract.pytesseract, "tesseract_cmd", "tesseract")
+                self._available = shutil.which(cmd) is not None
+        return self._available
+
+    def _prepare(self, image: Image.Image) -> Image.Image:
+        # Tesseract does best on dark text over a light background
+        gray = image.convert("L")
+        if _mean(gray) < 128:
+            gray = ImageOps.invert(gray)
+        return gray
+
+    def extract_with_confidence(self, image: Image.Image, timeout: Optional[float] = None) -> Tuple[str, float]:
+        """
+        Extract text and the mean word confidence (0-100).
+
+        Returns:
+            (text, confidence); confidence is 0 when no words were found
+        """
+        if not self.is_available():
+            raise RuntimeError("Local OCR unavailable. Install tesseract and the pytesseract package.")
+        gray = self._prepare(image)
+        data = pytesseract.image_to_data(gray, lang=self.language, timeout=timeout or 0,
+                                         output_type=pytesseract.Output.DICT)
+        lines, words, confidences = [], [], []
+        current = None
+        for i, word in enumerate(data["text"]):
+            if not word.strip():
+                continue
+            line = (data["block_num"][i], data["par_num"][i], data["line_num"][i])
+            if line != current:
+                if words:
+                    lines.append(" ".join(words))
+                if current is not None and line[:2] != current[:2]:
+                    lines.append("")  # Paragraph break
+                words, current = [], line
+            words.append(word)
+            if float(data["conf"][i]) >= 0:
+                confidences.append(float(data["conf"][i]))
+        if words:
+            lines.append(" ".join(words))
+        text = "\n".join(lines)
+        confidence = sum(confidences) / len(confidences) if confidences else 0.0
+        return text.strip(), confidence
+
+    def extract_text(self, image: Image.Image, timeout: Optional[float] = None) -> str:
+        return self.extract_with_confidence(image, timeout)[0]
+
+
+def _bill_abandoned(call: dict, usage: dict):
+    """
+    Give hedged requests abandoned before they answered the winner's prompt tokens.
+
+    They were sent, and billed, with the same prompt and image; what they
+    would have generated is unknown.
+    """
+    for request in call.get("requests", ()):
+        if request["outcome"] == "abandoned" and not request.get("usage"):
+            request["usage"] = {"prompt_tokens": usage.get("prompt_tokens", 0), "estimated": True}
+
+
+def _token_counts(response) -> dict:
+    """Prompt/response token counts from a response's usage_metadata (empty if absent)."""
+    metadata = getattr(response, "usage_metadata", None)
+    if not metadata:
+        return {}
+    prompt = getattr(metadata, "prompt_token_count", 0) or 0
+    output = getattr(metadata, "candidates_token_count", 0) or 0
+    if not prompt and not output:
+        return {}
+    return {"prompt_tokens": int(prompt), "response_tokens": int(output)}
+
+
+def _mean(gray: Image.Image) -> float:
+    hist = gray.histogram()
+    total = sum(hist)
+    return sum(i * n for i, n in enumerate(hist)) / total if total else 0.0
+
+
+def is_simple_image(image: Image.Image, max_pixels: int = 1_500_000, max_midtone_ratio: float = 0.08) -> bool:
+    """
+    Heuristic for "easy" text that local OCR handles well.
+
+    A capture qualifies if it is reasonably small and high contrast, i.e.
+    almost all pixels sit near either the background or the ink level with few
+    mid-tones (photos, gradients and anti-aliased small fonts have many).
+
+    Args:
+        image: Captured image
+        max_pixels: Larger captures are always treated as hard
+        max_midtone_ratio: Maximum fraction of pixels far from both extremes
+
+    Returns:
+        True if the image looks like simple high-contrast text
+    """
+    if image.width * image.height > max_pixels:
+        return False
+    hist = image.convert("L").histogram()
+    total = sum(hist)
+    if not total:
+        return False
+    background = max(range(256), key=lambda i: hist[i])
+    # Ink is the most common level on the far side of the background
+    far = [i for i in range(256) if abs(i - background) > 96]
+    if not far:
+        return False
+    ink = max(far, key=lambda i: hist[i])
+    near = sum(n for i, n in enumerate(hist) if abs(i - background) <= 32 or abs(i - ink) <= 32)
+    return (total - near) / total <= max_midtone_ratio
@@ -1,24 +1,186 @@
-import mss
+import threading
+import time
 from PIL import Image
 
+try:
+    import numpy as np
+except ImportError:  # NumPy views are optional
+    np = None
+
+
+class Frame:
+    """
+    A raw BGRA screen grab.
+
+    Wraps the grabber's buffer without copying it; conversion to a PIL image
+    (one decode pass) or a NumPy view (no copy) happens only when asked for.
+    """
+
+    def __init__(self, raw, width: int, height: int, left: int = 0, top: int = 0, grab_ms: float = 0.0):
+        self.raw = raw  # BGRA bytes / bytearray, row-major, width * 4 bytes per row
+        self.width = width
+        self.height = height
+        self.left = left
+        self.top = top
+        self.grab_ms = grab_ms
+
+    @property
+    def size(self):
+        return self.width, self.height
+
+    def array(self):
+        """
+        NumPy view of the pixels, shape (height, width, 4) in BGRA order.
+
+        Raises:
+            RuntimeError: If NumPy is not installed
+        """
+        if np is None:
+            raise RuntimeError("NumPy is not installed")
+        return np.frombuffer(self.raw, dtype=np.uint8).reshape(self.height, self.width, 4)
+
+    def crop(self, x: int, y: int, width: int, height: int) -> "Frame":
+        """
+        Cut a region out of this frame (frame-relative pixel coordinates).
+
+        Only the selected rows are sliced from the buffer; nothing is decoded.
+        The region is clamped to the frame bounds.
+        """
+        x0, y0 = max(0, x), max(0, y)
+        x1, y1 = min(self.width, x + width), min(self.height, y + height)
+        if x1 <= x0 or y1 <= y0:
+            raise ValueError(f"Crop {x},{y} {width}x{height} is outside the {self.width}x{self.height} frame")
+        stride = self.width * 4
+        view = memoryview(self.raw)
+        rows = [view[row * stride + x0 * 4: row * stride + x1 * 4] for row in range(y0, y1)]
+        return Frame(b"".join(rows), x1 - x0, y1 - y0, self.left + x0, self.top + y0)
+
+    def to_image(self) -> Image.Image:
+        """Decode straight from the raw buffer into an RGB PIL image."""
+        return Image.frombuffer("RGB", self.size, self.raw, "raw", "BGRX", 0, 1)
+
+
+class ScreenCapturer:
+    """
+    Long-lived screen grabber.
+
+    Keeps one mss instance per thread (mss handles are not thread-safe) open
+    between captures. Call invalidate() when the monitor layout changes so the
+    handles are recreated with fresh geometry.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._generation = 0
+        self.last_timing = {}
+
+    def invalidate(self):
+        """Recreate grabbers on next use (e.g. after monitors were added or removed)."""
+        self._generation += 1
+
+    def _grabber(self):
+        local = self._local
+        if getattr(local, "sct", None) is None or local.generation != self._generation:
+            import mss  # Imported on first grab: Frame works without it (e.g. benchmarks)
+
+            if getattr(local, "sct", None) is not None:
+                local.sct.close()
+            local.sct = mss.mss()
+            local.generation = self._generation
+        return local.sct
+
+    def close(self):
+        """Close the calling thread's grabber."""
+        sct = getattr(self._local, "sct", None)
+        if sct is not None:
+            sct.close()
+            self._local.sct = None
+
+    def virtual_desktop(self):
+        """Bounding box of all monitors as {left, top, width, height}."""
+        return dict(self._grabber().monitors[0])
+
+    def grab(self, x: int, y: int, width: int, height: int) -> Frame:
+        """
+        Grab a region of the virtual desktop.
+
+        Args:
+            x: The left coordinate.
+            y: The top coordinate.
+            width: The width of the region.
+            height: The height of the region.
+
+        Returns:
+            A Frame wrapping the raw BGRA buffer
+        """
+        start = time.perf_counter()
+        # mss handles multi-monitor setups automatically with coordinates
+        monitor = {"top": y, "left": x, "width": width, "height": height}
+        sct_img = self._grabber().grab(monitor)
+        grab_ms = (time.perf_counter() - start) * 1000
+        # .raw is the grabber's own buffer; .bgra would make a copy
+        return Frame(sct_img.raw, sct_img.width, sct_img.height, x, y, grab_ms)
+
+    def grab_desktop(self) -> Frame:
+        """Grab the whole virtual desktop (all monitors) in one pass."""
+        desktop = self.virtual_desktop()
+        return self.grab(desktop["left"], desktop["top"], desktop["width"], desktop["height"])
+
+    def capture_image(self, x: int, y: int, width: int, height: int) -> Image.Image:
+        """Grab a region and return it as an RGB PIL image, recording per-stage timings."""
+        frame = self.grab(x, y, width, height)
+        start = time.perf_counter()
+        img = frame.to_image()
+        self.last_timing = {"grab_ms": frame.grab_ms, "convert_ms": (time.perf_counter() - start) * 1000}
+        return img
+
+
+_capturer = ScreenCapturer()
+
+
+def get_capturer() -> ScreenCapturer:
+    """Return the process-wide screen capturer."""
+    return _capturer
+
+
 def capture_region(x: int, y: int, width: int, height: int) -> Image.Image:
     """
     Captures a region of the screen.
-    
+
     Args:
         x: The left coordinate.
         y: The top coordinate.
         width: The width of the region.
         height: The height of the region.
-        
+
     Returns:
         A PIL Image object.
     """
-    with mss.mss() as sct:
-        # mss handles multi-monitor setups automatically with coordinates
-        monitor = {"top": y, "left": x, "width": width, "height": height}
-        sct_img = sct.grab(monitor)
-        
-        # Convert to PIL Image
-        img = Image.frombytes("RGB", sct_img.size, sct_img.bgra, "raw", "BGRX")
-        return img
+    return _capturer.capture_image(x, y, width, height)
+
+
+def reading_order(regions):
+    """
+    Sort regions top-to-bottom, then left-to-right.
+
+    Regions whose vertical centers fall within the same row band (half the
+    smaller height) are treated as one row, so cells of a table line up.
+
+    Args:
+        regions: Dicts with x, y, width, height
+
+    Returns:
+        A new list in reading order
+    """
+    rows = []
+    for region in sorted(regions, key=lambda r: r["y"] + r["height"] / 2):
+        center = region["y"] + region["height"] / 2
+        for row in rows:
+            ref = row[0]
+            band = min(ref["height"], region["height"]) / 2
+            if abs(center - (ref["y"] + ref["height"] / 2)) <= band:
+                row.append(region)
+                break
+        else:
+            rows.append([region])
+    return [region for row in rows for region in sorted(row, key=lambda r: r["x"])]
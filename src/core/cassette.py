@@ -0,0 +1,206 @@
+"""
+Record/replay of remote OCR responses.
+
+In record mode every Gemini request is fingerprinted (model, prompt parts,
+image bytes and generation settings) and its response is appended to a
+cassette file together with its timing: when each streamed chunk arrived,
+or when and how the request failed. Replay mode serves those responses back
+without touching the network, at the recorded pace or scaled by a speed
+factor, so runs are deterministic and cost no quota.
+
+The cassette is a JSON lines file, one interaction per line.
+"""
+
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import AsyncIterator, Dict, Iterator, List, Optional
+
+from src.core.history import DATA_DIR
+from src.core.retry import is_retryable
+
+DEFAULT_CASSETTE = os.path.join(DATA_DIR, "cassette.jsonl")
+
+# Transport modes
+LIVE = "live"
+RECORD = "record"
+REPLAY = "replay"
+TRANSPORTS = (LIVE, RECORD, REPLAY)
+
+# Replay matching
+MATCH_EXACT = "exact"
+MATCH_ANY = "any"
+
+
+class CassetteMiss(LookupError):
+    """Raised in replay mode when no recording matches a request."""
+
+
+class ReplayedError(RuntimeError):
+    """
+    A recorded request failure, raised again on replay.
+
+    Carries the original error's class name, HTTP status (`code`) and whether
+    it was retryable, so retries and hedging replay as they happened live.
+    """
+
+    def __init__(self, message: str, error_type: str = "", code: Optional[int] = None,
+                 retryable: Optional[bool] = None):
+        super().__init__(message)
+        self.error_type = error_type
+        self.code = code
+        self.retryable = retryable
+
+    @classmethod
+    def from_interaction(cls, interaction: Dict) -> "ReplayedError":
+        return cls(interaction["error"], interaction.get("error_type") or "", interaction.get("error_code"),
+                   interaction.get("retryable"))
+
+
+def fingerprint(model_name: str, parts: List, generation_config: Optional[Dict] = None) -> str:
+    """
+    Stable hash of a request.
+
+    Text parts are hashed as UTF-8; inline data parts by MIME type and bytes.
+    Whether the request was streamed is deliberately left out, so a response
+    recorded one way can be replayed the other.
+    """
+    h = hashlib.sha256()
+    h.update(model_name.encode())
+    for part in parts:
+        if isinstance(part, dict):
+            h.update(b"\0blob:" + part.get("mime_type", "").encode() + b":")
+            data = part.get("data", b"")
+            h.update(data if isinstance(data, bytes) else base64.b64decode(data))
+        else:
+            h.update(b"\0text:" + str(part).encode())
+    if generation_config:
+        h.update(b"\0config:" + json.dumps(generation_config, sort_keys=True).encode())
+    return h.hexdigest()
+
+
+class Cassette:
+    """
+    Recorded interactions, keyed by request fingerprint.
+
+    Several recordings of the same request are replayed in turn.
+    """
+
+    def __init__(self, path: str = DEFAULT_CASSETTE, speed: float = 1.0, match: str = MATCH_EXACT):
+        """
+        Args:
+            path: Cassette file (created when recording)
+            speed: Replay speed multiplier; 0 replays without delays
+            match: MATCH_EXACT or MATCH_ANY (cycle through every recording)
+        """
+        self.path = path or DEFAULT_CASSETTE
+        self.speed = speed
+        self.match = match
+        self._lock = threading.Lock()
+        self._interactions: Optional[Dict[str, List[Dict]]] = None  # Loaded lazily
+        self._order: List[Dict] = []
+        self._cursor: Dict[str, int] = {}
+
+    def _load(self) -> Dict[str, List[Dict]]:
+        if self._interactions is not None:
+            return self._interactions
+        self._interactions = {}
+        if os.path.exists(self.path):
+            with open(self.path, "r") as f:
+                for line in f:
+                    try:
+                        interaction = json.loads(line)
+                    except ValueError:
+                        continue  # Partial line from an interrupted recording
+                    self._add(interaction)
+        return self._interactions
+
+    def _add(self, interaction: Dict):
+        self._interactions.setdefault(interaction["fingerprint"], []).append(interaction)
+        self._order.append(interaction)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._load())
+
+    def record(self, key: str, chunks: List, elapsed_ms: float, error: Optional[BaseException] = None,
+               usage: Optional[Dict] = None):
+        """
+        Append one interaction.
+
+        Args:
+            key: Request fingerprint
+            chunks: [offset_ms, text] pairs, offsets measured from the request start
+            elapsed_ms: Time until the response completed (or failed)
+            error: The exception if the request failed; its message, class,
+                status and retryability are recorded
+            usage: Token counts reported by the API, replayed with the response
+        """
+        interaction = {
+            "fingerprint": key,
+            "recordedAt": time.time(),
+            "chunks": [[round(offset, 2), text] for offset, text in chunks],
+            "elapsed_ms": round(elapsed_ms, 2),
+            "error": str(error) if error is not None else None,
+            "usage": usage or None,
+        }
+        if error is not None:
+            code = getattr(error, "code", None)
+            interaction.update(error_type=type(error).__name__, error_code=code if isinstance(code, int) else None,
+                               retryable=is_retryable(error))
+        with self._lock:
+            self._load()
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            # One line per interaction: appends are cheap and a crash loses at most the last line
+            with open(self.path, "a") as f:
+                f.write(json.dumps(interaction, ensure_ascii=False) + "\n")
+            self._add(interaction)
+
+    def lookup(self, key: str) -> Dict:
+        """
+        Pick the recording to replay for a request.
+
+        Raises:
+            CassetteMiss: If nothing matches
+        """
+        with self._lock:
+            interactions = self._load()
+            if self.match == MATCH_ANY:
+                candidates, cursor_key = self._order, ""
+            else:
+                candidates, cursor_key = interactions.get(key, []), key
+            if not candidates:
+                raise CassetteMiss(f"No recorded response for request {key[:12]} in {self.path}")
+            index = self._cursor.get(cursor_key, 0)
+            self._cursor[cursor_key] = index + 1
+            return candidates[index % len(candidates)]
+
+    def replay(self, interaction: Dict) -> Iterator[str]:
+        """Yield the recorded chunks at the recorded pace (scaled by speed), or raise the recorded error."""
+        start = time.perf_counter()
+        for offset_ms, text in interaction["chunks"]:
+            time.sleep(self._delay(start, offset_ms))
+            yield text
+        if interaction.get("error"):
+            time.sleep(self._delay(start, interaction["elapsed_ms"]))
+            raise ReplayedError.from_interaction(interaction)
+
+    async def replay_async(self, interaction: Dict) -> AsyncIterator[str]:
+        """replay() for the asyncio path: waits without blocking the loop."""
+        start = time.perf_counter()
+        for offset_ms, text in interaction["chunks"]:
+            await asyncio.sleep(self._delay(start, offset_ms))
+            yield text
+        if interaction.get("error"):
+            await asyncio.sleep(self._delay(start, interaction["elapsed_ms"]))
+            raise ReplayedError.from_interaction(interaction)
+
+    def _delay(self, start: float, offset_ms: float) -> float:
+        """Seconds to wait until `offset_ms` (scaled by speed) after `start`."""
+        if self.speed <= 0:
+            return 0.0
+        return max(0.0, offset_ms / 1000 / self.speed - (time.perf_counter() - start))
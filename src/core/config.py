@@ -1,7 +1,16 @@
 """Configuration management for Lexiclip OCR."""
 
+import os
+
 from PySide6.QtCore import QSettings
 
+from src.core import persistence
+
+
+def _sync_settings():
+    # QSettings objects for the same file share their unsaved changes, so any instance can write them
+    QSettings("Lexiclip", "Lexiclip OCR").sync()
+
 
 class Config:
     """Manages application configuration with persistent storage."""
@@ -9,6 +18,15 @@ class Config:
     def __init__(self):
         """Initialize configuration with QSettings."""
         self.settings = QSettings("Lexiclip", "Lexiclip OCR")
+    
+    def _save(self):
+        """
+        Write changed settings to disk on the persistence thread.
+        
+        Changes are visible to every Config at once; the file is written
+        shortly afterwards, once per burst of changes, and on quit.
+        """
+        persistence.get_worker().submit("settings", _sync_settings, delay=persistence.SETTINGS_DELAY)
         
     def get_hotkey(self) -> str:
         """
@@ -27,7 +45,7 @@ class Config:
             hotkey: Hotkey string in pynput format
         """
         self.settings.setValue("hotkey", hotkey)
-        self.settings.sync()
+        self._save()
     
     def get_hotkey_display(self) -> str:
         """
@@ -67,7 +85,7 @@ class Config:
             api_key: The API key to store
         """
         self.settings.setValue("gemini_api_key", api_key)
-        self.settings.sync()
+        self._save()
     
     def get_autostart_enabled(self) -> bool:
         """
@@ -86,4 +104,550 @@ class Config:
             enabled: True to enable autostart, False to disable
         """
         self.settings.setValue("autostart_enabled", enabled)
-        self.settings.sync()
+        self._save()
+    
+    def get_model_name(self) -> str:
+        """
+        Get the Gemini model used for OCR.
+        
+        Returns:
+            Model name (e.g., 'gemini-2.5-flash')
+        """
+        return self.settings.value("gemini_model", "gemini-2.5-flash")
+    
+    def set_model_name(self, model_name: str):
+        """
+        Set the Gemini model used for OCR.
+        
+        Args:
+            model_name: The model name to store
+        """
+        self.settings.setValue("gemini_model", model_name)
+        self._save()
+    
+    def get_ocr_cache_enabled(self) -> bool:
+        """
+        Get whether OCR results are cached by captured image.
+        
+        Returns:
+            True if the OCR result cache is enabled
+        """
+        return self.settings.value("ocr_cache_enabled", True, type=bool)
+    
+    def set_ocr_cache_enabled(self, enabled: bool):
+        """
+        Set whether OCR results are cached by captured image.
+        
+        Args:
+            enabled: True to reuse results for identical captures
+        """
+        self.settings.setValue("ocr_cache_enabled", enabled)
+        self._save()
+    
+    def get_ocr_cache_phash_distance(self) -> int:
+        """
+        Get how far a capture's perceptual hash may be from a cached one to reuse its text.
+        
+        Returns:
+            Maximum Hamming distance, or -1 to reuse only identical captures (the default)
+        """
+        return max(-1, self.settings.value("ocr_cache_phash_distance", -1, type=int))
+    
+    def get_ocr_routing(self) -> str:
+        """
+        Get the OCR routing policy.
+        
+        Returns:
+            One of 'remote', 'local', 'auto' or 'fallback'
+        """
+        return self.settings.value("ocr_routing", "remote")
+    
+    def set_ocr_routing(self, routing: str):
+        """
+        Set the OCR routing policy.
+        
+        Args:
+            routing: One of 'remote', 'local', 'auto' or 'fallback'
+        """
+        self.settings.setValue("ocr_routing", routing)
+        self._save()
+    
+    def get_local_ocr_language(self) -> str:
+        """
+        Get the Tesseract language code(s) used by local OCR.
+        
+        Returns:
+            Language string (e.g., 'eng' or 'eng+deu')
+        """
+        return self.settings.value("local_ocr_language", "eng")
+    
+    def get_remote_timeout(self) -> float:
+        """
+        Get the remote OCR timeout used before falling back to local OCR.
+        
+        Returns:
+            Timeout in seconds
+        """
+        return self.settings.value("remote_timeout", 8.0, type=float)
+    
+    def get_preprocess_enabled(self) -> bool:
+        """
+        Get whether captures are preprocessed and re-encoded before upload.
+        
+        Returns:
+            True if preprocessing is enabled
+        """
+        return self.settings.value("preprocess_enabled", True, type=bool)
+    
+    def set_preprocess_enabled(self, enabled: bool):
+        """
+        Set whether captures are preprocessed and re-encoded before upload.
+        
+        Args:
+            enabled: True to enable preprocessing
+        """
+        self.settings.setValue("preprocess_enabled", enabled)
+        self._save()
+    
+    def get_preprocess_grayscale(self) -> str:
+        """
+        Get the grayscale conversion mode for uploads.
+        
+        Returns:
+            'auto' (when color is irrelevant), 'always' or 'never'
+        """
+        return self.settings.value("preprocess_grayscale", "auto")
+    
+    def get_target_text_height(self) -> int:
+        """
+        Get the text line height (in pixels) uploads are downscaled to.
+        
+        Returns:
+            Target height, 0 to disable downscaling
+        """
+        return self.settings.value("target_text_height", 24, type=int)
+    
+    def get_upload_byte_budget(self) -> int:
+        """
+        Get the byte budget for an encoded upload.
+        
+        Returns:
+            Budget in bytes
+        """
+        return self.settings.value("upload_byte_budget", 300 * 1024, type=int)
+    
+    def get_streaming_enabled(self) -> bool:
+        """
+        Get whether OCR results are streamed into the UI as they arrive.
+        
+        Returns:
+            True if streaming is enabled
+        """
+        return self.settings.value("streaming_enabled", True, type=bool)
+    
+    def set_streaming_enabled(self, enabled: bool):
+        """
+        Set whether OCR results are streamed into the UI as they arrive.
+        
+        Args:
+            enabled: True to enable streaming
+        """
+        self.settings.setValue("streaming_enabled", enabled)
+        self._save()
+    
+    def get_progressive_clipboard(self) -> bool:
+        """
+        Get whether the clipboard is updated with partial text while streaming.
+        
+        Returns:
+            True to update the clipboard on every chunk, False to set it once at the end
+        """
+        return self.settings.value("progressive_clipboard", False, type=bool)
+    
+    def set_progressive_clipboard(self, enabled: bool):
+        """
+        Set whether the clipboard is updated with partial text while streaming.
+        
+        Args:
+            enabled: True to update the clipboard on every chunk
+        """
+        self.settings.setValue("progressive_clipboard", enabled)
+        self._save()
+    
+    def get_ocr_max_concurrency(self) -> int:
+        """
+        Get the maximum number of OCR requests in flight.
+        
+        Returns:
+            Concurrency limit (at least 1)
+        """
+        return max(1, self.settings.value("ocr_max_concurrency", 2, type=int))
+    
+    def get_supersede_stale_jobs(self) -> bool:
+        """
+        Get whether a new capture cancels older unfinished OCR jobs.
+        
+        Returns:
+            True to cancel stale jobs, False to deliver every result in order
+        """
+        return self.settings.value("supersede_stale_jobs", True, type=bool)
+    
+    def get_history_limit(self) -> int:
+        """
+        Get how many history entries are kept.
+        
+        Returns:
+            Maximum number of entries, 0 for unlimited
+        """
+        return self.settings.value("history_limit", 0, type=int)
+    
+    def set_history_limit(self, limit: int):
+        """
+        Set how many history entries are kept.
+        
+        Args:
+            limit: Maximum number of entries, 0 for unlimited
+        """
+        self.settings.setValue("history_limit", limit)
+        self._save()
+    
+    def get_freeze_frame_enabled(self) -> bool:
+        """
+        Get whether the desktop is frozen when the hotkey fires.
+        
+        Returns:
+            True to crop selections from a frame grabbed at hotkey time,
+            False to grab the region live after the overlay closes
+        """
+        return self.settings.value("freeze_frame_enabled", True, type=bool)
+    
+    def set_freeze_frame_enabled(self, enabled: bool):
+        """
+        Set whether the desktop is frozen when the hotkey fires.
+        
+        Args:
+            enabled: True to enable freeze-frame capture
+        """
+        self.settings.setValue("freeze_frame_enabled", enabled)
+        self._save()
+    
+    def get_region_join_order(self) -> str:
+        """
+        Get how multi-region results are ordered when joined.
+        
+        Returns:
+            'selection' (order the regions were drawn) or 'reading' (top-to-bottom, left-to-right)
+        """
+        return self.settings.value("region_join_order", "selection")
+    
+    def set_region_join_order(self, order: str):
+        """
+        Set how multi-region results are ordered when joined.
+        
+        Args:
+            order: 'selection' or 'reading'
+        """
+        self.settings.setValue("region_join_order", order)
+        self._save()
+    
+    def get_ocr_transport(self) -> str:
+        """
+        Get how remote OCR requests are served. LEXICLIP_OCR_TRANSPORT overrides the setting.
+        
+        Returns:
+            'live' (call the API), 'record' (call the API and save responses to the
+            cassette) or 'replay' (serve responses from the cassette, no network)
+        """
+        return os.getenv("LEXICLIP_OCR_TRANSPORT") or self.settings.value("ocr_transport", "live")
+    
+    def set_ocr_transport(self, transport: str):
+        """
+        Set how remote OCR requests are served.
+        
+        Args:
+            transport: 'live', 'record' or 'replay'
+        """
+        self.settings.setValue("ocr_transport", transport)
+        self._save()
+    
+    def get_cassette_path(self) -> str:
+        """
+        Get the cassette file used by the record and replay transports. LEXICLIP_CASSETTE overrides the setting.
+        
+        Returns:
+            Path to a JSON lines file (empty for the default in the data directory)
+        """
+        return os.getenv("LEXICLIP_CASSETTE") or self.settings.value("cassette_path", "")
+    
+    def get_replay_speed(self) -> float:
+        """
+        Get the replay speed multiplier. LEXICLIP_REPLAY_SPEED overrides the setting.
+        
+        Returns:
+            1.0 replays at recorded timing, 10.0 ten times faster, 0 without delays
+        """
+        value = os.getenv("LEXICLIP_REPLAY_SPEED")
+        if value:
+            return float(value)
+        return self.settings.value("replay_speed", 1.0, type=float)
+    
+    def get_replay_match(self) -> str:
+        """
+        Get how replayed requests are matched to recordings. LEXICLIP_REPLAY_MATCH overrides the setting.
+        
+        Returns:
+            'exact' (same prompt and image bytes) or 'any' (cycle through all
+            recordings, e.g. to load-test with new captures)
+        """
+        return os.getenv("LEXICLIP_REPLAY_MATCH") or self.settings.value("replay_match", "exact")
+    
+    def get_ocr_deadline(self) -> float:
+        """
+        Get the time allowed for one capture's remote OCR, including retries.
+        
+        Returns:
+            Deadline in seconds
+        """
+        return self.settings.value("ocr_deadline", 20.0, type=float)
+    
+    def get_ocr_max_attempts(self) -> int:
+        """
+        Get how many times a remote OCR request is tried on transient errors.
+        
+        Returns:
+            Maximum number of attempts (1 disables retries)
+        """
+        return self.settings.value("ocr_max_attempts", 3, type=int)
+    
+    def get_hedging_enabled(self) -> bool:
+        """
+        Get whether a second request is sent when the first is slower than the usual p95.
+        
+        Returns:
+            True if hedged requests are enabled
+        """
+        return self.settings.value("hedging_enabled", False, type=bool)
+    
+    def set_hedging_enabled(self, enabled: bool):
+        """
+        Set whether slow remote OCR requests are hedged.
+        
+        Args:
+            enabled: True to enable hedged requests
+        """
+        self.settings.setValue("hedging_enabled", enabled)
+        self._save()
+    
+    def get_image_store_enabled(self) -> bool:
+        """
+        Get whether captured images are kept with their history entries.
+        
+        Returns:
+            True if capture images are stored
+        """
+        return self.settings.value("image_store_enabled", True, type=bool)
+    
+    def set_image_store_enabled(self, enabled: bool):
+        """
+        Set whether captured images are kept with their history entries.
+        
+        Args:
+            enabled: True to store capture images
+        """
+        self.settings.setValue("image_store_enabled", enabled)
+        self._save()
+    
+    def get_image_store_quota_mb(self) -> int:
+        """
+        Get the disk quota for stored capture images; the least recently used are evicted beyond it.
+        
+        Returns:
+            Quota in megabytes
+        """
+        return self.settings.value("image_store_quota_mb", 200, type=int)
+    
+    def get_daily_token_budget(self) -> int:
+        """
+        Get the number of Gemini tokens (prompt + response) allowed per day before budget settings apply.
+        
+        Returns:
+            Token budget, 0 for unlimited
+        """
+        return self.settings.value("daily_token_budget", 0, type=int)
+    
+    def set_daily_token_budget(self, tokens: int):
+        """
+        Set the daily Gemini token budget.
+        
+        Args:
+            tokens: Token budget, 0 for unlimited
+        """
+        self.settings.setValue("daily_token_budget", max(0, tokens))
+        self._save()
+    
+    def get_budget_action(self) -> str:
+        """
+        Get what happens once the daily token budget is used up.
+        
+        Returns:
+            'cheaper' (budget model, smaller uploads) or 'local' (Tesseract only)
+        """
+        return self.settings.value("budget_action", "cheaper")
+    
+    def set_budget_action(self, action: str):
+        """
+        Set what happens once the daily token budget is used up.
+        
+        Args:
+            action: 'cheaper' or 'local'
+        """
+        self.settings.setValue("budget_action", action)
+        self._save()
+    
+    def get_budget_model_name(self) -> str:
+        """
+        Get the Gemini model used while over budget with the 'cheaper' action.
+        
+        Returns:
+            Model name
+        """
+        return self.settings.value("budget_model_name", "gemini-2.5-flash-lite")
+    
+    def get_tiling_enabled(self) -> bool:
+        """
+        Get whether oversized captures are split into tiles that are OCRed concurrently.
+        
+        Returns:
+            True if tiling is enabled
+        """
+        return self.settings.value("tiling_enabled", True, type=bool)
+    
+    def set_tiling_enabled(self, enabled: bool):
+        """
+        Set whether oversized captures are split into tiles.
+        
+        Args:
+            enabled: True to enable tiling
+        """
+        self.settings.setValue("tiling_enabled", enabled)
+        self._save()
+    
+    def get_tile_max_side(self) -> int:
+        """
+        Get the largest capture side (in pixels) sent as a single image; larger captures are tiled.
+        
+        Returns:
+            Maximum side length in pixels
+        """
+        return self.settings.value("tile_max_side", 3072, type=int)
+    
+    def get_tile_concurrency(self) -> int:
+        """
+        Get how many tiles of one capture are OCRed at the same time.
+        
+        Returns:
+            Number of concurrent tile requests
+        """
+        return self.settings.value("tile_concurrency", 4, type=int)
+    
+    def get_async_ocr_enabled(self) -> bool:
+        """
+        Get whether OCR jobs run as coroutines on an asyncio loop instead of one pool thread each.
+        
+        Returns:
+            True to use the asyncio path
+        """
+        return self.settings.value("async_ocr_enabled", False, type=bool)
+    
+    def set_async_ocr_enabled(self, enabled: bool):
+        """
+        Set whether OCR jobs run on the asyncio path (takes effect on restart).
+        
+        Args:
+            enabled: True to use the asyncio path
+        """
+        self.settings.setValue("async_ocr_enabled", enabled)
+        self._save()
+    
+    def get_async_ocr_concurrency(self) -> int:
+        """
+        Get how many OCR jobs may be in flight at once on the asyncio path.
+        
+        Returns:
+            Maximum number of concurrent jobs
+        """
+        return max(1, self.settings.value("async_ocr_concurrency", 32, type=int))
+    
+    def get_async_loop(self) -> str:
+        """
+        Get which event loop runs the asyncio path.
+        
+        Returns:
+            'thread' (a loop on its own thread) or 'qt' (Qt's event loop, needs qasync)
+        """
+        return self.settings.value("async_loop", "thread")
+    
+    def get_ocr_job_deadline(self) -> float:
+        """
+        Get the time one OCR job may take on the asyncio path, including local fallback.
+        
+        Returns:
+            Deadline in seconds, or 0 for no deadline
+        """
+        return max(0.0, self.settings.value("ocr_job_deadline", 30.0, type=float))
+    
+    def get_watch_interval(self) -> float:
+        """
+        Get how often a watched region is re-captured.
+        
+        Returns:
+            Interval in seconds
+        """
+        return max(0.1, self.settings.value("watch_interval", 1.0, type=float))
+    
+    def set_watch_interval(self, seconds: float):
+        """
+        Set how often a watched region is re-captured.
+        
+        Args:
+            seconds: Interval in seconds
+        """
+        self.settings.setValue("watch_interval", max(0.1, seconds))
+        self._save()
+    
+    def get_watch_change_threshold(self) -> float:
+        """
+        Get the fraction of a watched region's pixels that must change before it is OCRed again.
+        
+        Returns:
+            Fraction between 0 and 1 (0.001 = 0.1% of the pixels)
+        """
+        return self.settings.value("watch_change_threshold", 0.001, type=float)
+    
+    def get_watch_debounce(self) -> float:
+        """
+        Get how long a changed region must stay still before it is OCRed.
+        
+        Returns:
+            Debounce in seconds
+        """
+        return self.settings.value("watch_debounce", 0.5, type=float)
+    
+    def get_watch_output_file(self) -> str:
+        """
+        Get the file that changed text from a watched region is appended to.
+        
+        Returns:
+            Path to a text file, empty to only add history entries
+        """
+        return self.settings.value("watch_output_file", "")
+    
+    def set_watch_output_file(self, path: str):
+        """
+        Set the file that changed text from a watched region is appended to.
+        
+        Args:
+            path: Path to a text file, empty to disable
+        """
+        self.settings.setValue("watch_output_file", path)
+        self._save()
@@ -1,57 +1,467 @@
 import json
 import os
+import re
+import sqlite3
+import threading
+import time
 from datetime import datetime
-from typing import List, Dict
+from typing import Dict, List, Optional
 
-HISTORY_FILE = os.path.expanduser("~/.local/share/pocr/history.json")
+from src.core.persistence import gui_io
 
-def load_history() -> List[Dict]:
-    """Loads history from JSON file."""
+DATA_DIR = os.path.expanduser("~/.local/share/pocr")
+HISTORY_FILE = os.path.join(DATA_DIR, "history.json")  # Legacy store, migrated on first use
+HISTORY_DB = os.path.join(DATA_DIR, "history.db")
+_JSON_MIGRATED = 1  # PRAGMA user_version once history.json has been imported
+
+PAGE_SIZE = 50
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at REAL NOT NULL,
+    timestamp TEXT NOT NULL,
+    text TEXT NOT NULL,
+    snippet TEXT NOT NULL,
+    metadata TEXT,
+    image_hash TEXT
+);
+CREATE TABLE IF NOT EXISTS usage (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at REAL NOT NULL,
+    day TEXT NOT NULL,
+    backend TEXT NOT NULL,
+    model TEXT,
+    ok INTEGER NOT NULL DEFAULT 1,
+    bytes INTEGER NOT NULL DEFAULT 0,
+    width INTEGER,
+    height INTEGER,
+    prompt_tokens INTEGER NOT NULL DEFAULT 0,
+    response_tokens INTEGER NOT NULL DEFAULT 0,
+    latency_ms REAL,
+    entry_id INTEGER
+);
+CREATE INDEX IF NOT EXISTS usage_day ON usage(day, backend);
+"""
+
+# Backend whose usage is billed (and counted against the token budget)
+BILLED_BACKEND = "gemini"
+
+# Full-text index kept in sync with `entries` by triggers (external content table)
+_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS entries_fts USING fts5(
+    text, content='entries', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS entries_ai AFTER INSERT ON entries BEGIN
+    INSERT INTO entries_fts(rowid, text) VALUES (new.id, new.text);
+END;
+CREATE TRIGGER IF NOT EXISTS entries_ad AFTER DELETE ON entries BEGIN
+    INSERT INTO entries_fts(entries_fts, rowid, text) VALUES ('delete', old.id, old.text);
+END;
+CREATE TRIGGER IF NOT EXISTS entries_au AFTER UPDATE OF text ON entries BEGIN
+    INSERT INTO entries_fts(entries_fts, rowid, text) VALUES ('delete', old.id, old.text);
+    INSERT INTO entries_fts(rowid, text) VALUES (new.id, new.text);
+END;
+"""
+
+_conn: Optional[sqlite3.Connection] = None
+_lock = threading.RLock()
+_retention = 0  # Maximum number of entries kept, 0 for unlimited
+_has_fts = False
+_released: List[str] = []  # Image digests no entry references any more since trimming
+
+
+def _connect() -> sqlite3.Connection:
+    """Open the history database once per process, creating and migrating it if needed."""
+    global _conn, _has_fts
+    with _lock:
+        if _conn is None:
+            os.makedirs(os.path.dirname(HISTORY_DB), exist_ok=True)
+            conn = sqlite3.connect(HISTORY_DB, check_same_thread=False, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            # WAL keeps appends cheap and lets readers run alongside the writer
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            try:
+                conn.executescript(_SCHEMA)
+                _migrate_schema(conn)
+                _has_fts = _init_fts(conn)
+                _migrate_json(conn)
+            except Exception:
+                # Not kept, so the next call retries the whole setup including the import
+                conn.close()
+                raise
+            _conn = conn
+        return _conn
+
+
+def _migrate_schema(conn: sqlite3.Connection):
+    """Add columns introduced after a database was created."""
+    columns = {row["name"] for row in conn.execute("PRAGMA table_info(entries)")}
+    if "image_hash" not in columns:
+        conn.execute("ALTER TABLE entries ADD COLUMN image_hash TEXT")
+    # Trimming checks whether an image is still referenced
+    conn.execute("CREATE INDEX IF NOT EXISTS entries_image ON entries(image_hash)")
+
+
+def close():
+    """Close the database connection; the next call reopens HISTORY_DB."""
+    global _conn
+    with _lock:
+        if _conn is not None:
+            _conn.close()
+            _conn = None
+
+
+def _init_fts(conn: sqlite3.Connection) -> bool:
+    """Create the full-text index, backfilling it for existing entries. False if FTS5 is unavailable."""
+    try:
+        exists = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type='table' AND name='entries_fts'"
+        ).fetchone()
+        conn.executescript(_FTS_SCHEMA)
+        if not exists:
+            conn.execute("INSERT INTO entries_fts(entries_fts) VALUES ('rebuild')")
+        return True
+    except sqlite3.OperationalError as e:
+        print(f"Full-text search unavailable, falling back to substring search: {e}")
+        return False
+
+
+def _migrate_json(conn: sqlite3.Connection):
+    """
+    Import entries from the legacy history.json and move it aside.
+
+    The import and the user_version mark recording it commit together, so a
+    failed import is retried on the next open and a file that could not be
+    moved aside is not imported twice.
+    """
     if not os.path.exists(HISTORY_FILE):
-        return []
+        return
+    if conn.execute("PRAGMA user_version").fetchone()[0] >= _JSON_MIGRATED:
+        os.replace(HISTORY_FILE, HISTORY_FILE + ".migrated")
+        return
     try:
         with open(HISTORY_FILE, 'r') as f:
-            return json.load(f)
+            legacy = json.load(f)
+    except Exception as e:
+        print(f"Error reading legacy history: {e}")
+        return
+    now = time.time()
+    conn.execute("BEGIN")
+    try:
+        # Legacy file is newest first; insert oldest first so ids follow capture order
+        for offset, entry in enumerate(reversed(legacy)):
+            conn.execute(
+                "INSERT INTO entries (created_at, timestamp, text, snippet, metadata) VALUES (?, ?, ?, ?, ?)",
+                (now - len(legacy) + offset, entry.get("timestamp", ""), entry.get("text", ""),
+                 entry.get("snippet") or make_snippet(entry.get("text", "")), None),
+            )
+        conn.execute(f"PRAGMA user_version = {_JSON_MIGRATED}")
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    os.replace(HISTORY_FILE, HISTORY_FILE + ".migrated")
+    print(f"Migrated {len(legacy)} history entries to {HISTORY_DB}")
+
+
+# Columns for list views; the full text is fetched separately on demand
+_SUMMARY_COLUMNS = ("entries.id, entries.created_at, entries.timestamp, entries.snippet, entries.metadata, "
+                    "entries.image_hash")
+
+
+def _row_to_entry(row: sqlite3.Row) -> Dict:
+    entry = {
+        "id": row["id"],
+        "createdAt": row["created_at"],
+        "timestamp": row["timestamp"],
+        "snippet": row["snippet"],
+        "metadata": json.loads(row["metadata"]) if row["metadata"] else {},
+        "imageHash": row["image_hash"] or "",
+    }
+    if "text" in row.keys():
+        entry["text"] = row["text"]
+    return entry
+
+
+def make_snippet(text: str) -> str:
+    return text[:50].replace("\n", " ") + ("..." if len(text) > 50 else "")
+
+
+def format_timestamp(now: datetime) -> str:
+    """Format as e.g. '2:45p 12/3/25'."""
+    # %-I / %-m / %-d give no-pad values on Linux; 'a' or 'p' for AM/PM
+    am_pm = now.strftime("%p").lower()[0]
+    return f"{now.strftime('%-I:%M')}{am_pm} {now.strftime('%-m/%-d/%y')}"
+
+
+def set_retention(max_entries: int):
+    """
+    Set how many entries are kept.
+
+    Args:
+        max_entries: Maximum number of entries, 0 for unlimited
+    """
+    global _retention
+    _retention = max(0, max_entries)
+    _trim()
+
+
+def get_retention() -> int:
+    """Maximum number of entries kept, 0 for unlimited."""
+    return _retention
+
+
+def _trim():
+    if not _retention:
+        return
+    with _lock:
+        row = _connect().execute("SELECT id FROM entries ORDER BY id DESC LIMIT 1 OFFSET ?", (_retention,)).fetchone()
+        if row is not None:
+            _delete_through(row[0])
+
+
+def _delete_through(last_id: int):
+    """Delete entries with ids up to `last_id`, remembering images only they referenced (call with _lock held)."""
+    conn = _connect()
+    digests = [row[0] for row in conn.execute(
+        "SELECT DISTINCT image_hash FROM entries WHERE id <= ? AND image_hash IS NOT NULL", (last_id,))]
+    conn.execute("DELETE FROM entries WHERE id <= ?", (last_id,))
+    _released.extend(digest for digest in digests
+                     if conn.execute("SELECT 1 FROM entries WHERE image_hash = ? LIMIT 1", (digest,)).fetchone() is None)
+
+
+def released_images() -> List[str]:
+    """Digests of stored images whose last history entry was trimmed since the previous call."""
+    with _lock:
+        digests = list(_released)
+        _released.clear()
+    return digests
+
+
+@gui_io("history")
+def load_history(limit: int = PAGE_SIZE, offset: int = 0, with_text: bool = True) -> List[Dict]:
+    """
+    Loads a page of history, newest first.
+
+    Args:
+        limit: Maximum number of entries to return
+        offset: Number of newest entries to skip
+        with_text: Include the full text (False returns summaries only)
+    """
+    columns = "*" if with_text else _SUMMARY_COLUMNS
+    try:
+        with _lock:
+            rows = _connect().execute(
+                f"SELECT {columns} FROM entries ORDER BY id DESC LIMIT ? OFFSET ?", (limit, offset)
+            ).fetchall()
+        return [_row_to_entry(row) for row in rows]
     except Exception as e:
         print(f"Error loading history: {e}")
         return []
 
-def save_history(history: List[Dict]):
-    """Saves history to JSON file."""
+
+@gui_io("history")
+def count() -> int:
+    """Number of stored entries."""
+    with _lock:
+        return _connect().execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+
+@gui_io("history")
+def get_text(entry_id: int) -> str:
+    """Fetch the full text of one entry (empty if it no longer exists)."""
+    with _lock:
+        row = _connect().execute("SELECT text FROM entries WHERE id = ?", (entry_id,)).fetchone()
+    return row[0] if row else ""
+
+
+@gui_io("history")
+def get_entry(entry_id: int) -> Optional[Dict]:
+    """Fetch one entry by id."""
+    with _lock:
+        row = _connect().execute("SELECT * FROM entries WHERE id = ?", (entry_id,)).fetchone()
+    return _row_to_entry(row) if row else None
+
+
+@gui_io("history")
+def add_entry(text: str, metadata: Optional[Dict] = None, image_hash: str = "") -> Dict:
+    """
+    Appends a new entry to history and applies the retention limit.
+
+    Args:
+        text: OCR text
+        metadata: Optional extra data stored with the entry
+        image_hash: Digest of the captured image in the image store, if kept
+
+    Returns:
+        The stored entry
+    """
+    now = datetime.now()
+    entry = {
+        "createdAt": now.timestamp(),
+        "timestamp": format_timestamp(now),
+        "text": text,
+        "snippet": make_snippet(text),
+        "metadata": metadata or {},
+        "imageHash": image_hash,
+    }
     try:
-        os.makedirs(os.path.dirname(HISTORY_FILE), exist_ok=True)
-        with open(HISTORY_FILE, 'w') as f:
-            json.dump(history, f, indent=2)
+        with _lock:
+            cursor = _connect().execute(
+                "INSERT INTO entries (created_at, timestamp, text, snippet, metadata, image_hash) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (entry["createdAt"], entry["timestamp"], text, entry["snippet"],
+                 json.dumps(metadata) if metadata else None, image_hash or None),
+            )
+            entry["id"] = cursor.lastrowid
+            if _retention and entry["id"] > _retention:
+                # Ids only grow, so this is an indexed range delete regardless of history size
+                _delete_through(entry["id"] - _retention)
     except Exception as e:
         print(f"Error saving history: {e}")
+    return entry
+
 
-def add_entry(text: str):
-    """Adds a new entry to history and trims to size."""
-    history = load_history()
-    # Format: 2:45p 12/3/25
+@gui_io("history")
+def record_usage(usage: Dict, entry_id: Optional[int] = None):
+    """
+    Record the cost of one OCR call. Usage is kept when entries are trimmed or cleared.
+
+    Args:
+        usage: OcrEngine.last_usage record
+        entry_id: History entry the call produced, if any
+    """
+    if not usage:
+        return
     now = datetime.now()
-    # %I is 01-12, %-I is 1-12 (linux). %p is AM/PM. 
-    # We want lowercase p/a, so we'll post-process or just use %p and accept upper case for now, 
-    # or use a custom format string.
-    # Let's try to match the user request exactly: "2:45p 12/3/25"
-    
-    # Using %-I for no-pad hour, %M for minute.
-    # %p gives AM/PM. We can lower() it and take the first char? Or just "p"/"a".
-    # User said "2:45p".
-    
-    am_pm = now.strftime("%p").lower()[0] # 'a' or 'p'
-    date_str = f"{now.strftime('%-I:%M')}{am_pm} {now.strftime('%-m/%-d/%y')}"
+    try:
+        with _lock:
+            _connect().execute(
+                "INSERT INTO usage (created_at, day, backend, model, ok, bytes, width, height, prompt_tokens, "
+                "response_tokens, latency_ms, entry_id) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (now.timestamp(), now.strftime("%Y-%m-%d"), usage.get("backend", ""), usage.get("model") or None,
+                 int(usage.get("ok", True)), usage.get("bytes", 0), usage.get("width"), usage.get("height"),
+                 usage.get("prompt_tokens", 0), usage.get("response_tokens", 0), usage.get("latency_ms"),
+                 entry_id),
+            )
+    except Exception as e:
+        print(f"Error recording usage: {e}")
+
+
+@gui_io("history")
+def tokens_used(day: Optional[str] = None) -> int:
+    """
+    Billed tokens (prompt + response) on one day.
+
+    Args:
+        day: 'YYYY-MM-DD', today when omitted
+    """
+    day = day or datetime.now().strftime("%Y-%m-%d")
+    try:
+        with _lock:
+            row = _connect().execute(
+                "SELECT COALESCE(SUM(prompt_tokens + response_tokens), 0) FROM usage WHERE day = ? AND backend = ?",
+                (day, BILLED_BACKEND),
+            ).fetchone()
+    except Exception as e:
+        print(f"Error reading token usage: {e}")
+        return 0
+    return row[0]
+
+
+@gui_io("history")
+def usage_summary(days: int = 7) -> List[Dict]:
+    """
+    Usage per day and backend over the last `days` days, newest first.
+
+    Returns:
+        Rows with day, backend, requests, failed, bytes, promptTokens,
+        responseTokens, avgLatencyMs and maxPixels
+    """
+    since = datetime.fromtimestamp(time.time() - max(0, days - 1) * 86400).strftime("%Y-%m-%d")
+    try:
+        with _lock:
+            rows = _connect().execute(
+                "SELECT day, backend, COUNT(*), SUM(1 - ok), SUM(bytes), SUM(prompt_tokens), "
+                "SUM(response_tokens), AVG(latency_ms), MAX(width * height) "
+                "FROM usage WHERE day >= ? GROUP BY day, backend ORDER BY day DESC, backend",
+                (since,),
+            ).fetchall()
+    except Exception as e:
+        print(f"Error loading usage: {e}")
+        return []
+    return [{
+        "day": row[0],
+        "backend": row[1],
+        "requests": row[2],
+        "failed": row[3],
+        "bytes": row[4],
+        "promptTokens": row[5],
+        "responseTokens": row[6],
+        "avgLatencyMs": round(row[7] or 0, 1),
+        "maxPixels": row[8] or 0,
+    } for row in rows]
+
+
+def _fts_query(query: str) -> str:
+    """
+    Translate user input into an FTS5 query.
+
+    Quoted text is matched as a phrase; other words are ANDed and matched as
+    prefixes so results update while typing.
+    """
+    parts = re.findall(r'"([^"]*)"?|(\S+)', query)
+    terms = []
+    for phrase, word in parts:
+        text = (phrase or word).replace('"', "").strip()
+        if text:
+            terms.append((text, bool(phrase)))
+    return " ".join(f'"{text}"' if is_phrase else f'"{text}"*' for text, is_phrase in terms)
+
+
+@gui_io("history")
+def search(query: str, limit: int = PAGE_SIZE, offset: int = 0, with_text: bool = True) -> List[Dict]:
+    """
+    Full-text search over history, best matches first.
+
+    Every word is matched as a prefix (all must match); "quoted phrases" match exactly.
+
+    Args:
+        query: Search text as typed by the user
+        limit: Maximum number of entries to return
+        offset: Number of results to skip
+        with_text: Include the full text (False returns summaries only)
+    """
+    match = _fts_query(query)
+    if not match:
+        return load_history(limit, offset, with_text)
+    columns = "entries.*" if with_text else _SUMMARY_COLUMNS
+    try:
+        with _lock:
+            conn = _connect()
+            if _has_fts:
+                rows = conn.execute(
+                    f"SELECT {columns} FROM entries_fts JOIN entries ON entries.id = entries_fts.rowid "
+                    "WHERE entries_fts MATCH ? ORDER BY bm25(entries_fts), entries.id DESC LIMIT ? OFFSET ?",
+                    (match, limit, offset),
+                ).fetchall()
+            else:
+                pattern = re.sub(r"([\\%_])", r"\\\1", query.strip())
+                rows = conn.execute(
+                    f"SELECT {columns} FROM entries WHERE text LIKE ? ESCAPE '\\' ORDER BY id DESC LIMIT ? OFFSET ?",
+                    (f"%{pattern}%", limit, offset),
+                ).fetchall()
+        return [_row_to_entry(row) for row in rows]
+    except sqlite3.OperationalError as e:
+        print(f"Error searching history: {e}")
+        return []
 
-    entry = {
-        "timestamp": date_str,
-        "text": text,
-        "snippet": text[:50].replace("\n", " ") + ("..." if len(text) > 50 else "")
-    }
-    history.insert(0, entry)
-    # Keep only last 10 entries as per PRD
-    history = history[:10]
-    save_history(history)
 
+@gui_io("history")
 def clear_history():
     """Clears all history."""
-    save_history([])
+    with _lock:
+        conn = _connect()
+        conn.execute("DELETE FROM entries")  # The entries_ad trigger clears the full-text index
@@ -0,0 +1,291 @@
+"""Content-addressed store of captured images, linked from history entries."""
+
+import io
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Optional
+
+from PIL import Image
+
+from src.core.history import DATA_DIR
+from src.core.ocr_cache import exact_hash
+from src.core.persistence import atomic_write
+
+IMAGE_DIR = os.path.join(DATA_DIR, "images")
+THUMB_SIZE = (160, 90)
+EXTENSIONS = {"PNG": ".png", "WEBP": ".webp"}
+
+
+def encode_lossless(image: Image.Image):
+    """Smaller of lossless PNG and WebP. Returns (data, format)."""
+    best = None
+    for fmt, params in (("PNG", {"optimize": True}), ("WEBP", {"lossless": True, "method": 4})):
+        buf = io.BytesIO()
+        image.save(buf, fmt, **params)
+        if best is None or buf.tell() < len(best[0]):
+            best = (buf.getvalue(), fmt)
+    return best
+
+
+class ImageStore:
+    """
+    Deduplicated on-disk store of capture images.
+
+    Images are keyed by the same pixel hash as the OCR cache, so a repeated
+    capture is stored once. The store is indexed and files are written on a
+    background thread; until then the image is served from memory. Each image
+    has a small thumbnail made on first request. Total size is kept under a
+    quota by evicting the least recently used images.
+    """
+
+    def __init__(self, root: str = IMAGE_DIR, quota_bytes: int = 200 * 1024 * 1024):
+        """
+        Args:
+            root: Directory for images and thumbnails
+            quota_bytes: Maximum total size of stored images and thumbnails
+        """
+        self.root = root
+        self.quota_bytes = quota_bytes
+        self._lock = threading.Lock()
+        self._pending: Dict[str, Image.Image] = {}  # Queued for writing
+        self._index: Optional[Dict[str, Dict]] = None  # digest -> {path, bytes, atime}
+        self._thumb_locks: Dict[str, threading.Lock] = {}  # One thumbnail being made per digest
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="image-store")
+        # Scanning the store stats every file; do it before the first capture needs the index
+        self._writer.submit(self._preload_index)
+
+    # -- public API ---------------------------------------------------------------
+
+    @staticmethod
+    def digest(image: Image.Image) -> str:
+        return exact_hash(image)
+
+    def put(self, image: Image.Image, digest: Optional[str] = None) -> str:
+        """
+        Queue an image for storage and return its digest immediately.
+
+        No disk access happens on the calling thread; an image that is
+        already stored is recognised on the writer thread.
+
+        Args:
+            image: Captured image
+            digest: Precomputed exact_hash() of the image, if known
+        """
+        digest = digest or self.digest(image)
+        with self._lock:
+            if digest in self._pending:
+                return digest
+            self._pending[digest] = image
+        self._writer.submit(self._write, digest, image)
+        return digest
+
+    def get(self, digest: str) -> Optional[Image.Image]:
+        """Load a stored image (None if unknown or evicted)."""
+        with self._lock:
+            image = self._pending.get(digest)
+            if image is not None:
+                return image
+            meta = self._load_index().get(digest)
+            if meta is None:
+                return None
+            self._touch(digest)
+            path = meta["path"]
+        try:
+            with Image.open(path) as img:
+                img.load()
+                return img.convert("RGB")
+        except OSError as e:
+            print(f"Error reading stored image {digest[:12]}: {e}")
+            return None
+
+    def contains(self, digest: str) -> bool:
+        with self._lock:
+            return digest in self._pending or digest in self._load_index()
+
+    def thumbnail(self, digest: str) -> Optional[str]:
+        """
+        Path of the image's thumbnail (PNG, at most THUMB_SIZE), creating it if needed.
+
+        Returns:
+            None if the image is not stored
+        """
+        path = self._thumb_path(digest)
+        if os.path.exists(path):
+            return path
+        with self._lock:
+            thumb_lock = self._thumb_locks.setdefault(digest, threading.Lock())
+        # The writer thread and the thumbnail provider's pool may ask for the same one at once
+        with thumb_lock:
+            try:
+                if os.path.exists(path):
+                    return path
+                image = self.get(digest)
+                if image is None:
+                    return None
+                thumb = image.copy()
+                thumb.thumbnail(THUMB_SIZE, Image.Resampling.LANCZOS)
+                buf = io.BytesIO()
+                thumb.save(buf, "PNG", optimize=True)
+                try:
+                    atomic_write(path, buf.getvalue())
+                except OSError as e:
+                    print(f"Error writing thumbnail: {e}")
+                    return None
+                with self._lock:
+                    meta = self._load_index().get(digest)
+                    if meta is not None:
+                        meta["bytes"] += buf.tell()
+                return path
+            finally:
+                with self._lock:
+                    self._thumb_locks.pop(digest, None)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            index = self._load_index()
+            return {
+                "images": len(index),
+                "pending": len(self._pending),
+                "bytes": sum(meta["bytes"] for meta in index.values()),
+                "quotaBytes": self.quota_bytes,
+            }
+
+    def clear(self):
+        """Remove all stored images and thumbnails, after any queued writes."""
+        self._writer.submit(self._clear).result()
+
+    def discard(self, digests: Iterable[str]):
+        """Remove images no history entry references any more (on the writer thread; returns at once)."""
+        digests = list(digests)
+        if digests:
+            self._writer.submit(self._discard, digests)
+
+    def flush(self):
+        """Wait for queued writes to finish."""
+        self._writer.submit(lambda: None).result()
+
+    # -- internals ------------------------------------------------------------------
+
+    def _image_path(self, digest: str, fmt: str) -> str:
+        return os.path.join(self.root, digest[:2], digest + EXTENSIONS[fmt])
+
+    def _thumb_path(self, digest: str) -> str:
+        return os.path.join(self.root, "thumbs", digest + ".png")
+
+    def _write(self, digest: str, image: Image.Image):
+        try:
+            with self._lock:
+                stored = digest in self._load_index()
+                if stored:
+                    self._touch(digest)  # A repeated capture
+            if stored:
+                return
+            data, fmt = encode_lossless(image)
+            path = self._image_path(digest, fmt)
+            atomic_write(path, data)
+            with self._lock:
+                self._load_index()[digest] = {"path": path, "bytes": len(data), "atime": time.time()}
+                self._evict()
+        except Exception as e:
+            print(f"Error storing capture image: {e}")
+        finally:
+            with self._lock:
+                self._pending.pop(digest, None)
+        # Make the thumbnail now so the history view rarely has to wait for one
+        self.thumbnail(digest)
+
+    def _touch(self, digest: str):
+        meta = self._load_index().get(digest)
+        if meta is None:
+            return
+        now = time.time()
+        meta["atime"] = now
+        try:
+            os.utime(meta["path"], (now, now))
+        except OSError:
+            pass
+
+    def _clear(self):
+        with self._lock:
+            for digest in list(self._load_index()):
+                self._remove(digest)
+
+    def _discard(self, digests):
+        with self._lock:
+            for digest in digests:
+                if digest not in self._pending:  # Captured again meanwhile
+                    self._remove(digest)
+
+    def _preload_index(self):
+        """Build the index on the writer thread, without holding the lock while scanning."""
+        if self._index is not None:
+            return
+        index = self._scan()
+        with self._lock:
+            if self._index is None:
+                self._index = index
+
+    def _load_index(self) -> Dict[str, Dict]:
+        """The index, scanning the store if the writer thread has not yet (call with self._lock held)."""
+        if self._index is None:
+            self._index = self._scan()
+        return self._index
+
+    def _scan(self) -> Dict[str, Dict]:
+        """Index every stored image; file mtimes double as last-access times."""
+        index = {}
+        if not os.path.isdir(self.root):
+            return index
+        for shard in os.listdir(self.root):
+            shard_dir = os.path.join(self.root, shard)
+            if shard == "thumbs" or not os.path.isdir(shard_dir):
+                continue
+            for name in os.listdir(shard_dir):
+                digest, ext = os.path.splitext(name)
+                if ext not in EXTENSIONS.values():
+                    continue
+                path = os.path.join(shard_dir, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                size = st.st_size
+                thumb = self._thumb_path(digest)
+                if os.path.exists(thumb):
+                    size += os.path.getsize(thumb)
+                index[digest] = {"path": path, "bytes": size, "atime": st.st_mtime}
+        return index
+
+    def _remove(self, digest: str):
+        meta = self._load_index().pop(digest, None)
+        for path in (meta["path"] if meta else None, self._thumb_path(digest)):
+            if path:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def _evict(self):
+        index = self._load_index()
+        total = sum(meta["bytes"] for meta in index.values())
+        for digest in sorted(index, key=lambda d: index[d]["atime"]):
+            if total <= self.quota_bytes:
+                break
+            total -= index[digest]["bytes"]
+            self._remove(digest)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store() -> ImageStore:
+    """Return the process-wide image store, creating it on first use."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            from src.core.config import Config
+            _store = ImageStore(quota_bytes=Config().get_image_store_quota_mb() * 1024 * 1024)
+        return _store
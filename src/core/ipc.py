@@ -0,0 +1,122 @@
+"""
+Command channel to the running instance.
+
+The GUI listens on a local socket (a Unix domain socket, or a named pipe on
+Windows) with QLocalServer; see src/ui/command_server.py. This module holds
+the address, the wire format and the client side, using nothing but the
+standard library so a script or window-manager keybinding gets its answer
+in milliseconds without loading Qt or the Gemini SDK.
+
+A connection carries one request and one reply, each a JSON object on one line:
+
+    {"command": "capture-region", "args": {"x": 0, "y": 0, "width": 400, "height": 300, "wait": true}}
+    {"ok": true, "text": "..."}
+"""
+
+import getpass
+import json
+import os
+import socket
+import sys
+import tempfile
+from typing import Dict, Optional
+
+CAPTURE = "capture"                  # Open the selection overlay
+CAPTURE_REGION = "capture-region"    # OCR a region: x, y, width, height [, wait]
+OCR_FILE = "ocr-file"                # OCR an image file: path [, wait]
+GET_LAST_RESULT = "get-last-result"  # Most recent OCR text
+SHOW = "show"                        # Show the main window
+COMMANDS = (CAPTURE, CAPTURE_REGION, OCR_FILE, GET_LAST_RESULT, SHOW)
+
+TIMEOUT = 5.0         # Seconds to wait for a reply
+WAIT_TIMEOUT = 120.0  # ...when waiting for an OCR result
+
+
+class NotRunning(ConnectionError):
+    """No instance is listening on the command channel."""
+
+
+def _user() -> str:
+    try:
+        return getpass.getuser()
+    except Exception:
+        return "user"
+
+
+def server_name() -> str:
+    """Socket path (Unix) or pipe name (Windows) of this user's instance."""
+    if sys.platform.startswith("win"):
+        return rf"\\.\pipe\lexiclip-{_user()}"
+    base = os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir()
+    return os.path.join(base, f"lexiclip-{_user()}.sock")
+
+
+def encode(message: Dict) -> bytes:
+    return (json.dumps(message, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+def decode(line: bytes) -> Dict:
+    """
+    Raises:
+        ValueError: If the line is not a JSON object
+    """
+    message = json.loads(line.decode("utf-8"))
+    if not isinstance(message, dict):
+        raise ValueError("Expected a JSON object")
+    return message
+
+
+def send(command: str, args: Optional[Dict] = None, timeout: float = TIMEOUT) -> Dict:
+    """
+    Send one command to the running instance and return its reply.
+
+    Args:
+        command: One of COMMANDS
+        args: Command arguments
+        timeout: Seconds to wait for the reply (Unix only; pipes block)
+
+    Returns:
+        The reply, with "ok" and either results or "error"
+
+    Raises:
+        NotRunning: If no instance is listening
+        OSError: On other connection failures or a timeout
+        ValueError: If the reply is malformed
+    """
+    payload = encode({"command": command, "args": args or {}})
+    name = server_name()
+    if sys.platform.startswith("win"):
+        return decode(_send_pipe(name, payload))
+    return decode(_send_unix(name, payload, timeout))
+
+
+def _send_unix(path: str, payload: bytes, timeout: float) -> bytes:
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        try:
+            sock.connect(path)
+        except (FileNotFoundError, ConnectionRefusedError) as e:
+            raise NotRunning(f"Lexiclip is not running ({path})") from e
+        sock.sendall(payload)
+        data = b""
+        while not data.endswith(b"\n"):
+            chunk = sock.recv(65536)
+            if not chunk:
+                break
+            data += chunk
+    if not data:
+        raise ConnectionError("Lexiclip closed the connection without replying")
+    return data
+
+
+def _send_pipe(name: str, payload: bytes) -> bytes:
+    try:
+        pipe = open(name, "r+b", buffering=0)
+    except FileNotFoundError as e:
+        raise NotRunning(f"Lexiclip is not running ({name})") from e
+    with pipe:
+        pipe.write(payload)
+        data = pipe.readline()
+    if not data:
+        raise ConnectionError("Lexiclip closed the connection without replying")
+    return data
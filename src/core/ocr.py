@@ -1,28 +1,621 @@
+import asyncio
 import os
-import google.generativeai as genai
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import replace
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
 from PIL import Image
+from src.core import cassette, tiling, tracing
+from src.core.backends import GeminiBackend, OcrBackend, TesseractBackend, is_simple_image
 from src.core.config import Config
+from src.core.preprocess import PreprocessOptions
+from src.core.retry import CallFailed, RetryPolicy
+
+# Routing policies
+ROUTING_REMOTE = "remote"      # Gemini only
+ROUTING_LOCAL = "local"        # Tesseract only (offline)
+ROUTING_AUTO = "auto"          # Local for simple text, remote for hard cases, local on remote failure
+ROUTING_FALLBACK = "fallback"  # Remote first, local on timeout or error
+ROUTING_POLICIES = (ROUTING_REMOTE, ROUTING_LOCAL, ROUTING_AUTO, ROUTING_FALLBACK)
+
+# What to do once the daily token budget is used up
+BUDGET_CHEAPER = "cheaper"  # Cheaper model and smaller uploads
+BUDGET_LOCAL = "local"      # Local OCR only (cheaper settings if Tesseract is missing)
+BUDGET_ACTIONS = (BUDGET_CHEAPER, BUDGET_LOCAL)
+
+
+class OcrEngine:
+    """
+    Long-lived OCR session that routes captures between backends.
+
+    Owns a persistent Gemini backend (configured client reused across
+    captures, rebuilt only when the API key or model changes) and a local
+    Tesseract backend, and picks between them according to the routing policy.
+    """
+
+    def __init__(self, api_key: str = "", model_name: str = "", routing: str = ""):
+        """
+        Initialize the engine.
+
+        Args:
+            api_key: Gemini API key. Falls back to Config / GEMINI_API_KEY when empty.
+            model_name: Gemini model name. Falls back to Config when empty.
+            routing: Routing policy. Falls back to Config when empty.
+        """
+        config = Config()
+        self.remote = GeminiBackend()
+        self.local = TesseractBackend(config.get_local_ocr_language())
+        self.routing = ROUTING_REMOTE
+        self.active_routing = ROUTING_REMOTE  # Routing in effect (differs while over budget)
+        self.over_budget = False
+        self.remote_timeout = config.get_remote_timeout()
+        self.min_local_confidence = 70.0
+        self._local_state = threading.local()  # Per-thread usage of the last call
+        self.tile_options = tiling.TileOptions()
+        self._tile_pool: Optional[ThreadPoolExecutor] = None
+        self._tile_pool_size = 0
+        self._tile_pool_lock = threading.Lock()
+        self.configure(api_key, model_name, routing)
+
+    @staticmethod
+    def _resolve_api_key(api_key: str = "") -> str:
+        return api_key or Config().get_api_key() or os.getenv("GEMINI_API_KEY", "")
+
+    def configure(self, api_key: str = "", model_name: str = "", routing: str = ""):
+        """
+        Update the API key, model name and/or routing policy.
+
+        The Gemini client is dropped only if the key or model actually changed;
+        it is recreated lazily on the next request (or by warm_up()).
+
+        Args:
+            api_key: New API key (empty to re-read Config / environment)
+            model_name: New model name (empty to re-read Config)
+            routing: New routing policy (empty to re-read Config)
+        """
+        config = Config()
+        model_name = model_name or config.get_model_name()
+        routing = routing or config.get_ocr_routing()
+        self.routing = routing if routing in ROUTING_POLICIES else ROUTING_REMOTE
+        self.active_routing = self.routing
+        options = PreprocessOptions(
+            enabled=config.get_preprocess_enabled(),
+            grayscale=config.get_preprocess_grayscale(),
+            target_text_height=config.get_target_text_height(),
+            byte_budget=config.get_upload_byte_budget(),
+        )
+        if self.over_budget:
+            model_name, options = self._budget_settings(config, model_name, options)
+        self.remote.configure(self._resolve_api_key(api_key), model_name)
+        self.remote.preprocess_options = options
+        self.remote.caller.policy = RetryPolicy(
+            deadline=config.get_ocr_deadline(),
+            max_attempts=max(1, config.get_ocr_max_attempts()),
+            hedge=config.get_hedging_enabled(),
+        )
+        self.tile_options = tiling.TileOptions(
+            enabled=config.get_tiling_enabled(),
+            max_side=config.get_tile_max_side(),
+        )
+        self._tile_concurrency = max(1, config.get_tile_concurrency())
+        self._configure_transport(config)
+
+    def _budget_settings(self, config: Config, model_name: str, options: PreprocessOptions):
+        """Settings used while the daily token budget is exceeded; may also switch to local routing."""
+        if config.get_budget_action() == BUDGET_LOCAL and self.local.is_available():
+            self.active_routing = ROUTING_LOCAL
+            return model_name, options
+        # Fewer image tokens: smaller text, grayscale, half the byte budget
+        options = replace(options, enabled=True, grayscale="always",
+                          target_text_height=min(options.target_text_height or 20, 20),
+                          byte_budget=options.byte_budget // 2)
+        return config.get_budget_model_name() or model_name, options
+
+    def set_over_budget(self, over: bool):
+        """
+        Switch to (or back from) the budget settings chosen by Config.get_budget_action().
+
+        Args:
+            over: True once today's token usage has reached the budget
+        """
+        if over == self.over_budget:
+            return
+        self.over_budget = over
+        print("Daily OCR token budget exceeded, using budget settings" if over
+              else "OCR token budget available again, using normal settings")
+        self.configure(self.remote.api_key, routing=self.routing)
+
+    def _configure_transport(self, config: Config):
+        transport = config.get_ocr_transport()
+        if transport not in cassette.TRANSPORTS:
+            print(f"Unknown OCR transport '{transport}', using live requests")
+            transport = cassette.LIVE
+        tape = None
+        current = self.remote.cassette
+        path, speed, match = config.get_cassette_path(), config.get_replay_speed(), config.get_replay_match()
+        if (transport == self.remote.transport and current is not None and current.speed == speed
+                and current.match == match and current.path == (path or cassette.DEFAULT_CASSETTE)):
+            return  # Unchanged; keep the loaded cassette and its replay position
+        if transport != cassette.LIVE:
+            tape = cassette.Cassette(path, speed, match)
+            print(f"OCR transport: {transport} ({tape.path})")
+        self.remote.set_transport(transport, tape)
+
+    @property
+    def model_name(self) -> str:
+        return self.remote.model_name
+
+    @property
+    def cache_variant(self) -> str:
+        """Backend and model a new capture would be read by, for keying cached results."""
+        if self.active_routing == ROUTING_LOCAL:
+            return self.local.name
+        return f"{self.remote.name}:{self.remote.model_name}"
+
+    def result_variant(self, usage: dict) -> str:
+        """cache_variant of the backend that actually produced a result, from its last_usage record."""
+        if usage.get("backend") == self.local.name:
+            return self.local.name
+        # Replayed responses were recorded from the same model
+        return f"{self.remote.name}:{usage.get('model') or self.remote.model_name}"
+
+    @property
+    def last_upload_stats(self) -> dict:
+        """Upload report of the calling thread's last request (empty if served locally)."""
+        return self.remote.last_upload_stats
+
+    @property
+    def last_call(self) -> dict:
+        """Attempts and outcome of the calling thread's last remote request (empty if served locally)."""
+        return self.remote.last_call
+
+    @property
+    def last_usage(self) -> dict:
+        """
+        Usage record of the calling thread's last call, for accounting.
+
+        Keys: backend, model, ok, bytes (uploaded), width, height,
+        prompt_tokens, response_tokens, latency_ms. Empty if no call was made
+        on this thread.
+        """
+        state = self._local_state
+        if not hasattr(state, "started"):
+            return {}
+        finished = getattr(state, "finished", None) or time.perf_counter()
+        return self._usage_record(self.remote.reports(), state.failed, state.width, state.height,
+                                  (finished - state.started) * 1000)
+
+    def _usage_record(self, reports, failed: bool, width: int, height: int, latency_ms: float) -> dict:
+        """Build a last_usage record from the remote backend's (upload stats, call report, token usage)."""
+        stats, call, tokens = reports
+        # Served remotely, or failed after trying the remote backend (the upload still happened)
+        remote = call.get("outcome") == "ok" or (failed and bool(call))
+        if not remote:
+            backend = self.local.name
+        elif self.remote.transport == cassette.REPLAY:
+            backend = "replay"  # Served from a cassette; not billed
+        else:
+            backend = self.remote.name
+        tokens = _billed_tokens(call, tokens) if remote else {}
+        return {
+            "backend": backend,
+            "model": self.remote.model_name if remote else "",
+            "ok": not failed,
+            "bytes": stats.get("bytes", 0) if remote else 0,
+            "width": width,
+            "height": height,
+            "prompt_tokens": tokens.get("prompt_tokens", 0),
+            "response_tokens": tokens.get("response_tokens", 0),
+            "latency_ms": round(latency_ms, 1),
+        }
+
+    def _begin(self, images: List[Image.Image]):
+        """Reset the calling thread's reports for a new call."""
+        self.remote.clear_upload_stats()
+        state = self._local_state
+        # Several regions are counted as if stacked vertically
+        state.width = max(image.width for image in images)
+        state.height = sum(image.height for image in images)
+        state.started = time.perf_counter()
+        state.finished = None
+        state.failed = False
+
+    def _end(self):
+        self._local_state.finished = time.perf_counter()
+
+    def warm_up(self):
+        """Open the remote connection ahead of the first capture (no-op if local-only)."""
+        if self.active_routing != ROUTING_LOCAL:
+            self.remote.warm_up()
+
+    def warm_up_async(self):
+        """Run warm_up() on a daemon thread so the caller is not blocked."""
+        if self.active_routing == ROUTING_LOCAL or self.remote.is_warm:
+            return None
+        thread = threading.Thread(target=self.warm_up, name="ocr-warmup", daemon=True)
+        thread.start()
+        return thread
+
+    def extract_text(self, image: Image.Image) -> str:
+        """
+        Extracts text from an image using the backend chosen by the routing policy.
+        """
+        self._begin([image])
+        routing = self.active_routing
+        try:
+            tiles = self._plan_tiles(image, routing)
+            if tiles:
+                return tiling.stitch(tiles, list(self._run_tiles(image, tiles, routing)))
+            return self._route(image, routing)
+        except Exception as e:
+            self._local_state.failed = True
+            print(f"OCR Error: {e}")
+            raise
+        finally:
+            self._end()
+
+    def stream_text(self, image: Image.Image) -> Iterator[str]:
+        """
+        Extracts text incrementally, yielding chunks as the backend produces them.
+
+        Follows the same routing as extract_text(). Local fallback only applies
+        if the remote stream fails before producing any output.
+        """
+        self._begin([image])
+        routing = self.active_routing
+        try:
+            tiles = self._plan_tiles(image, routing)
+            if tiles:
+                # Each tile's text is sent once it and every tile before it (in reading order) are done
+                yield from tiling.stitch_stream(tiles, self._run_tiles(image, tiles, routing))
+                return
+            local_first, order = self._route_plan(image, routing)
+            if local_first:
+                text, confidence = self.local.extract_with_confidence(image)
+                if self._accept_local(text, confidence):
+                    yield text
+                    return
+            produced = False
+            try:
+                for chunk in order[0].stream_text(image, timeout=self.remote_timeout if len(order) > 1 else None):
+                    produced = True
+                    yield chunk
+            except Exception as e:
+                if produced or len(order) == 1:
+                    raise
+                print(f"Remote OCR failed ({e}), falling back to local OCR")
+                yield order[1].extract_text(image)
+        except Exception as e:
+            self._local_state.failed = True
+            print(f"OCR Error: {e}")
+            raise
+        finally:
+            self._end()
+
+    def extract_regions(self, images: List[Image.Image]) -> List[str]:
+        """
+        Extracts text from several regions, batched into one remote request.
+
+        Returns:
+            One text per image, in the order given
+        """
+        self._begin(images)
+        routing = self.active_routing
+        try:
+            if routing == ROUTING_LOCAL or (not self.remote.is_available() and self.local.is_available()):
+                return self.local.extract_regions(images)
+            if routing == ROUTING_REMOTE or not self.local.is_available():
+                return self.remote.extract_regions(images)
+            try:
+                return self.remote.extract_regions(images, timeout=self.remote_timeout)
+            except Exception as e:
+                print(f"Remote OCR failed ({e}), falling back to local OCR")
+                return self.local.extract_regions(images)
+        except Exception as e:
+            self._local_state.failed = True
+            print(f"OCR Error: {e}")
+            raise
+        finally:
+            self._end()
+
+    def _route_plan(self, image: Image.Image, routing: str) -> Tuple[bool, Tuple[OcrBackend, ...]]:
+        """
+        The routing policy for one image (or tile), shared by the sync, streaming and asyncio paths.
+
+        Returns:
+            (local_first, order): whether a confident local result should be
+            tried first, and the backends to use in turn; the second one, if
+            any, is the fallback when the first fails (the first then gets
+            remote_timeout).
+        """
+        if routing == ROUTING_LOCAL:
+            return False, (self.local,)
+        if routing == ROUTING_REMOTE:
+            return False, (self.remote,)
+        local_first = routing == ROUTING_AUTO and self.local.is_available() and is_simple_image(image)
+        if not self.local.is_available():
+            return local_first, (self.remote,)
+        if not self.remote.is_available():
+            return local_first, (self.local,)
+        return local_first, (self.remote, self.local)
+
+    def _accept_local(self, text: str, confidence: float) -> bool:
+        """Whether a local-first result is confident enough to skip the remote backend."""
+        if text and confidence >= self.min_local_confidence:
+            print(f"OCR served locally (confidence {confidence:.0f})")
+            return True
+        print(f"Local OCR confidence {confidence:.0f} too low, using remote")
+        return False
+
+    def _route(self, image: Image.Image, routing: str) -> str:
+        """Extract text from one image (or tile) with the backend the routing policy picks."""
+        local_first, order = self._route_plan(image, routing)
+        if local_first:
+            text, confidence = self.local.extract_with_confidence(image)
+            if self._accept_local(text, confidence):
+                return text
+        if len(order) == 1:
+            return order[0].extract_text(image)
+        try:
+            return order[0].extract_text(image, timeout=self.remote_timeout)
+        except Exception as e:
+            print(f"Remote OCR failed ({e}), falling back to local OCR")
+            return order[1].extract_text(image)
+
+    def _plan_tiles(self, image: Image.Image, routing: str) -> Optional[List[tiling.Tile]]:
+        """Tiles for an oversized capture, or None to send it whole (local OCR copes with any size)."""
+        if routing == ROUTING_LOCAL or not tiling.needs_tiling(image, self.tile_options):
+            return None
+        start = time.perf_counter()
+        tiles = tiling.plan_tiles(image, self.tile_options)
+        if len(tiles) < 2:
+            return None
+        print(f"Capture {image.size} split into {len(tiles)} tiles in {(time.perf_counter() - start) * 1000:.1f}ms")
+        return tiles
+
+    def _tile_executor(self) -> ThreadPoolExecutor:
+        with self._tile_pool_lock:
+            if self._tile_pool is None or self._tile_pool_size != self._tile_concurrency:
+                if self._tile_pool is not None:
+                    self._tile_pool.shutdown(wait=False)
+                self._tile_pool = ThreadPoolExecutor(max_workers=self._tile_concurrency,
+                                                     thread_name_prefix="ocr-tile")
+                self._tile_pool_size = self._tile_concurrency
+            return self._tile_pool
+
+    def _run_tiles(self, image: Image.Image, tiles: List[tiling.Tile], routing: str) -> Iterator[str]:
+        """
+        OCR tiles concurrently, yielding their texts in reading order.
+
+        The tiles' upload stats, call reports and token usage are combined into
+        the calling thread's reports, as if the capture was one request. If a
+        tile fails, tiles already running are waited for so their (billed)
+        usage is still accounted.
+        """
+        trace = tracing.current()
+
+        def run(tile):
+            tracing.bind(trace)  # Stage marks of the first tile to reach them land on the capture's trace
+            self.remote.clear_upload_stats()
+            try:
+                return self._route(image.crop(tile.box), routing), self.remote.reports()
+            except Exception as e:
+                e.tile_reports = self.remote.reports()
+                raise
+            finally:
+                tracing.bind(None)
+
+        def report_of(future):
+            try:
+                return future.result()[1]
+            except Exception as e:
+                return getattr(e, "tile_reports", None)
+
+        futures = [self._tile_executor().submit(run, tile) for tile in tiles]
+        collected = set()
+        try:
+            for future in futures:
+                collected.add(future)
+                text, _ = future.result()
+                yield text
+        finally:
+            # Tiles not started yet are dropped; those in flight finish (and are billed) regardless
+            running = [future for future in futures if not future.cancel() and future not in collected]
+            wait(running)
+            reports = [report_of(future) for future in futures if future in collected or future in running]
+            self.remote.set_reports(*_merge_reports([report for report in reports if report]))
+
+    # -- asyncio path -----------------------------------------------------------------
+
+    async def extract_text_async(self, image: Image.Image) -> Tuple[str, Dict]:
+        """
+        extract_text() for callers on an asyncio loop.
+
+        Remote requests use the client's async API, so many captures can be in
+        flight on one thread; cancelling the awaiting task cancels them. Local
+        OCR, tiling and image preparation run on the loop's default executor.
+
+        Returns:
+            (text, report): the remote call report with the usage record under
+            'usage'. On failure or cancellation the same report is attached to
+            the exception (or CancelledError) as `report`.
+        """
+        return await self._async_call([image], self._extract_async(image))
+
+    async def stream_text_async(self, image: Image.Image, on_chunk: Callable[[str], None]) -> Tuple[str, Dict]:
+        """
+        stream_text() for callers on an asyncio loop; `on_chunk` receives each piece.
+
+        Only remote-first routing without tiling streams; otherwise the whole
+        text is passed to `on_chunk` once. Returns like extract_text_async().
+        """
+        return await self._async_call([image], self._stream_async(image, on_chunk))
+
+    async def extract_regions_async(self, images: List[Image.Image]) -> Tuple[List[str], Dict]:
+        """extract_regions() for callers on an asyncio loop (the batched request runs on the executor)."""
+
+        def run():
+            try:
+                texts = self.extract_regions(images)
+            except Exception as e:
+                e.report = self._thread_report()
+                raise
+            return texts, self._thread_report()
+
+        return await asyncio.get_running_loop().run_in_executor(None, run)
+
+    def _thread_report(self) -> Dict:
+        report = dict(self.last_call)
+        usage = self.last_usage
+        if usage:
+            report["usage"] = usage
+        return report
+
+    async def _async_call(self, images: List[Image.Image], work) -> Tuple[str, Dict]:
+        """Run `work(reports)`, which appends (stats, call, usage) per remote request, and build the report."""
+        started = time.perf_counter()
+        reports: List = []
+        failed = False
+        try:
+            text = await work(reports)
+        except (Exception, asyncio.CancelledError) as e:
+            # Also when cancelled: the requests already sent are billed
+            failed = True
+            e.report = self._async_report(reports, failed, images, started)
+            raise
+        return text, self._async_report(reports, failed, images, started)
+
+    def _async_report(self, reports: List, failed: bool, images: List[Image.Image], started: float) -> Dict:
+        merged = reports[0] if len(reports) == 1 else _merge_reports(reports) if reports else ({}, {}, {})
+        report = dict(merged[1])
+        report["usage"] = self._usage_record(merged, failed, max(image.width for image in images),
+                                             sum(image.height for image in images),
+                                             (time.perf_counter() - started) * 1000)
+        return report
+
+    def _extract_async(self, image: Image.Image):
+        async def work(reports):
+            loop = asyncio.get_running_loop()
+            routing = self.active_routing
+            tiles = await loop.run_in_executor(None, self._plan_tiles, image, routing)
+            if not tiles:
+                return await self._route_async(image, routing, reports)
+            crops = [image.crop(tile.box) for tile in tiles]
+            texts = await asyncio.gather(*(self._route_async(crop, routing, reports) for crop in crops))
+            return tiling.stitch(tiles, texts)
+        return work
+
+    def _stream_async(self, image: Image.Image, on_chunk):
+        async def work(reports):
+            local_first, order = self._route_plan(image, self.active_routing)
+            fallback = len(order) > 1
+            if local_first or order[0] is self.local or tiling.needs_tiling(image, self.tile_options):
+                text = await self._extract_async(image)(reports)
+                on_chunk(text)
+                return text
+            produced = []
+
+            def chunk(piece):
+                produced.append(piece)
+                on_chunk(piece)
+
+            try:
+                return await self._remote_async(image, self.remote_timeout if fallback else None, reports,
+                                                on_chunk=chunk)
+            except Exception as e:
+                if produced or not fallback:
+                    raise
+                print(f"Remote OCR failed ({e}), falling back to local OCR")
+                text = await asyncio.get_running_loop().run_in_executor(None, self.local.extract_text, image)
+                on_chunk(text)
+                return text
+        return work
+
+    async def _route_async(self, image: Image.Image, routing: str, reports: List) -> str:
+        """_route() on the event loop."""
+        loop = asyncio.get_running_loop()
+        local_first, order = self._route_plan(image, routing)
+        if local_first:
+            text, confidence = await loop.run_in_executor(None, self.local.extract_with_confidence, image)
+            if self._accept_local(text, confidence):
+                return text
+        if order[0] is self.local:
+            return await loop.run_in_executor(None, self.local.extract_text, image)
+        if len(order) == 1:
+            return await self._remote_async(image, None, reports)
+        try:
+            return await self._remote_async(image, self.remote_timeout, reports)
+        except Exception as e:
+            print(f"Remote OCR failed ({e}), falling back to local OCR")
+            return await loop.run_in_executor(None, self.local.extract_text, image)
+
+    async def _remote_async(self, image: Image.Image, timeout: Optional[float], reports: List,
+                            on_chunk: Optional[Callable[[str], None]] = None) -> str:
+        """One remote request; its (stats, call, usage) is appended to `reports`, also on failure."""
+        try:
+            if on_chunk is None:
+                text, report = await self.remote.extract_text_async(image, timeout)
+            else:
+                text, report = await self.remote.stream_text_async(image, on_chunk, timeout)
+        except CallFailed as e:
+            reports.append((getattr(e, "stats", {}), e.report, {}))
+            raise
+        except asyncio.CancelledError as e:
+            if hasattr(e, "report"):
+                reports.append((getattr(e, "stats", {}), e.report, {}))
+            raise
+        reports.append((report["stats"], report["call"], report["usage"]))
+        return text
+
+
+def _billed_tokens(call: Dict, tokens: Dict) -> Dict:
+    """
+    Token usage summed over every request in a call report.
+
+    Retried and abandoned hedged requests are billed as well as the one whose
+    answer was used (`tokens`), which is all that is known without per-request usage.
+    """
+    usages = [request["usage"] for request in call.get("requests", ()) if request.get("usage")]
+    if not usages:
+        return tokens
+    return {key: sum(usage.get(key, 0) for usage in usages) for key in ("prompt_tokens", "response_tokens")}
+
+
+def _merge_reports(reports: List) -> tuple:
+    """Combine per-tile (upload stats, call report, token usage) into one of each."""
+    stats = {"bytes": sum(r[0].get("bytes", 0) for r in reports), "tiles": len(reports)}
+    calls = [r[1] for r in reports if r[1]]
+    call: Dict = {}
+    if calls:
+        failed = [c["outcome"] for c in calls if c["outcome"] != "ok"]
+        call = {
+            "attempts": sum(c["attempts"] for c in calls),
+            "hedged": any(c["hedged"] for c in calls),
+            "elapsed_ms": max(c["elapsed_ms"] for c in calls),
+            "outcome": failed[0] if failed else "ok",
+            "requests": [request for c in calls for request in c["requests"]],
+            "tiles": len(reports),
+        }
+    usage = {key: sum(r[2].get(key, 0) for r in reports) for key in ("prompt_tokens", "response_tokens")}
+    return stats, call, usage
+
+
+_default_engine = None
+_default_engine_lock = threading.Lock()
+
+
+def get_engine() -> OcrEngine:
+    """Return the process-wide OCR engine, creating it on first use."""
+    global _default_engine
+    with _default_engine_lock:
+        if _default_engine is None:
+            _default_engine = OcrEngine()
+        return _default_engine
+
 
 def extract_text(image: Image.Image) -> str:
     """
-    Extracts text from an image using Gemini Flash.
+    Extracts text from an image using the configured OCR backend.
     """
-    # Try config first, then fall back to environment variable
-    config = Config()
-    api_key = config.get_api_key() or os.getenv("GEMINI_API_KEY")
-    
-    if not api_key:
-        raise ValueError("Gemini API key not configured. Please set it in Settings or GEMINI_API_KEY environment variable.")
-    
-    genai.configure(api_key=api_key)
-    model = genai.GenerativeModel('gemini-2.5-flash')
-    
-    # Prompt optimized for pure OCR
-    prompt = "Extract the text from this image. Return ONLY the extracted text. Do not describe the image. Do not use markdown code blocks."
-    
-    try:
-        response = model.generate_content([prompt, image])
-        return response.text
-    except Exception as e:
-        print(f"OCR Error: {e}")
-        raise
+    return get_engine().extract_text(image)
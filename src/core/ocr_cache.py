@@ -0,0 +1,317 @@
+"""Content-addressed cache of OCR results keyed on the captured image."""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from PIL import Image
+
+from src.core.history import DATA_DIR
+from src.core.persistence import atomic_write, gui_io
+
+CACHE_DIR = os.path.join(DATA_DIR, "ocr_cache")
+
+# Width of the difference hash grid; the hash has PHASH_SIZE * PHASH_SIZE bits.
+PHASH_SIZE = 16
+
+# (exact hash, perceptual hash, width, height, variant); the variant names the
+# backend and model that read the image, e.g. 'gemini:gemini-2.5-flash'
+ImageKey = Tuple[str, str, int, int, str]
+
+
+def exact_hash(image: Image.Image) -> str:
+    """SHA-256 over the image mode, size and raw pixel bytes."""
+    h = hashlib.sha256()
+    h.update(f"{image.mode}:{image.width}x{image.height}:".encode())
+    h.update(image.tobytes())
+    return h.hexdigest()
+
+
+def perceptual_hash(image: Image.Image) -> str:
+    """
+    Difference hash (dHash) of the image.
+
+    Survives re-encoding and sub-pixel noise (cursor blink, anti-aliasing
+    jitter) while still changing when text content changes noticeably.
+
+    Returns:
+        Hex string of PHASH_SIZE * PHASH_SIZE bits
+    """
+    small = image.convert("L").resize((PHASH_SIZE + 1, PHASH_SIZE), Image.Resampling.BILINEAR)
+    pixels = small.tobytes()
+    row = PHASH_SIZE + 1
+    value = 0
+    for y in range(PHASH_SIZE):
+        base = y * row
+        for x in range(PHASH_SIZE):
+            value = (value << 1) | (pixels[base + x] > pixels[base + x + 1])
+    return f"{value:0{PHASH_SIZE * PHASH_SIZE // 4}x}"
+
+
+def _hamming(a: str, b: str) -> int:
+    return bin(int(a, 16) ^ int(b, 16)).count("1")
+
+
+def _entry_id(exact: str, variant: str) -> str:
+    """File stem of an entry: results of different backends/models for one image are kept apart."""
+    if not variant:
+        return exact
+    return f"{exact}-{hashlib.sha256(variant.encode()).hexdigest()[:12]}"
+
+
+class OcrCache:
+    """
+    Two-level (memory LRU + on-disk) cache of OCR results.
+
+    Entries are looked up by the exact image hash and the variant (backend
+    and model) that produced them. With `phash_distance` >= 0, entries of the
+    same variant and dimensions whose perceptual hash is that close also
+    match; this is off by default because a changed digit or word often
+    leaves the perceptual hash unchanged. Disk entries are one small JSON file
+    per image and variant, evicted by age, count and total size. Reading the
+    disk index opens every entry, so owners should call preload_index() on a
+    background thread before the first lookup.
+    """
+
+    def __init__(self, cache_dir: str = CACHE_DIR, max_memory_entries: int = 128,
+                 max_disk_entries: int = 2000, max_disk_bytes: int = 20 * 1024 * 1024,
+                 max_age_days: float = 30, phash_distance: int = -1):
+        """
+        Initialize the cache.
+
+        Args:
+            cache_dir: Directory for on-disk entries
+            max_memory_entries: Size of the in-memory LRU
+            max_disk_entries: Maximum number of on-disk entries
+            max_disk_bytes: Maximum total size of on-disk entries
+            max_age_days: Entries older than this are ignored and evicted
+            phash_distance: Maximum Hamming distance for a perceptual match
+                (-1, the default, disables perceptual matching)
+        """
+        self.cache_dir = cache_dir
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+        self.max_disk_bytes = max_disk_bytes
+        self.max_age = max_age_days * 86400
+        self.phash_distance = phash_distance
+
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, Dict]" = OrderedDict()
+        self._index: Optional[Dict[str, Dict]] = None  # entry id -> metadata, loaded lazily
+        self.hits = 0
+        self.misses = 0
+        self.perceptual_hits = 0
+        self.disk_hits = 0
+
+    @staticmethod
+    def image_key(image: Image.Image, variant: str = "") -> ImageKey:
+        """
+        Compute the cache key for a captured image.
+
+        Args:
+            image: The capture
+            variant: Backend and model the image is (or would be) read by
+        """
+        return exact_hash(image), perceptual_hash(image), image.width, image.height, variant
+
+    def stats(self) -> Dict:
+        """Return hit/miss counters and current sizes."""
+        with self._lock:
+            index = self._index or {}
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "perceptualHits": self.perceptual_hits,
+                "diskHits": self.disk_hits,
+                "hitRate": self.hits / total if total else 0.0,
+                "memoryEntries": len(self._memory),
+                "diskEntries": len(index),
+                "diskBytes": sum(meta["bytes"] for meta in index.values()),
+            }
+
+    @gui_io("ocr cache")
+    def get(self, key: ImageKey) -> Optional[str]:
+        """
+        Look up the OCR text for an image key.
+
+        Returns:
+            Cached text, or None on a miss
+        """
+        exact, phash, width, height, variant = key
+        with self._lock:
+            entry = self._lookup(_entry_id(exact, variant))
+            if entry is None and self.phash_distance >= 0:
+                match = self._find_perceptual(phash, width, height, variant)
+                if match is not None:
+                    entry = self._lookup(match)
+                    if entry is not None:
+                        self.perceptual_hits += 1
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return entry["text"]
+
+    def put(self, key: ImageKey, text: str):
+        """Store the OCR text for an image key in memory and on disk."""
+        exact, phash, width, height, variant = key
+        entry = {"text": text, "phash": phash, "width": width, "height": height, "variant": variant,
+                 "created": time.time()}
+        entry_id = _entry_id(exact, variant)
+        with self._lock:
+            self._remember(entry_id, entry)
+            self._write(entry_id, entry)
+            self._evict()
+
+    def preload_index(self):
+        """Build the disk index ahead of the first lookup, without holding the lock while scanning."""
+        if self._index is not None:
+            return
+        index = self._scan()
+        with self._lock:
+            if self._index is None:
+                self._index = index
+
+    @gui_io("ocr cache")
+    def clear(self):
+        """Remove all entries from memory and disk."""
+        with self._lock:
+            self._memory.clear()
+            for entry_id in list(self._load_index()):
+                self._remove(entry_id)
+
+    # -- internals (call with self._lock held) ---------------------------------
+
+    def _path(self, entry_id: str) -> str:
+        return os.path.join(self.cache_dir, f"{entry_id}.json")
+
+    def _expired(self, entry: Dict) -> bool:
+        return self.max_age > 0 and time.time() - entry["created"] > self.max_age
+
+    def _remember(self, entry_id: str, entry: Dict):
+        self._memory[entry_id] = entry
+        self._memory.move_to_end(entry_id)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def _lookup(self, entry_id: str) -> Optional[Dict]:
+        entry = self._memory.get(entry_id)
+        if entry is not None:
+            if self._expired(entry):
+                self._memory.pop(entry_id, None)
+                return None
+            self._memory.move_to_end(entry_id)
+            return entry
+
+        meta = self._load_index().get(entry_id)
+        if meta is None:
+            return None
+        try:
+            with open(self._path(entry_id), "r") as f:
+                entry = json.load(f)
+        except Exception as e:
+            print(f"Error reading OCR cache entry: {e}")
+            self._remove(entry_id)
+            return None
+        if self._expired(entry):
+            self._remove(entry_id)
+            return None
+        # Refresh access time so disk eviction is least-recently-used
+        now = time.time()
+        meta["atime"] = now
+        try:
+            os.utime(self._path(entry_id), (now, now))
+        except OSError:
+            pass
+        self.disk_hits += 1
+        self._remember(entry_id, entry)
+        return entry
+
+    def _find_perceptual(self, phash: str, width: int, height: int, variant: str) -> Optional[str]:
+        best, best_distance = None, self.phash_distance + 1
+        candidates = {entry_id: e for entry_id, e in self._memory.items()}
+        candidates.update(self._load_index())
+        for entry_id, meta in candidates.items():
+            if meta["width"] != width or meta["height"] != height or meta.get("variant", "") != variant:
+                continue
+            distance = _hamming(meta["phash"], phash)
+            if distance < best_distance:
+                best, best_distance = entry_id, distance
+                if distance == 0:
+                    break
+        return best
+
+    def _load_index(self) -> Dict[str, Dict]:
+        """The per-entry metadata, scanning the cache directory if preload_index() has not yet."""
+        if self._index is None:
+            self._index = self._scan()
+        return self._index
+
+    def _scan(self) -> Dict[str, Dict]:
+        """Read the metadata of every entry in the cache directory."""
+        index = {}
+        if not os.path.isdir(self.cache_dir):
+            return index
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                with open(path, "r") as f:
+                    entry = json.load(f)
+                st = os.stat(path)
+            except Exception:
+                continue
+            index[name[:-5]] = {
+                "phash": entry["phash"],
+                "width": entry["width"],
+                "height": entry["height"],
+                "variant": entry.get("variant", ""),  # Entries written before variants never match
+                "created": entry["created"],
+                "atime": st.st_mtime,
+                "bytes": st.st_size,
+            }
+        return index
+
+    def _write(self, entry_id: str, entry: Dict):
+        try:
+            path = self._path(entry_id)
+            atomic_write(path, json.dumps(entry))
+            self._load_index()[entry_id] = {
+                "phash": entry["phash"],
+                "width": entry["width"],
+                "height": entry["height"],
+                "variant": entry["variant"],
+                "created": entry["created"],
+                "atime": entry["created"],
+                "bytes": os.path.getsize(path),
+            }
+        except Exception as e:
+            print(f"Error writing OCR cache entry: {e}")
+
+    def _remove(self, entry_id: str):
+        self._load_index().pop(entry_id, None)
+        try:
+            os.remove(self._path(entry_id))
+        except OSError:
+            pass
+
+    def _evict(self):
+        index = self._load_index()
+        now = time.time()
+        if self.max_age > 0:
+            for entry_id in [e for e, meta in index.items() if now - meta["created"] > self.max_age]:
+                self._remove(entry_id)
+        total = sum(meta["bytes"] for meta in index.values())
+        if len(index) <= self.max_disk_entries and total <= self.max_disk_bytes:
+            return
+        for entry_id in sorted(index, key=lambda e: index[e]["atime"]):
+            if len(index) <= self.max_disk_entries and total <= self.max_disk_bytes:
+                break
+            total -= index[entry_id]["bytes"]
+            self._remove(entry_id)
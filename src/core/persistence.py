@@ -0,0 +1,259 @@
+"""
+Background persistence: disk writes off the GUI thread.
+
+One writer thread runs persistence jobs in the order they fall due. A job
+is keyed, and submitting a key that is still queued replaces the queued job
+rather than adding another, so a burst of settings changes becomes one
+write. Jobs may be delayed to let such bursts collect. flush() runs everything queued
+immediately and waits for it; the application calls it on quit.
+
+Disk access that still happens on the GUI (main) thread is timed by
+`gui_io`, so the time the UI spent blocked on I/O can be reported.
+"""
+
+import atexit
+import functools
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Union
+
+SETTINGS_DELAY = 0.5  # Seconds to collect settings changes before writing them
+
+
+def atomic_write(path: str, data: Union[str, bytes], mode: Optional[int] = None):
+    """
+    Replace `path` with `data` so readers see the old or the new file, never a partial one.
+
+    Args:
+        path: Destination file
+        data: Contents (str is written as UTF-8)
+        mode: Permission bits for the new file, e.g. 0o755
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(prefix="." + os.path.basename(path) + ".", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data.encode("utf-8") if isinstance(data, str) else data)
+            f.flush()
+            os.fsync(f.fileno())
+        if mode is not None:
+            os.chmod(tmp, mode)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+
+class IoStats:
+    """Time the GUI thread spent on disk I/O, per kind of access."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict] = {}
+
+    def add(self, label: str, ms: float):
+        with self._lock:
+            stat = self._stats.setdefault(label, {"label": label, "calls": 0, "totalMs": 0.0, "maxMs": 0.0})
+            stat["calls"] += 1
+            stat["totalMs"] += ms
+            stat["maxMs"] = max(stat["maxMs"], ms)
+
+    def summary(self) -> Dict:
+        """Totals over all labels plus a row per label (times in ms, rounded)."""
+        with self._lock:
+            rows = [dict(stat, totalMs=round(stat["totalMs"], 1), maxMs=round(stat["maxMs"], 1))
+                    for stat in sorted(self._stats.values(), key=lambda s: -s["totalMs"])]
+        return {
+            "calls": sum(row["calls"] for row in rows),
+            "totalMs": round(sum(row["totalMs"] for row in rows), 1),
+            "maxMs": max((row["maxMs"] for row in rows), default=0.0),
+            "byLabel": rows,
+        }
+
+    def clear(self):
+        with self._lock:
+            self._stats.clear()
+
+
+_io_stats = IoStats()
+
+
+def get_io_stats() -> IoStats:
+    return _io_stats
+
+
+_gui_depth = 0  # Nesting of gui_io blocks on the main thread; only the outermost is counted
+
+
+class _GuiIo:
+    """Context manager and decorator timing I/O done on the main thread (a no-op elsewhere)."""
+
+    def __init__(self, label: str):
+        self.label = label
+        self._start = None
+        self._counted = False
+
+    def __enter__(self):
+        global _gui_depth
+        if threading.current_thread() is threading.main_thread():
+            self._counted = True
+            if _gui_depth == 0:
+                self._start = time.perf_counter()
+            _gui_depth += 1
+        return self
+
+    def __exit__(self, *exc):
+        global _gui_depth
+        if self._counted:
+            _gui_depth -= 1
+            self._counted = False
+        if self._start is not None:
+            _io_stats.add(self.label, (time.perf_counter() - self._start) * 1000)
+            self._start = None
+        return False
+
+    def __call__(self, fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with _GuiIo(self.label):
+                return fn(*args, **kwargs)
+        return wrapper
+
+
+def gui_io(label: str) -> _GuiIo:
+    """
+    Count time spent in a block (or decorated function) against the GUI thread's I/O metric.
+
+    Usage:
+        with gui_io("history"): ...   or   @gui_io("history")
+    """
+    return _GuiIo(label)
+
+
+class PersistenceWorker:
+    """Runs keyed, coalesced write jobs on one background thread."""
+
+    def __init__(self, name: str = "persistence"):
+        self._cond = threading.Condition()
+        self._jobs: "OrderedDict[str, Dict]" = OrderedDict()  # key -> {fn, due}
+        self._running: Optional[str] = None
+        self._flushing = 0
+        self._stopped = False
+        self._thread = threading.Thread(target=self._loop, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, key: str, fn: Callable[[], object], delay: float = 0.0):
+        """
+        Queue `fn` to run on the writer thread.
+
+        A job already queued under `key` is replaced by this one and keeps the
+        earlier of the two due times, so coalescing never postpones a write.
+
+        Args:
+            key: Identifies writes that supersede each other, e.g. 'settings'
+            fn: The write; exceptions are printed, not raised
+            delay: Seconds to wait for further changes before writing
+        """
+        due = time.monotonic() + delay
+        with self._cond:
+            if self._stopped:
+                raise RuntimeError("Persistence worker is stopped")
+            job = self._jobs.get(key)
+            if job is not None:
+                job["fn"] = fn
+                job["due"] = min(job["due"], due)
+            else:
+                self._jobs[key] = {"fn": fn, "due": due}
+            self._cond.notify_all()
+
+    @property
+    def pending(self) -> int:
+        with self._cond:
+            return len(self._jobs) + (self._running is not None)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Run every queued job now, ignoring delays, and wait for them to finish.
+
+        Returns:
+            False if the jobs did not finish within `timeout` seconds
+        """
+        if threading.current_thread() is self._thread:
+            return True  # A job flushing would wait for itself
+        with gui_io("flush"), self._cond:
+            self._flushing += 1
+            self._cond.notify_all()
+            try:
+                return self._cond.wait_for(lambda: not self._jobs and self._running is None, timeout)
+            finally:
+                self._flushing -= 1
+
+    def stop(self, timeout: Optional[float] = None):
+        """Flush and end the writer thread."""
+        self.flush(timeout)
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+
+    def _next(self):
+        """Wait for the first due job and take it off the queue (None once stopped)."""
+        with self._cond:
+            while True:
+                if self._jobs:
+                    # Earliest due first; jobs due at the same time keep submission order
+                    key, job = min(self._jobs.items(), key=lambda item: item[1]["due"])
+                    wait = 0.0 if self._flushing else job["due"] - time.monotonic()
+                    if wait <= 0:
+                        del self._jobs[key]
+                        self._running = key
+                        return key, job["fn"]
+                    self._cond.wait(wait)
+                elif self._stopped:
+                    return None
+                else:
+                    self._cond.wait()
+
+    def _loop(self):
+        while True:
+            job = self._next()
+            if job is None:
+                return
+            key, fn = job
+            try:
+                fn()
+            except Exception as e:
+                print(f"Error writing {key}: {e}")
+            finally:
+                with self._cond:
+                    self._running = None
+                    self._cond.notify_all()
+
+
+_worker: Optional[PersistenceWorker] = None
+_worker_lock = threading.Lock()
+
+
+def get_worker() -> PersistenceWorker:
+    """Return the process-wide persistence worker, starting it on first use."""
+    global _worker
+    with _worker_lock:
+        if _worker is None:
+            _worker = PersistenceWorker()
+            # Scripts that never reach the GUI's quit handler still get their writes
+            atexit.register(_worker.flush, 5.0)
+        return _worker
+
+
+def flush(timeout: Optional[float] = None) -> bool:
+    """Flush the process-wide worker, if one was started."""
+    with _worker_lock:
+        worker = _worker
+    return worker.flush(timeout) if worker is not None else True
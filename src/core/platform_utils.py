@@ -3,6 +3,8 @@ import os
 import pathlib
 import platform
 
+from src.core.persistence import atomic_write
+
 class PlatformUtils:
     @staticmethod
     def get_platform():
@@ -95,8 +97,7 @@ class PlatformUtils:
         # Always create desktop shortcut on Linux if it doesn't exist
         if not desktop_path.exists():
             try:
-                desktop_path.write_text(desktop_content)
-                desktop_path.chmod(0o755)
+                atomic_write(str(desktop_path), desktop_content, mode=0o755)
             except Exception as e:
                 print(f"Failed to create desktop shortcut: {e}")
         
@@ -104,8 +105,7 @@ class PlatformUtils:
         if enabled:
             if not autostart_path.exists():
                 try:
-                    autostart_path.write_text(desktop_content)
-                    autostart_path.chmod(0o755)
+                    atomic_write(str(autostart_path), desktop_content, mode=0o755)
                 except Exception as e:
                     print(f"Failed to create autostart entry: {e}")
         else:
@@ -201,7 +201,7 @@ class PlatformUtils:
 </plist>"""
             
             try:
-                plist_path.write_text(plist_content)
+                atomic_write(str(plist_path), plist_content)
             except Exception as e:
                 print(f"Failed to create macOS autostart plist: {e}")
                 
@@ -0,0 +1,205 @@
+"""Image preprocessing and compact encoding before OCR upload."""
+
+import io
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from PIL import Image, ImageChops
+
+MIME_TYPES = {"PNG": "image/png", "WEBP": "image/webp", "JPEG": "image/jpeg"}
+
+
+@dataclass
+class PreprocessOptions:
+    """Settings for the preprocessing stage."""
+
+    enabled: bool = True
+    grayscale: str = "auto"          # 'auto', 'always' or 'never'
+    target_text_height: int = 24     # Downscale so text lines are about this tall (0 disables)
+    crop_margins: bool = True
+    byte_budget: int = 300 * 1024    # Prefer lossless below this, degrade lossy quality above it
+    min_dimension: int = 32          # Never shrink below this many pixels on a side
+    min_scale: float = 0.5           # Never shrink by more than this factor
+
+
+@dataclass
+class PreparedImage:
+    """An image ready for upload, with the encoded payload and a report."""
+
+    image: Image.Image
+    data: bytes
+    mime_type: str
+    stats: Dict = field(default_factory=dict)
+
+    def blob(self) -> Dict:
+        """Inline data part for the Gemini API."""
+        return {"mime_type": self.mime_type, "data": self.data}
+
+
+def background_level(gray: Image.Image) -> int:
+    hist = gray.histogram()
+    return max(range(256), key=lambda i: hist[i])
+
+
+def ink_mask(gray: Image.Image, background: int, threshold: int = 48) -> Image.Image:
+    """Pixels that differ noticeably from the background become 255."""
+    diff = ImageChops.difference(gray, Image.new("L", gray.size, background))
+    return diff.point(lambda p: 255 if p > threshold else 0)
+
+
+def is_colorless(image: Image.Image, saturation_threshold: int = 64, max_ratio: float = 0.01) -> bool:
+    """True if almost no pixels are meaningfully saturated."""
+    if image.mode in ("L", "1"):
+        return True
+    saturation = image.convert("RGB").convert("HSV").getchannel("S")
+    hist = saturation.histogram()
+    total = sum(hist)
+    return total == 0 or sum(hist[saturation_threshold:]) / total <= max_ratio
+
+
+def _line_runs(profile: bytes) -> List[int]:
+    """
+    Heights of text lines in a row ink profile.
+
+    Lines are separated by blank rows or by valleys: rows with little ink
+    relative to the profile's peak, where descenders of one line touch the
+    ascenders of the next. Cutting at valleys can only shorten a line, which
+    errs towards less downscaling.
+    """
+    floor = max(2, max(profile, default=0) * 0.15)
+    runs, run = [], 0
+    for value in profile:
+        if value > floor:
+            run += 1
+        elif run:
+            runs.append(run)
+            run = 0
+    if run:
+        runs.append(run)
+    return [r for r in runs if r > 2]  # Ignore rules and noise
+
+
+def estimate_text_height(mask: Image.Image, strip_width: int = 256) -> Optional[int]:
+    """
+    Estimate the typical text line height from row ink profiles.
+
+    The mask is split into vertical strips, each profiled on its own, so
+    side-by-side columns with offset baselines do not merge into one tall run.
+
+    Args:
+        mask: Ink mask from ink_mask()
+        strip_width: Approximate width of a strip in pixels
+
+    Returns:
+        Median height in pixels of text lines, or None if no text found
+    """
+    strips = max(1, min(8, round(mask.width / strip_width)))
+    runs = []
+    for i in range(strips):
+        strip = mask.crop((mask.width * i // strips, 0, mask.width * (i + 1) // strips, mask.height))
+        # Box-resize to a single column gives the mean ink per row without a Python loop per pixel
+        runs += _line_runs(strip.resize((1, strip.height), Image.Resampling.BOX).tobytes())
+    if not runs:
+        return None
+    runs.sort()
+    return runs[len(runs) // 2]
+
+
+def _encode(image: Image.Image, fmt: str, **params) -> bytes:
+    buf = io.BytesIO()
+    image.save(buf, fmt, **params)
+    return buf.getvalue()
+
+
+def encode_compact(image: Image.Image, byte_budget: int):
+    """
+    Encode to the smallest of PNG / WebP / JPEG that fits the byte budget.
+
+    Lossless encodings are preferred when they fit; otherwise the highest lossy
+    quality that fits is used, falling back to the smallest candidate.
+
+    Returns:
+        (data, format, params) of the chosen encoding
+    """
+    lossless = [
+        (_encode(image, "PNG", optimize=True), "PNG", {}),
+        (_encode(image, "WEBP", lossless=True, method=4), "WEBP", {"lossless": True}),
+    ]
+    best = min(lossless, key=lambda c: len(c[0]))
+    if len(best[0]) <= byte_budget:
+        return best
+
+    candidates = list(lossless)
+    for quality in (90, 80, 70, 60, 50):
+        for fmt in ("WEBP", "JPEG"):
+            data = _encode(image, fmt, quality=quality)
+            candidate = (data, fmt, {"quality": quality})
+            candidates.append(candidate)
+            if len(data) <= byte_budget:
+                return candidate
+    return min(candidates, key=lambda c: len(c[0]))
+
+
+def prepare_image(image: Image.Image, options: Optional[PreprocessOptions] = None) -> PreparedImage:
+    """
+    Run the preprocessing stage on a captured image.
+
+    Converts to grayscale when color is irrelevant, crops uniform margins,
+    downscales to the target text height and picks the most compact encoding.
+
+    Args:
+        image: Captured image
+        options: Preprocessing settings (defaults if None)
+
+    Returns:
+        PreparedImage with the processed image, encoded bytes and a stats report
+    """
+    options = options or PreprocessOptions()
+    start = time.perf_counter()
+    stats = {"original_size": image.size, "original_mode": image.mode}
+
+    if not options.enabled:
+        data, fmt, params = _encode(image, "PNG"), "PNG", {}
+        stats.update(format=fmt, params=params, bytes=len(data), final_size=image.size,
+                     elapsed_ms=(time.perf_counter() - start) * 1000)
+        return PreparedImage(image, data, MIME_TYPES[fmt], stats)
+
+    gray = image.convert("L")
+    background = background_level(gray)
+    mask = ink_mask(gray, background)
+
+    if options.grayscale == "always" or (options.grayscale == "auto" and is_colorless(image)):
+        image = gray
+        stats["grayscale"] = True
+    else:
+        image = image.convert("RGB")
+        stats["grayscale"] = False
+
+    if options.crop_margins:
+        bbox = mask.getbbox()
+        if bbox:
+            pad = 4
+            bbox = (max(bbox[0] - pad, 0), max(bbox[1] - pad, 0),
+                    min(bbox[2] + pad, image.width), min(bbox[3] + pad, image.height))
+            if bbox != (0, 0, image.width, image.height):
+                image = image.crop(bbox)
+                mask = mask.crop(bbox)
+                stats["crop"] = bbox
+
+    if options.target_text_height > 0:
+        text_height = estimate_text_height(mask)
+        stats["text_height"] = text_height
+        if text_height and text_height > options.target_text_height:
+            # A misread line height must not shrink the text past legibility
+            scale = max(options.target_text_height / text_height, options.min_scale)
+            size = (max(int(image.width * scale), options.min_dimension),
+                    max(int(image.height * scale), options.min_dimension))
+            if size[0] < image.width and size[1] < image.height:
+                image = image.resize(size, Image.Resampling.LANCZOS)
+                stats["scale"] = round(scale, 3)
+
+    data, fmt, params = encode_compact(image, options.byte_budget)
+    stats.update(format=fmt, params=params, bytes=len(data), final_size=image.size,
+                 elapsed_ms=(time.perf_counter() - start) * 1000)
+    return PreparedImage(image, data, MIME_TYPES[fmt], stats)
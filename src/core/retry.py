@@ -0,0 +1,342 @@
+"""
+Deadlines, retries and hedging for remote OCR requests.
+
+A ResilientCaller runs one logical request under a deadline. Retryable
+failures (rate limits, 5xx, timeouts, dropped connections) are retried with
+full-jitter exponential backoff while time remains. With hedging enabled, a
+second identical request is fired if the first has not answered by the
+observed p95 latency, and whichever succeeds first wins. Every request is
+logged so callers can report attempts and outcomes; an attempt can keep its
+token usage in its log entry (request_usage()), since abandoned hedges are
+billed too.
+"""
+
+import asyncio
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from src.core import tracing
+
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+# google.api_core exception names, matched by name so the client library stays a lazy import
+RETRYABLE_NAMES = {
+    "ServiceUnavailable", "InternalServerError", "TooManyRequests", "ResourceExhausted",
+    "DeadlineExceeded", "GatewayTimeout", "BadGateway", "RetryError",
+}
+
+
+@dataclass
+class RetryPolicy:
+    """Limits for one logical request."""
+
+    deadline: float = 20.0           # Seconds for all attempts together
+    max_attempts: int = 3            # Attempt rounds (a hedged pair counts as one)
+    base_delay: float = 0.25         # First backoff ceiling in seconds, doubled per retry
+    max_delay: float = 2.0
+    hedge: bool = False
+    hedge_quantile: float = 95       # Fire the hedge once the first request is slower than this
+    hedge_min_delay: float = 0.5     # ...but never sooner than this many seconds
+    hedge_min_samples: int = 20      # Latency samples needed before hedging starts
+
+    def backoff(self, retry: int) -> float:
+        """Full-jitter delay before retry number `retry` (1-based)."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (retry - 1)))
+
+
+# Log entry of the request the current thread or task is making
+_current_request: ContextVar[Optional[Dict]] = ContextVar("ocr_request", default=None)
+
+
+def request_usage() -> Dict:
+    """
+    Token usage dict of the attempt running in this context, for the attempt to fill in.
+
+    It is kept under 'usage' in the attempt's entry of the call report, so
+    retried and abandoned requests can be accounted. Outside a call it is a
+    throwaway dict.
+    """
+    entry = _current_request.get()
+    if entry is None:
+        return {}
+    return entry.setdefault("usage", {})
+
+
+class CallFailed(RuntimeError):
+    """The request failed after all attempts, or ran out of time."""
+
+    def __init__(self, message: str, report: Dict):
+        super().__init__(message)
+        self.report = report
+
+
+def is_retryable(error: BaseException) -> bool:
+    """True for transient failures worth another attempt."""
+    retryable = getattr(error, "retryable", None)
+    if isinstance(retryable, bool):
+        return retryable  # Replayed from a cassette: classified when it was recorded
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return True
+    code = getattr(error, "code", None)
+    if isinstance(code, int) and code in RETRYABLE_STATUS:
+        return True
+    return type(error).__name__ in RETRYABLE_NAMES
+
+
+class LatencyWindow:
+    """Recent successful request latencies."""
+
+    def __init__(self, size: int = 200):
+        self._samples = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def add(self, ms: float):
+        with self._lock:
+            self._samples.append(ms)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def quantile(self, pct: float) -> Optional[float]:
+        """Nearest-rank percentile in milliseconds, or None without samples."""
+        with self._lock:
+            samples = list(self._samples)
+        return tracing.percentile(samples, pct) if samples else None
+
+
+class ResilientCaller:
+    """Runs requests under a RetryPolicy, sharing latency history across calls."""
+
+    def __init__(self, policy: Optional[RetryPolicy] = None):
+        self.policy = policy or RetryPolicy()
+        self.latency = LatencyWindow()
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+
+    def hedge_delay(self) -> Optional[float]:
+        """Seconds to wait before hedging, or None if hedging is off or there is too little data."""
+        policy = self.policy
+        if not policy.hedge or len(self.latency) < policy.hedge_min_samples:
+            return None
+        return max(policy.hedge_min_delay, self.latency.quantile(policy.hedge_quantile) / 1000)
+
+    def call(self, attempt: Callable[[float], object], timeout: Optional[float] = None,
+             hedge: bool = True) -> Tuple[object, Dict]:
+        """
+        Run `attempt(timeout_seconds)` until it succeeds, fails permanently or the deadline passes.
+
+        Args:
+            attempt: Performs one request within the given number of seconds
+            timeout: Tighter deadline for this call (e.g. before falling back to local OCR)
+            hedge: Allow hedged requests (the attempt must be safe to run on another thread)
+
+        Returns:
+            (result, report) where report lists every request and its outcome
+
+        Raises:
+            CallFailed: With the report attached
+        """
+        policy = self.policy
+        budget = min(policy.deadline, timeout) if timeout else policy.deadline
+        start = time.monotonic()
+        end = start + budget
+        log: List[Dict] = []
+        rounds = 0
+        while True:
+            rounds += 1
+            delay = self.hedge_delay() if hedge else None
+            try:
+                if delay is not None:
+                    result = self._hedged(attempt, end, delay, log)
+                else:
+                    result = self._single(attempt, end, log)
+                return result, self._report(log, start, "ok")
+            except Exception as e:
+                time.sleep(self._retry_delay(e, rounds, start, end, budget, log))
+
+    async def call_async(self, attempt: Callable[[float], Awaitable], timeout: Optional[float] = None,
+                         hedge: bool = True) -> Tuple[object, Dict]:
+        """
+        Coroutine version of call(): `attempt(timeout_seconds)` returns an awaitable.
+
+        Attempts run as tasks on the running loop, so a hedged pair costs no
+        extra thread, and cancelling the caller cancels every attempt in flight.
+        The CancelledError then carries the report of the requests already sent
+        as `report`, since they are billed all the same.
+        """
+        policy = self.policy
+        budget = min(policy.deadline, timeout) if timeout else policy.deadline
+        start = time.monotonic()
+        end = start + budget
+        log: List[Dict] = []
+        rounds = 0
+        while True:
+            rounds += 1
+            delay = self.hedge_delay() if hedge else None
+            try:
+                result = await self._attempt_async(attempt, end, delay, log)
+                return result, self._report(log, start, "ok")
+            except asyncio.CancelledError as e:
+                e.report = self._report(log, start, "cancelled")
+                raise
+            except Exception as e:
+                await asyncio.sleep(self._retry_delay(e, rounds, start, end, budget, log))
+
+    # -- internals ------------------------------------------------------------------
+
+    def _retry_delay(self, error: Exception, rounds: int, start: float, end: float, budget: float,
+                     log: List[Dict]) -> float:
+        """Backoff before the next attempt round; raises CallFailed if there should be none."""
+        remaining = end - time.monotonic()
+        retryable = is_retryable(error)
+        if not retryable or rounds >= self.policy.max_attempts or remaining <= 0:
+            if remaining <= 0:
+                reason = f"deadline of {budget:.1f}s exceeded"
+            elif retryable:
+                reason = "retries exhausted"
+            else:
+                reason = "not retryable"
+            report = self._report(log, start, reason)
+            raise CallFailed(f"{error} ({report['attempts']} attempt(s) in "
+                             f"{report['elapsed_ms'] / 1000:.1f}s, {reason})", report) from error
+        backoff = self.policy.backoff(rounds)
+        if backoff >= remaining:
+            report = self._report(log, start, f"deadline of {budget:.1f}s exceeded")
+            raise CallFailed(f"{error} ({report['attempts']} attempt(s), no time left to retry)", report) from error
+        print(f"OCR request failed ({error}); retrying in {backoff:.2f}s")
+        return backoff
+
+    def _single(self, attempt, end: float, log: List[Dict]):
+        entry = {"n": len(log) + 1, "hedge": False, "ms": None, "outcome": "pending"}
+        log.append(entry)
+        started = time.monotonic()
+        token = _current_request.set(entry)
+        try:
+            result = attempt(max(0.001, end - started))
+        except Exception as e:
+            entry.update(ms=round((time.monotonic() - started) * 1000, 1), outcome=f"error: {e}")
+            raise
+        finally:
+            _current_request.reset(token)
+        entry.update(ms=round((time.monotonic() - started) * 1000, 1), outcome="ok")
+        self.latency.add(entry["ms"])
+        return result
+
+    def _executor(self) -> ThreadPoolExecutor:
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="ocr-hedge")
+            return self._pool
+
+    def _hedged(self, attempt, end: float, delay: float, log: List[Dict]):
+        trace = tracing.current()
+        pool = self._executor()
+
+        def run(entry):
+            tracing.bind(trace)  # Keep stage marks on the caller's trace
+            token = _current_request.set(entry)
+            started = time.monotonic()
+            try:
+                result = attempt(max(0.001, end - started))
+            except Exception as e:
+                entry.update(ms=round((time.monotonic() - started) * 1000, 1), outcome=f"error: {e}")
+                raise
+            finally:
+                _current_request.reset(token)
+                tracing.bind(None)
+            entry.update(ms=round((time.monotonic() - started) * 1000, 1), outcome="ok")
+            return result
+
+        def launch(is_hedge):
+            entry = {"n": len(log) + 1, "hedge": is_hedge, "ms": None, "outcome": "pending"}
+            log.append(entry)
+            future = pool.submit(run, entry)
+            future.entry = entry
+            return future
+
+        pending = {launch(False)}
+        done, _ = wait(pending, timeout=min(delay, max(0.0, end - time.monotonic())))
+        if not done and time.monotonic() < end:
+            print(f"OCR request slower than {delay * 1000:.0f}ms; sending hedged request")
+            pending.add(launch(True))
+
+        error = None
+        while pending:
+            done, pending = wait(pending, timeout=max(0.0, end - time.monotonic()), return_when=FIRST_COMPLETED)
+            if not done:
+                break
+            for future in done:
+                if future.exception() is None:
+                    for loser in pending:
+                        loser.entry["outcome"] = "abandoned"
+                    self.latency.add(future.entry["ms"])
+                    return future.result()
+                error = future.exception()
+        if error is None or pending:
+            for loser in pending:
+                loser.entry["outcome"] = "abandoned"
+            raise TimeoutError("OCR request timed out")
+        raise error
+
+    async def _attempt_async(self, attempt, end: float, delay: Optional[float], log: List[Dict]):
+        """One attempt round as tasks: a single request, or a hedged pair if the first is slow."""
+        async def run(entry):
+            _current_request.set(entry)  # Each task has its own context
+            started = time.monotonic()
+            remaining = max(0.001, end - started)
+            try:
+                result = await asyncio.wait_for(attempt(remaining), remaining)
+            except asyncio.TimeoutError:
+                entry.update(ms=round((time.monotonic() - started) * 1000, 1), outcome="error: timed out")
+                raise TimeoutError("OCR request timed out") from None
+            except Exception as e:
+                entry.update(ms=round((time.monotonic() - started) * 1000, 1), outcome=f"error: {e}")
+                raise
+            entry.update(ms=round((time.monotonic() - started) * 1000, 1), outcome="ok")
+            self.latency.add(entry["ms"])
+            return result
+
+        entries = {}
+
+        def launch(is_hedge):
+            entry = {"n": len(log) + 1, "hedge": is_hedge, "ms": None, "outcome": "pending"}
+            log.append(entry)
+            task = asyncio.ensure_future(run(entry))
+            entries[task] = entry
+            return task
+
+        pending = {launch(False)}
+        try:
+            if delay is not None:
+                done, _ = await asyncio.wait(pending, timeout=min(delay, max(0.0, end - time.monotonic())))
+                if not done and time.monotonic() < end:
+                    print(f"OCR request slower than {delay * 1000:.0f}ms; sending hedged request")
+                    pending.add(launch(True))
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            # The loser of a hedged pair, or everything if the caller was cancelled
+            for task in pending:
+                entries[task]["outcome"] = "abandoned"
+                task.cancel()
+
+    @staticmethod
+    def _report(log: List[Dict], start: float, outcome: str) -> Dict:
+        return {
+            "attempts": len(log),
+            "hedged": any(entry["hedge"] for entry in log),
+            "elapsed_ms": round((time.monotonic() - start) * 1000, 1),
+            "outcome": outcome,
+            "requests": [dict(entry) for entry in log],
+        }
@@ -0,0 +1,34 @@
+"""
+Startup timing.
+
+Milestones are measured from the moment this module is first imported, which
+main.py does before anything else, so the report covers Qt, QML and tray setup.
+"""
+
+import time
+from typing import Dict
+
+_start = time.perf_counter()
+_marks: Dict[str, float] = {}
+
+
+def mark(name: str) -> float:
+    """
+    Record a milestone (only the first occurrence of each name counts).
+
+    Returns:
+        Milliseconds since startup
+    """
+    if name not in _marks:
+        _marks[name] = (time.perf_counter() - _start) * 1000
+    return _marks[name]
+
+
+def timings() -> Dict[str, float]:
+    """Milestones recorded so far, in milliseconds since startup."""
+    return dict(_marks)
+
+
+def report() -> str:
+    """One line per milestone, in the order they were reached."""
+    return "\n".join(f"  {name:<20} {ms:8.1f} ms" for name, ms in _marks.items())
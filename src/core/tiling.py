@@ -0,0 +1,253 @@
+"""
+Splitting oversized captures into tiles for OCR.
+
+A selection across several monitors can be far larger than the model's input
+resolution, so it gets downsampled and small text is lost. Such captures are
+cut into tiles along whitespace gutters (recursive XY-cut: blank columns
+split side-by-side content, blank rows split stacked content), which also
+yields the tiles in reading order. Where no gutter exists a tile is cut at
+its least inked row (or, if it is wider than tall, its least inked column)
+with some overlap, and the duplicated lines or words are dropped again when
+the tile texts are stitched together.
+"""
+
+import difflib
+import re
+from dataclasses import dataclass
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from PIL import Image
+
+from src.core.preprocess import background_level, ink_mask
+
+# How a tile joins the one before it in reading order
+COLUMN = "column"    # Separated by a blank column: next column of text
+ROW = "row"          # Separated by a blank row: next block below
+OVERLAP = "overlap"  # Hard cut between lines of a region; the tiles share `overlap` pixels
+SIDE = "side"        # Hard cut through the lines of a region; the tiles share `overlap` pixels side by side
+
+
+@dataclass
+class TileOptions:
+    """When and how captures are tiled."""
+
+    enabled: bool = True
+    max_side: int = 3072           # Tile captures wider or taller than this
+    max_pixels: int = 4_000_000    # ...or with more pixels than this
+    overlap: int = 48              # Pixels shared by tiles of a hard cut
+    min_row_gutter: int = 4        # Blank rows needed to cut between text lines
+    min_column_gutter: int = 24    # Blank columns needed to cut between columns (also >= 1% of the width)
+    max_tiles: int = 16
+
+
+@dataclass
+class Tile:
+    box: Tuple[int, int, int, int]  # left, top, right, bottom in capture pixels
+    join: Optional[str] = None      # COLUMN, ROW, OVERLAP or SIDE; None for the first tile
+
+    @property
+    def width(self) -> int:
+        return self.box[2] - self.box[0]
+
+    @property
+    def height(self) -> int:
+        return self.box[3] - self.box[1]
+
+
+def needs_tiling(image: Image.Image, options: TileOptions) -> bool:
+    return options.enabled and _too_big(image.width, image.height, options)
+
+
+def _too_big(width: int, height: int, options: TileOptions) -> bool:
+    return max(width, height) > options.max_side or width * height > options.max_pixels
+
+
+def plan_tiles(image: Image.Image, options: TileOptions) -> List[Tile]:
+    """
+    Tiles covering the image, in reading order.
+
+    Returns:
+        A single tile for the whole image if it is small enough or cannot be split
+    """
+    gray = image.convert("L")
+    mask = ink_mask(gray, background_level(gray))
+    tiles = _split(mask, (0, 0, image.width, image.height), options)
+    if len(tiles) > options.max_tiles:
+        print(f"Capture would need {len(tiles)} tiles (max {options.max_tiles}); sending it whole")
+        return [Tile((0, 0, image.width, image.height))]
+    return tiles
+
+
+def _split(mask: Image.Image, box, options: TileOptions) -> List[Tile]:
+    left, top, right, bottom = box
+    width, height = right - left, bottom - top
+    if not _too_big(width, height, options):
+        return [Tile(box)]
+    region = mask.crop(box)
+    # Box-resizing the mask to one row/column gives the ink per column/row without a Python loop per pixel
+    columns = region.resize((width, 1), Image.Resampling.BOX).tobytes()
+    rows = region.resize((1, height), Image.Resampling.BOX).tobytes()
+    column_cut = _gutter(columns, max(options.min_column_gutter, width // 100))
+    row_cut = _gutter(rows, options.min_row_gutter)
+    # Cut along the dimension that is over the limit first; columns come before rows in reading order
+    if width >= height:
+        splits = [(COLUMN, column_cut), (ROW, row_cut)]
+    else:
+        splits = [(ROW, row_cut), (COLUMN, column_cut)]
+    for kind, cut in splits:
+        if cut is None:
+            continue
+        if kind == COLUMN:
+            first, second = (left, top, left + cut, bottom), (left + cut, top, right, bottom)
+        else:
+            first, second = (left, top, right, top + cut), (left, top + cut, right, bottom)
+        return _join(_split(mask, first, options), _split(mask, second, options), kind)
+    # No gutter: cut through the least inked column or row near the middle, with overlap.
+    # A wide region is cut side by side, or it would end up as full-width strips the model downsamples.
+    half = options.overlap // 2
+    if width >= height:
+        third = width // 3
+        cut = min(range(third, width - third), key=lambda x: (columns[x], abs(x - width // 2)))
+        first = (left, top, left + min(width, cut + half), bottom)
+        second = (left + max(0, cut - half), top, right, bottom)
+        return _join(_split(mask, first, options), _split(mask, second, options), SIDE)
+    third = height // 3
+    cut = min(range(third, height - third), key=lambda y: (rows[y], abs(y - height // 2)))
+    first = (left, top, right, top + min(height, cut + half))
+    second = (left, top + max(0, cut - half), right, bottom)
+    return _join(_split(mask, first, options), _split(mask, second, options), OVERLAP)
+
+
+def _join(first: List[Tile], second: List[Tile], kind: str) -> List[Tile]:
+    second[0].join = kind
+    return first + second
+
+
+def _gutter(profile: bytes, min_run: int) -> Optional[int]:
+    """
+    Position of the blank run closest to the middle of a profile, or None.
+
+    Runs touching either end are margins, not gutters.
+    """
+    middle = len(profile) / 2
+    best, best_distance = None, None
+    start = None
+    for i, value in enumerate(profile):
+        if value <= 1:
+            if start is None:
+                start = i
+            continue
+        if start is not None and start > 0 and i - start >= min_run:
+            center = (start + i) // 2
+            distance = abs(center - middle)
+            if best is None or distance < best_distance:
+                best, best_distance = center, distance
+        start = None
+    return best
+
+
+def _normalize(line: str) -> str:
+    return re.sub(r"\s+", " ", line).strip().lower()
+
+
+def _same_line(a: str, b: str) -> bool:
+    a, b = _normalize(a), _normalize(b)
+    if not a or not b:
+        return a == b
+    return a == b or difflib.SequenceMatcher(None, a, b).ratio() >= 0.85
+
+
+def drop_overlap(previous: str, text: str, max_lines: int = 3) -> str:
+    """
+    Remove leading lines of `text` that repeat the trailing lines of `previous`.
+
+    The lines in an overlap may be partly cut off in one of the tiles, so
+    lines are compared loosely (case and whitespace insensitive, 85% similar).
+    """
+    tail = [line for line in previous.splitlines() if line.strip()][-max_lines:]
+    lines = text.splitlines()
+    head = [i for i, line in enumerate(lines) if line.strip()][:max_lines]
+    for count in range(min(len(tail), len(head)), 0, -1):
+        if all(_same_line(a, lines[i]) for a, i in zip(tail[-count:], head[:count])):
+            return "\n".join(lines[head[count - 1] + 1:])
+    return text
+
+
+def _drop_repeated_words(left: str, right: str, max_words: int = 4) -> str:
+    """Remove leading words of `right` that repeat the trailing words of `left` (loosely, as in drop_overlap)."""
+    tail, head = left.split(), right.split()
+    for count in range(min(len(tail), len(head), max_words), 0, -1):
+        if _normalize(" ".join(tail[-count:])) == _normalize(" ".join(head[:count])):
+            return " ".join(head[count:])
+    return right.strip()
+
+
+def merge_sides(left: str, right: str) -> Optional[str]:
+    """
+    Rejoin the halves of lines cut by a SIDE tile boundary.
+
+    Returns:
+        The merged text, or None if the halves do not line up (different line counts)
+    """
+    left_lines = [line for line in left.splitlines() if line.strip()]
+    right_lines = [line for line in right.splitlines() if line.strip()]
+    if not left_lines or len(left_lines) != len(right_lines):
+        return None
+    merged = []
+    for a, b in zip(left_lines, right_lines):
+        b = _drop_repeated_words(a, b)
+        merged.append(f"{a.rstrip()} {b}" if b else a.rstrip())
+    return "\n".join(merged)
+
+
+def stitch(tiles: List[Tile], texts: List[str]) -> str:
+    """Join tile texts in reading order, dropping lines duplicated by overlapping tiles."""
+    result = ""
+    previous = ""  # Text of the previous tile as it appears at the end of `result`
+    for tile, text in zip(tiles, texts):
+        text = text.strip()
+        if not result:
+            result = previous = text
+            continue
+        if tile.join == SIDE:
+            merged = merge_sides(previous, text)
+            if merged is not None and previous and result.endswith(previous):
+                result = result[:len(result) - len(previous)] + merged
+                previous = merged
+                continue
+        if tile.join == OVERLAP:
+            text = drop_overlap(result, text).strip()
+        if text:
+            result += ("\n\n" if tile.join in (COLUMN, SIDE) else "\n") + text
+            previous = text
+    return result
+
+
+def stitch_stream(tiles: List[Tile], texts: Iterable[str]) -> Iterator[str]:
+    """
+    stitch() for tile texts arriving in reading order: yields the new text once each tile is joined.
+
+    Joining the chunks gives stitch(tiles, texts). Rejoining SIDE halves
+    rewrites text already stitched, so a plan with SIDE joins yields only the
+    final result.
+
+    >>> tiles = [Tile((0, 0, 600, 40)), Tile((560, 0, 1200, 40), SIDE)]
+    >>> texts = ["hello wor\\nline two a", "world foo\\nb c"]
+    >>> "".join(stitch_stream(tiles, texts)) == stitch(tiles, texts)
+    True
+    >>> tiles[1].join = ROW
+    >>> list(stitch_stream(tiles, ["first\\n", "second"]))
+    ['first', '\\nsecond']
+    """
+    if any(tile.join == SIDE for tile in tiles):
+        text = stitch(tiles, list(texts))
+        if text:
+            yield text
+        return
+    collected, stitched = [], ""
+    for text in texts:
+        collected.append(text)
+        current = stitch(tiles, collected)
+        if len(current) > len(stitched):
+            yield current[len(stitched):]
+        stitched = current
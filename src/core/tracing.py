@@ -0,0 +1,190 @@
+"""
+Per-stage latency tracing for the hotkey-to-clipboard pipeline.
+
+A Trace follows one capture and records when each stage was reached, in
+milliseconds since the trace began (normally the hotkey press). Finished
+traces go into a bounded ring buffer from which per-stage percentiles are
+summarised. Code running on worker threads marks stages on the trace bound to
+that thread (or asyncio task), so backends need no extra parameters.
+"""
+
+import contextvars
+import itertools
+import json
+import math
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional
+
+from src.core.persistence import atomic_write
+
+# Pipeline stages in order. Each mark is the moment the stage completed
+# ("upload" is when the request was handed to the client library).
+HOTKEY = "hotkey"
+OVERLAY = "overlay"
+RELEASE = "release"
+CAPTURE = "capture"
+ENCODE = "encode"
+UPLOAD = "upload"
+FIRST_BYTE = "first_byte"
+COMPLETE = "complete"
+CLIPBOARD = "clipboard"
+HISTORY = "history"
+STAGES = (HOTKEY, OVERLAY, RELEASE, CAPTURE, ENCODE, UPLOAD, FIRST_BYTE, COMPLETE, CLIPBOARD, HISTORY)
+
+TOTAL = "total"  # Summary key for the whole trace (first to last mark)
+
+_ids = itertools.count(1)
+
+
+class Trace:
+    """Stage timestamps of one capture."""
+
+    def __init__(self, start: Optional[float] = None):
+        """
+        Args:
+            start: perf_counter() value the trace is measured from (default: now)
+        """
+        self.id = next(_ids)
+        self.start = time.perf_counter() if start is None else start
+        self.created_at = time.time()
+        self.marks: Dict[str, float] = {}
+        self.status = "ok"
+        self.attributes: Dict = {}
+
+    def mark(self, stage: str) -> float:
+        """
+        Record that a stage completed now (the first mark of a stage wins).
+
+        Returns:
+            Milliseconds since the trace started
+        """
+        if stage not in self.marks:
+            self.marks[stage] = (time.perf_counter() - self.start) * 1000
+        return self.marks[stage]
+
+    def durations(self) -> Dict[str, float]:
+        """Time spent in each recorded stage, i.e. since the previous recorded stage."""
+        result = {}
+        previous = 0.0
+        for stage in STAGES:
+            if stage in self.marks:
+                result[stage] = self.marks[stage] - previous
+                previous = self.marks[stage]
+        if self.marks:
+            result[TOTAL] = max(self.marks.values())
+        return result
+
+    def to_dict(self) -> Dict:
+        return {
+            "id": self.id,
+            "createdAt": self.created_at,
+            "status": self.status,
+            "marks": {stage: round(ms, 2) for stage, ms in self.marks.items()},
+            "durations": {stage: round(ms, 2) for stage, ms in self.durations().items()},
+            "attributes": self.attributes,
+        }
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    rank = max(1, math.ceil(len(ordered) * pct / 100))
+    return ordered[rank - 1]
+
+
+class TraceBuffer:
+    """Ring buffer of the most recent finished traces."""
+
+    def __init__(self, capacity: int = 500):
+        self._traces = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+
+    def add(self, trace: Trace):
+        with self._lock:
+            self._traces.append(trace)
+
+    def traces(self) -> List[Trace]:
+        with self._lock:
+            return list(self._traces)
+
+    def clear(self):
+        with self._lock:
+            self._traces.clear()
+
+    def summary(self) -> List[Dict]:
+        """
+        Per-stage duration percentiles over the buffered traces.
+
+        Returns:
+            One dict per stage seen (plus TOTAL) with stage, count, p50, p95, p99
+        """
+        samples: Dict[str, List[float]] = {}
+        for trace in self.traces():
+            for stage, ms in trace.durations().items():
+                samples.setdefault(stage, []).append(ms)
+        rows = []
+        for stage in STAGES + (TOTAL,):
+            values = samples.get(stage)
+            if values:
+                rows.append({
+                    "stage": stage,
+                    "count": len(values),
+                    "p50": round(percentile(values, 50), 1),
+                    "p95": round(percentile(values, 95), 1),
+                    "p99": round(percentile(values, 99), 1),
+                })
+        return rows
+
+    def export(self, path: str) -> str:
+        """
+        Write the summary and all buffered traces to a JSON file.
+
+        Returns:
+            The path written
+        """
+        data = {
+            "exportedAt": time.time(),
+            "summary": self.summary(),
+            "traces": [trace.to_dict() for trace in self.traces()],
+        }
+        atomic_write(path, json.dumps(data, indent=2))
+        return path
+
+
+_buffer = TraceBuffer()
+# A context variable rather than a thread-local: per thread, and also per asyncio task
+_current: contextvars.ContextVar = contextvars.ContextVar("trace", default=None)
+
+
+def get_buffer() -> TraceBuffer:
+    """Return the process-wide trace buffer."""
+    return _buffer
+
+
+def bind(trace: Optional[Trace]):
+    """Make `trace` the calling thread's (or task's) current trace (None to unbind)."""
+    _current.set(trace)
+
+
+def current() -> Optional[Trace]:
+    """The calling thread's (or task's) current trace, if any."""
+    return _current.get()
+
+
+def mark(stage: str):
+    """Mark a stage on the calling thread's current trace; no-op when none is bound."""
+    trace = current()
+    if trace is not None:
+        trace.mark(stage)
+
+
+def finish(trace: Optional[Trace], status: str = "ok"):
+    """Record a completed trace in the ring buffer and log its stage breakdown."""
+    if trace is None:
+        return
+    trace.status = status
+    _buffer.add(trace)
+    stages = ", ".join(f"{stage} {ms:.0f}" for stage, ms in trace.durations().items())
+    print(f"Trace {trace.id} ({status}) ms: {stages}")
@@ -0,0 +1,173 @@
+"""
+Region watch: re-capture a screen region on an interval and pick out the frames worth OCRing.
+
+Frames are compared pixel by pixel (vectorized with NumPy when it is
+installed, with PIL's ImageChops otherwise). A frame is passed on for OCR
+only when it differs from the last OCRed frame by more than a threshold and
+has stopped changing for a debounce period, so a terminal that is being
+typed into or a scrolling panel is read once it settles, and identical
+frames never cost a request.
+"""
+
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, Tuple
+
+from PIL import Image, ImageChops
+
+from src.core import capture
+
+try:
+    import numpy as np
+except ImportError:  # Falls back to ImageChops
+    np = None
+
+
+@dataclass
+class WatchOptions:
+    """How often a watched region is captured and what counts as a change."""
+
+    interval: float = 1.0              # Seconds between captures
+    change_threshold: float = 0.001    # Fraction of pixels that must differ for a change
+    pixel_delta: int = 32              # Per-channel difference below which a pixel counts as unchanged
+    debounce: float = 0.5              # Seconds the region must be still before it is OCRed
+    max_wait: float = 5.0              # OCR a changed region after this long even if it keeps moving
+
+
+def _snapshot(frame: "capture.Frame"):
+    """Pixels of a frame in the form changed_fraction() compares."""
+    if np is not None:
+        return frame.array()[..., :3]  # A view; BGR order is fine for differencing
+    return frame.to_image()
+
+
+def changed_fraction(a, b, pixel_delta: int = 32) -> float:
+    """
+    Fraction of pixels that differ between two snapshots.
+
+    A pixel differs if any channel changed by more than `pixel_delta`, so
+    compression noise and subpixel rendering jitter are ignored.
+    """
+    if np is not None:
+        if a.shape != b.shape:
+            return 1.0
+        # uint8 subtraction wraps, so take the larger minus the smaller
+        diff = np.maximum(a, b) - np.minimum(a, b)
+        return float(np.count_nonzero(diff.max(axis=2) > pixel_delta)) / (diff.shape[0] * diff.shape[1])
+    if a.size != b.size:
+        return 1.0
+    r, g, b_ = ImageChops.difference(a, b).split()
+    diff = ImageChops.lighter(ImageChops.lighter(r, g), b_)
+    changed = diff.point(lambda v: 255 if v > pixel_delta else 0).histogram()[255]
+    return changed / (a.width * a.height)
+
+
+class ChangeGate:
+    """Decides which captured frames of a region should be OCRed."""
+
+    def __init__(self, options: Optional[WatchOptions] = None):
+        self.options = options or WatchOptions()
+        self._reference = None     # Snapshot last passed for OCR
+        self._previous = None      # Snapshot of the previous frame
+        self._changed_since = None  # When the region first differed from the reference
+        self._last_motion = float("-inf")
+        self.last_fraction = 0.0   # Difference from the reference at the last update
+
+    def update(self, frame: "capture.Frame", now: Optional[float] = None) -> bool:
+        """
+        Feed the next captured frame.
+
+        Returns:
+            True if the frame should be OCRed (the first frame always is)
+        """
+        now = time.monotonic() if now is None else now
+        options = self.options
+        snap = _snapshot(frame)
+        previous, self._previous = self._previous, snap
+        if self._reference is None:
+            self._reference = snap
+            return True
+        self.last_fraction = changed_fraction(snap, self._reference, options.pixel_delta)
+        if self.last_fraction < options.change_threshold:
+            # Unchanged, or changed back (e.g. a blinking cursor)
+            self._changed_since = None
+            return False
+        if self._changed_since is None:
+            self._changed_since = now
+        if previous is not None and changed_fraction(snap, previous, options.pixel_delta) >= options.change_threshold:
+            self._last_motion = now
+        settled = now - self._last_motion >= options.debounce and self._last_motion < now
+        if settled or now - self._changed_since >= options.max_wait:
+            self._reference = snap
+            self._changed_since = None
+            return True
+        return False
+
+
+class RegionWatcher:
+    """
+    Captures a region on its own thread and hands changed frames to a callback.
+
+    The callback runs on the watcher thread with the frame as an RGB PIL
+    image; GUI code should forward it to its own thread (e.g. with a signal).
+    """
+
+    def __init__(self, region: Tuple[int, int, int, int], on_change: Callable[[Image.Image], None],
+                 options: Optional[WatchOptions] = None):
+        """
+        Args:
+            region: x, y, width, height in screen coordinates (as for capture.capture_region)
+            on_change: Called with each frame that should be OCRed
+            options: Interval, threshold and debounce
+        """
+        self.region = region
+        self.options = options or WatchOptions()
+        self._on_change = on_change
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="region-watch", daemon=True)
+        self._frames = 0
+        self._changes = 0
+        self._gate = ChangeGate(self.options)
+
+    @property
+    def stats(self) -> Dict:
+        return {"frames": self._frames, "changes": self._changes, "lastFraction": self._gate.last_fraction}
+
+    @property
+    def running(self) -> bool:
+        return self._thread.is_alive() and not self._stop.is_set()
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        """Stop capturing; returns at once (a capture in progress finishes on its own)."""
+        self._stop.set()
+
+    def _run(self):
+        capturer = capture.get_capturer()
+        try:
+            while not self._stop.is_set():
+                started = time.monotonic()
+                try:
+                    frame = capturer.grab(*self.region)
+                    self._frames += 1
+                    if self._gate.update(frame, started):
+                        self._changes += 1
+                        self._on_change(frame.to_image())
+                except Exception as e:
+                    print(f"Region watch capture failed: {e}")
+                self._stop.wait(max(0.0, self.options.interval - (time.monotonic() - started)))
+        finally:
+            capturer.close()  # This thread's grabber
+
+
+def append_to_file(path: str, text: str, timestamp: str):
+    """Append one watched text, headed by its timestamp, to a plain text log."""
+    path = os.path.expanduser(path)
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(f"[{timestamp}]\n{text}\n\n")
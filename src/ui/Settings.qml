@@ -6,7 +6,7 @@ import QtQuick.Window
 Window {
     id: settingsWindow
     width: 500
-    height: 550
+    height: 660
     title: "Settings - Lexiclip"
     visible: false
     
@@ -20,268 +20,514 @@ Window {
     
     color: surfaceColor
 
-    ColumnLayout {
+    ScrollView {
+        id: settingsScroll
         anchors.fill: parent
         anchors.margins: 24
-        spacing: 20
-
-        // Header
-        Label {
-            text: "Settings"
-            font.pixelSize: 24
-            font.weight: Font.Bold
-            color: surfaceTextColor
-            Layout.alignment: Qt.AlignHCenter
-        }
+        contentWidth: availableWidth
 
-        // API Key Section
-        // API Key Section
         ColumnLayout {
-            Layout.fillWidth: true
-            spacing: 8
+            width: settingsScroll.availableWidth
+            spacing: 20
 
+            // Header
             Label {
-                text: "Gemini API Key"
-                font.pixelSize: 14
-                font.weight: Font.Medium
+                text: "Settings"
+                font.pixelSize: 24
+                font.weight: Font.Bold
                 color: surfaceTextColor
+                Layout.alignment: Qt.AlignHCenter
             }
 
-            Pane {
+            // API Key Section
+            // API Key Section
+            ColumnLayout {
                 Layout.fillWidth: true
-                padding: 16
-                
-                background: Rectangle {
-                    color: surfaceVariant
-                    radius: 8
+                spacing: 8
+
+                Label {
+                    text: "Gemini API Key"
+                    font.pixelSize: 14
+                    font.weight: Font.Medium
+                    color: surfaceTextColor
                 }
+
+                Pane {
+                    Layout.fillWidth: true
+                    padding: 16
+                
+                    background: Rectangle {
+                        color: surfaceVariant
+                        radius: 8
+                    }
                 
-                ColumnLayout {
-                    anchors.fill: parent
-                    spacing: 12
+                    ColumnLayout {
+                        anchors.fill: parent
+                        spacing: 12
                     
-                    TextField {
-                        id: apiKeyInput
-                        Layout.fillWidth: true
-                        placeholderText: "sk-..."
-                        echoMode: TextInput.Password
-                        color: surfaceTextColor
-                        font.pixelSize: 13
+                        TextField {
+                            id: apiKeyInput
+                            Layout.fillWidth: true
+                            placeholderText: "sk-..."
+                            echoMode: TextInput.Password
+                            color: surfaceTextColor
+                            font.pixelSize: 13
                         
-                        background: Rectangle {
-                            color: surfaceColor
-                            border.color: apiKeyInput.activeFocus ? primaryColor : outlineColor
-                            border.width: 2
-                            radius: 4
-                        }
+                            background: Rectangle {
+                                color: surfaceColor
+                                border.color: apiKeyInput.activeFocus ? primaryColor : outlineColor
+                                border.width: 2
+                                radius: 4
+                            }
                         
-                        Component.onCompleted: {
-                            text = bridge.apiKey
+                            Component.onCompleted: {
+                                text = bridge.apiKey
+                            }
                         }
-                    }
                     
-                    RowLayout {
-                        Layout.fillWidth: true
-                        spacing: 8
+                        RowLayout {
+                            Layout.fillWidth: true
+                            spacing: 8
                         
-                        Button {
-                            text: "Save"
+                            Button {
+                                text: "Save"
                             
-                            onClicked: {
-                                bridge.setApiKey(apiKeyInput.text)
-                                savedLabel.visible = true
-                                savedTimer.start()
-                            }
+                                onClicked: {
+                                    bridge.setApiKey(apiKeyInput.text)
+                                    savedLabel.visible = true
+                                    savedTimer.start()
+                                }
                             
-                            background: Rectangle {
-                                color: parent.hovered ? Qt.lighter(primaryColor, 1.1) : primaryColor
-                                radius: 4
-                            }
+                                background: Rectangle {
+                                    color: parent.hovered ? Qt.lighter(primaryColor, 1.1) : primaryColor
+                                    radius: 4
+                                }
                             
-                            contentItem: Text {
-                                text: parent.text
-                                font.pixelSize: 13
-                                color: "#ffffff"
-                                horizontalAlignment: Text.AlignHCenter
-                                verticalAlignment: Text.AlignVCenter
+                                contentItem: Text {
+                                    text: parent.text
+                                    font.pixelSize: 13
+                                    color: "#ffffff"
+                                    horizontalAlignment: Text.AlignHCenter
+                                    verticalAlignment: Text.AlignVCenter
+                                }
                             }
-                        }
                         
-                        Label {
-                            id: savedLabel
-                            text: "✓ Saved"
-                            color: "#43a047"
-                            visible: false
-                        }
+                            Label {
+                                id: savedLabel
+                                text: "✓ Saved"
+                                color: "#43a047"
+                                visible: false
+                            }
                         
-                        Timer {
-                            id: savedTimer
-                            interval: 2000
-                            onTriggered: savedLabel.visible = false
-                        }
+                            Timer {
+                                id: savedTimer
+                                interval: 2000
+                                onTriggered: savedLabel.visible = false
+                            }
                         
-                        Item { Layout.fillWidth: true }
+                            Item { Layout.fillWidth: true }
                         
-                        Button {
-                            text: "Get API Key →"
-                            flat: true
+                            Button {
+                                text: "Get API Key →"
+                                flat: true
                             
-                            onClicked: Qt.openUrlExternally("https://aistudio.google.com/app/apikey")
+                                onClicked: Qt.openUrlExternally("https://aistudio.google.com/app/apikey")
                             
-                            contentItem: Text {
-                                text: parent.text
-                                font.pixelSize: 12
-                                color: parent.hovered ? primaryColor : secondaryText
-                                horizontalAlignment: Text.AlignHCenter
-                                verticalAlignment: Text.AlignVCenter
+                                contentItem: Text {
+                                    text: parent.text
+                                    font.pixelSize: 12
+                                    color: parent.hovered ? primaryColor : secondaryText
+                                    horizontalAlignment: Text.AlignHCenter
+                                    verticalAlignment: Text.AlignVCenter
+                                }
                             }
                         }
                     }
                 }
             }
-        }
 
-        // Hotkey Display
-        // Hotkey Display
-        ColumnLayout {
-            Layout.fillWidth: true
-            spacing: 8
+            // OCR Engine
+            ColumnLayout {
+                Layout.fillWidth: true
+                spacing: 8
 
-            Label {
-                text: "Capture Hotkey"
-                font.pixelSize: 14
-                font.weight: Font.Medium
-                color: surfaceTextColor
+                Label {
+                    text: "OCR Engine"
+                    font.pixelSize: 14
+                    font.weight: Font.Medium
+                    color: surfaceTextColor
+                }
+
+                Pane {
+                    Layout.fillWidth: true
+                    padding: 16
+
+                    background: Rectangle {
+                        color: surfaceVariant
+                        radius: 8
+                    }
+
+                    ColumnLayout {
+                        anchors.fill: parent
+                        spacing: 8
+
+                        ComboBox {
+                            id: routingCombo
+                            Layout.fillWidth: true
+                            textRole: "label"
+                            valueRole: "value"
+                            model: [
+                                { value: "remote", label: "Gemini (cloud)" },
+                                { value: "local", label: "Tesseract (offline)" },
+                                { value: "auto", label: "Auto: local for simple text, cloud otherwise" },
+                                { value: "fallback", label: "Gemini with offline fallback" }
+                            ]
+
+                            Component.onCompleted: currentIndex = indexOfValue(bridge.ocrRouting)
+                            onActivated: bridge.setOcrRouting(currentValue)
+                        }
+
+                        Label {
+                            text: bridge.localOcrAvailable ? "Local OCR available" : "Local OCR unavailable (install tesseract and pytesseract)"
+                            font.pixelSize: 11
+                            color: secondaryText
+                        }
+                    }
+                }
             }
 
-            Pane {
+            // Usage
+            ColumnLayout {
                 Layout.fillWidth: true
-                padding: 16
-                
-                background: Rectangle {
-                    color: surfaceVariant
-                    radius: 8
+                spacing: 8
+
+                Label {
+                    text: "Usage"
+                    font.pixelSize: 14
+                    font.weight: Font.Medium
+                    color: surfaceTextColor
                 }
-                
-                ColumnLayout {
-                    anchors.fill: parent
-                    spacing: 8
-                    
-                    Label {
-                        text: bridge.hotkeyDisplay
-                        font.pixelSize: 16
-                        font.weight: Font.Bold
-                        color: primaryColor
+
+                Pane {
+                    Layout.fillWidth: true
+                    padding: 16
+
+                    background: Rectangle {
+                        color: surfaceVariant
+                        radius: 8
                     }
-                    
-                    Label {
-                        text: "(Configuration coming soon)"
-                        font.pixelSize: 11
-                        color: secondaryText
+
+                    ColumnLayout {
+                        anchors.fill: parent
+                        spacing: 8
+
+                        Label {
+                            property var today: bridge.usageToday
+                            text: today.budget > 0
+                                  ? "Today: " + today.tokens.toLocaleString(Qt.locale(), 'f', 0) + " of "
+                                    + today.budget.toLocaleString(Qt.locale(), 'f', 0) + " tokens"
+                                    + (today.overBudget ? " (budget settings active)" : "")
+                                  : "Today: " + today.tokens.toLocaleString(Qt.locale(), 'f', 0) + " tokens"
+                            font.pixelSize: 13
+                            color: today.overBudget ? "#ffb74d" : surfaceTextColor
+                        }
+
+                        // Per day and backend, last 7 days
+                        GridLayout {
+                            Layout.fillWidth: true
+                            columns: 6
+                            columnSpacing: 12
+                            rowSpacing: 2
+                            visible: bridge.usageSummary.length > 0
+
+                            Repeater {
+                                model: ["Day", "Backend", "Calls", "Tokens in/out", "Uploaded", "Avg"]
+                                Label {
+                                    text: modelData
+                                    font.pixelSize: 11
+                                    font.weight: Font.Medium
+                                    color: secondaryText
+                                }
+                            }
+
+                            Repeater {
+                                model: bridge.usageSummary
+                                delegate: Repeater {
+                                    property var row: modelData
+                                    model: [
+                                        row.day.substring(5),
+                                        row.backend,
+                                        row.requests + (row.failed ? " (" + row.failed + " failed)" : ""),
+                                        row.promptTokens + " / " + row.responseTokens,
+                                        (row.bytes / 1024).toFixed(0) + " KiB",
+                                        row.avgLatencyMs.toFixed(0) + " ms"
+                                    ]
+                                    Label {
+                                        text: modelData
+                                        font.pixelSize: 11
+                                        color: surfaceTextColor
+                                    }
+                                }
+                            }
+                        }
+
+                        Label {
+                            text: "No OCR calls in the last 7 days"
+                            visible: bridge.usageSummary.length === 0
+                            font.pixelSize: 11
+                            color: secondaryText
+                        }
+
+                        RowLayout {
+                            Layout.fillWidth: true
+                            spacing: 8
+
+                            Label {
+                                text: "Daily token budget"
+                                font.pixelSize: 13
+                                color: surfaceTextColor
+                            }
+
+                            SpinBox {
+                                id: budgetSpin
+                                from: 0
+                                to: 100000000
+                                stepSize: 10000
+                                editable: true
+                                value: bridge.dailyTokenBudget
+                                onValueModified: bridge.setDailyTokenBudget(value)
+                            }
+
+                            Label {
+                                text: budgetSpin.value === 0 ? "unlimited" : ""
+                                font.pixelSize: 11
+                                color: secondaryText
+                            }
+                        }
+
+                        ComboBox {
+                            id: budgetActionCombo
+                            Layout.fillWidth: true
+                            textRole: "label"
+                            valueRole: "value"
+                            model: [
+                                { value: "cheaper", label: "Over budget: cheaper model and smaller uploads" },
+                                { value: "local", label: "Over budget: local OCR only" }
+                            ]
+
+                            Component.onCompleted: currentIndex = indexOfValue(bridge.budgetAction)
+                            onActivated: bridge.setBudgetAction(currentValue)
+                        }
                     }
                 }
             }
-        }
 
-        // Start on Login
-        // Start on Login
-        ColumnLayout {
-            Layout.fillWidth: true
-            spacing: 8
+            // Region watch
+            ColumnLayout {
+                Layout.fillWidth: true
+                spacing: 8
 
-            Label {
-                text: "Startup"
-                font.pixelSize: 14
-                font.weight: Font.Medium
-                color: surfaceTextColor
+                Label {
+                    text: "Region Watch"
+                    font.pixelSize: 14
+                    font.weight: Font.Medium
+                    color: surfaceTextColor
+                }
+
+                Pane {
+                    Layout.fillWidth: true
+                    padding: 16
+
+                    background: Rectangle {
+                        color: surfaceVariant
+                        radius: 8
+                    }
+
+                    ColumnLayout {
+                        anchors.fill: parent
+                        spacing: 8
+
+                        RowLayout {
+                            Layout.fillWidth: true
+                            spacing: 8
+
+                            Label {
+                                text: "Check every (ms)"
+                                font.pixelSize: 13
+                                color: surfaceTextColor
+                            }
+
+                            SpinBox {
+                                from: 100
+                                to: 60000
+                                stepSize: 250
+                                editable: true
+                                value: bridge.watchIntervalMs
+                                onValueModified: bridge.setWatchIntervalMs(value)
+                            }
+                        }
+
+                        TextField {
+                            Layout.fillWidth: true
+                            placeholderText: "Also append new text to a file (optional)"
+                            text: bridge.watchOutputFile
+                            selectByMouse: true
+                            onEditingFinished: bridge.setWatchOutputFile(text)
+                        }
+
+                        Label {
+                            text: "A region is read again only when its pixels change, and recorded only when its text changes"
+                            font.pixelSize: 11
+                            color: secondaryText
+                            wrapMode: Text.WordWrap
+                            Layout.fillWidth: true
+                        }
+                    }
+                }
             }
 
-            Pane {
+            // Hotkey Display
+            // Hotkey Display
+            ColumnLayout {
                 Layout.fillWidth: true
-                padding: 16
-                
-                background: Rectangle {
-                    color: surfaceVariant
-                    radius: 8
+                spacing: 8
+
+                Label {
+                    text: "Capture Hotkey"
+                    font.pixelSize: 14
+                    font.weight: Font.Medium
+                    color: surfaceTextColor
                 }
+
+                Pane {
+                    Layout.fillWidth: true
+                    padding: 16
                 
-                CheckBox {
-                    id: autostartCheckbox
-                    text: "Start Lexiclip on Login"
-                    checked: bridge.autostartEnabled
-                    
-                    onCheckedChanged: {
-                        bridge.setAutostartEnabled(checked)
+                    background: Rectangle {
+                        color: surfaceVariant
+                        radius: 8
                     }
+                
+                    ColumnLayout {
+                        anchors.fill: parent
+                        spacing: 8
                     
-                    contentItem: Text {
-                        text: parent.text
-                        font.pixelSize: 13
-                        color: surfaceTextColor
-                        leftPadding: parent.indicator.width + parent.spacing
-                        verticalAlignment: Text.AlignVCenter
+                        Label {
+                            text: bridge.hotkeyDisplay
+                            font.pixelSize: 16
+                            font.weight: Font.Bold
+                            color: primaryColor
+                        }
+                    
+                        Label {
+                            text: "(Configuration coming soon)"
+                            font.pixelSize: 11
+                            color: secondaryText
+                        }
+                    }
+                }
+            }
+
+            // Start on Login
+            // Start on Login
+            ColumnLayout {
+                Layout.fillWidth: true
+                spacing: 8
+
+                Label {
+                    text: "Startup"
+                    font.pixelSize: 14
+                    font.weight: Font.Medium
+                    color: surfaceTextColor
+                }
+
+                Pane {
+                    Layout.fillWidth: true
+                    padding: 16
+                
+                    background: Rectangle {
+                        color: surfaceVariant
+                        radius: 8
                     }
+                
+                    CheckBox {
+                        id: autostartCheckbox
+                        text: "Start Lexiclip on Login"
+                        checked: bridge.autostartEnabled
                     
-                    indicator: Rectangle {
-                        implicitWidth: 20
-                        implicitHeight: 20
-                        x: parent.leftPadding
-                        y: parent.height / 2 - height / 2
-                        radius: 3
-                        border.color: parent.checked ? primaryColor : outlineColor
-                        border.width: 2
-                        color: parent.checked ? primaryColor : "transparent"
+                        onCheckedChanged: {
+                            bridge.setAutostartEnabled(checked)
+                        }
+                    
+                        contentItem: Text {
+                            text: parent.text
+                            font.pixelSize: 13
+                            color: surfaceTextColor
+                            leftPadding: parent.indicator.width + parent.spacing
+                            verticalAlignment: Text.AlignVCenter
+                        }
+                    
+                        indicator: Rectangle {
+                            implicitWidth: 20
+                            implicitHeight: 20
+                            x: parent.leftPadding
+                            y: parent.height / 2 - height / 2
+                            radius: 3
+                            border.color: parent.checked ? primaryColor : outlineColor
+                            border.width: 2
+                            color: parent.checked ? primaryColor : "transparent"
                         
-                        Rectangle {
-                            width: 12
-                            height: 6
-                            x: 4
-                            y: 5
-                            rotation: -45
-                            visible: parent.parent.checked
-                            
                             Rectangle {
-                                width: 3
-                                height: parent.height
-                                color: "white"
-                                anchors.left: parent.left
-                                anchors.bottom: parent.bottom
-                            }
+                                width: 12
+                                height: 6
+                                x: 4
+                                y: 5
+                                rotation: -45
+                                visible: parent.parent.checked
                             
-                            Rectangle {
-                                width: parent.width
-                                height: 3
-                                color: "white"
-                                anchors.left: parent.left
-                                anchors.bottom: parent.bottom
+                                Rectangle {
+                                    width: 3
+                                    height: parent.height
+                                    color: "white"
+                                    anchors.left: parent.left
+                                    anchors.bottom: parent.bottom
+                                }
+                            
+                                Rectangle {
+                                    width: parent.width
+                                    height: 3
+                                    color: "white"
+                                    anchors.left: parent.left
+                                    anchors.bottom: parent.bottom
+                                }
                             }
                         }
                     }
                 }
             }
-        }
         
-        Item { Layout.fillHeight: true }
+            Item { Layout.fillHeight: true }
         
-        // Close button
-        Button {
-            text: "Close"
-            Layout.alignment: Qt.AlignHCenter
-            Layout.preferredWidth: 120
+            // Close button
+            Button {
+                text: "Close"
+                Layout.alignment: Qt.AlignHCenter
+                Layout.preferredWidth: 120
             
-            onClicked: settingsWindow.visible = false
+                onClicked: settingsWindow.visible = false
             
-            background: Rectangle {
-                color: parent.hovered ? "#353849" : "#2a2d3e"
-                radius: 8
-            }
+                background: Rectangle {
+                    color: parent.hovered ? "#353849" : "#2a2d3e"
+                    radius: 8
+                }
             
-            contentItem: Text {
-                text: parent.text
-                font.pixelSize: 14
-                color: surfaceTextColor
-                horizontalAlignment: Text.AlignHCenter
-                verticalAlignment: Text.AlignVCenter
+                contentItem: Text {
+                    text: parent.text
+                    font.pixelSize: 14
+                    color: surfaceTextColor
+                    horizontalAlignment: Text.AlignHCenter
+                    verticalAlignment: Text.AlignVCenter
+                }
             }
         }
     }
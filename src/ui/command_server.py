@@ -0,0 +1,137 @@
+"""Command channel server: lets scripts and keybindings drive the running instance."""
+
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+
+from PySide6.QtCore import QObject
+from PySide6.QtNetwork import QLocalServer, QLocalSocket
+
+from src.core import ipc
+
+
+class CommandServer(QObject):
+    """
+    Serves ipc commands on a QLocalServer.
+
+    Commands run on the GUI thread like any UI action. With "wait", a
+    capture's reply is held back until its OCR job is delivered, so a
+    script gets the text in one round trip.
+    """
+
+    def __init__(self, controller, show_window: Callable[[], None], parent=None):
+        """
+        Args:
+            controller: The Controller the commands act on
+            show_window: Shows and raises the main window
+        """
+        super().__init__(parent)
+        self._controller = controller
+        self._show_window = show_window
+        self._server = QLocalServer(self)
+        self._server.setSocketOptions(QLocalServer.SocketOption.UserAccessOption)
+        self._server.newConnection.connect(self._on_new_connection)
+        self._waiting: Dict[int, QLocalSocket] = {}  # OCR job id -> client waiting for its result
+        # Recent results nobody was waiting for yet: cache hits are delivered before submit() returns
+        self._results: "OrderedDict[int, Dict]" = OrderedDict()
+        self._handlers = {
+            ipc.CAPTURE: self._capture,
+            ipc.CAPTURE_REGION: self._capture_region,
+            ipc.OCR_FILE: self._ocr_file,
+            ipc.GET_LAST_RESULT: self._get_last_result,
+            ipc.SHOW: self._show,
+        }
+        controller.captureDone.connect(self._on_capture_done)
+
+    def listen(self) -> bool:
+        name = ipc.server_name()
+        # A socket file left by a crashed instance; this process holds the single-instance lock
+        QLocalServer.removeServer(name)
+        if not self._server.listen(name):
+            print(f"Command channel unavailable: {self._server.errorString()}")
+            return False
+        print(f"Command channel listening on {name}")
+        return True
+
+    def close(self):
+        self._server.close()
+
+    # -- connections ----------------------------------------------------------------
+
+    def _on_new_connection(self):
+        while self._server.hasPendingConnections():
+            sock = self._server.nextPendingConnection()
+            sock.readyRead.connect(lambda sock=sock: self._on_ready_read(sock))
+            sock.disconnected.connect(lambda sock=sock: self._on_disconnected(sock))
+
+    def _on_ready_read(self, sock: QLocalSocket):
+        if not sock.canReadLine():
+            return  # The rest of the request has not arrived yet
+        line = bytes(sock.readLine().data())
+        try:
+            request = ipc.decode(line)
+            handler = self._handlers.get(request.get("command"))
+            if handler is None:
+                raise ValueError(f"Unknown command: {request.get('command')!r}")
+            reply = handler(sock, request.get("args") or {})
+        except KeyError as e:
+            reply = {"ok": False, "error": f"Missing argument: {e.args[0]}"}
+        except Exception as e:
+            reply = {"ok": False, "error": str(e)}
+        if reply is not None:
+            self._reply(sock, reply)
+
+    def _on_disconnected(self, sock: QLocalSocket):
+        for job_id in [job_id for job_id, waiting in self._waiting.items() if waiting is sock]:
+            del self._waiting[job_id]
+        sock.deleteLater()
+
+    @staticmethod
+    def _reply(sock: QLocalSocket, reply: Dict):
+        if sock.state() != QLocalSocket.LocalSocketState.ConnectedState:
+            return
+        sock.write(ipc.encode(reply))
+        sock.flush()
+        sock.disconnectFromServer()
+
+    def _on_capture_done(self, job_id, text, error):
+        reply = {"ok": True, "job": job_id, "text": text} if not error else {"ok": False, "job": job_id, "error": error}
+        sock = self._waiting.pop(job_id, None)
+        if sock is not None:
+            self._reply(sock, reply)
+            return
+        self._results[job_id] = reply
+        while len(self._results) > 16:
+            self._results.popitem(last=False)
+
+    def _submitted(self, sock: QLocalSocket, job_id: Optional[int], wait: bool) -> Optional[Dict]:
+        if job_id is None:
+            return {"ok": False, "error": "Capture failed"}
+        if not wait:
+            return {"ok": True, "job": job_id}
+        if job_id in self._results:
+            return self._results.pop(job_id)
+        self._waiting[job_id] = sock
+        return None
+
+    # -- commands -------------------------------------------------------------------
+
+    def _capture(self, sock, args):
+        self._controller.triggerCapture()
+        return {"ok": True}
+
+    def _capture_region(self, sock, args):
+        x, y, width, height = (int(args[key]) for key in ("x", "y", "width", "height"))
+        if width <= 0 or height <= 0:
+            raise ValueError("Region must have a positive width and height")
+        job_id = self._controller.capture_screen_region(x, y, width, height)
+        return self._submitted(sock, job_id, args.get("wait", False))
+
+    def _ocr_file(self, sock, args):
+        return self._submitted(sock, self._controller.ocr_file(args["path"]), args.get("wait", False))
+
+    def _get_last_result(self, sock, args):
+        return dict(self._controller.last_result(), ok=True)
+
+    def _show(self, sock, args):
+        self._show_window()
+        return {"ok": True}
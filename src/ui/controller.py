@@ -1,105 +1,937 @@
-from PySide6.QtCore import QObject, Slot, Property, Signal, QThread
+import os
+import sys
+from datetime import datetime
+from PySide6.QtCore import QObject, Qt, Slot, Property, Signal
 from PySide6.QtWidgets import QMessageBox
-from src.core import capture, ocr, clipboard, history
+from src.core import clipboard, history, persistence, tracing
 from src.core.config import Config
+from src.ui.frame_provider import FrozenFrameProvider
+from src.ui.history_model import HistoryListModel
+from src.ui.thumbnail_provider import ThumbnailProvider
+from src.ui.scheduler import OcrScheduler
 import traceback
 
-class Worker(QThread):
-    finished = Signal(str)
-    error = Signal(str)
 
-    def __init__(self, img):
-        super().__init__()
-        self.img = img
+def _capture():
+    """The capture module, imported on first use to keep it (and mss) off the startup path."""
+    from src.core import capture
+    return capture
 
-    def run(self):
-        try:
-            text = ocr.extract_text(self.img)
-            self.finished.emit(text)
-        except Exception as e:
-            self.error.emit(str(e))
 
 class Controller(QObject):
     historyChanged = Signal()
     captureRequested = Signal()
+    hotkeyActivated = Signal()  # Emitted from the hotkey listener's thread; handled on the GUI thread
     captureStarted = Signal()
     ocrSuccess = Signal(str)
+    ocrChunk = Signal(str)  # Partial text while a streamed result arrives
     hotkeyChanged = Signal(str)  # Emits display string
     hotkeyUpdateRequested = Signal(str)  # Emits pynput format for main.py
     autostartChanged = Signal(bool)
     autostartUpdateRequested = Signal(bool)  # Tell main.py to update autostart file
+    cacheStatsChanged = Signal()
+    ocrRoutingChanged = Signal(str)
+    queueDepthChanged = Signal(int)
+    frozenFrameChanged = Signal()
+    latencyChanged = Signal()
+    ocrError = Signal(str)  # Non-blocking error notification (shown as a toast)
+    usageChanged = Signal()
+    ioStatsChanged = Signal()
+    watchRegionRequested = Signal()  # Show the overlay to pick a region to watch
+    watchChanged = Signal()
+    watchTextChanged = Signal(str)  # New text read from the watched region
+    monitorsChanged = Signal()
+    _watchFrame = Signal(int, object)  # Watch session, changed frame (from the watcher thread)
+    captureDone = Signal(int, str, str)  # OCR job id, text, error ('' on success); also for cancelled jobs
+    _persisted = Signal(object)  # Callback to run on the GUI thread once a background write is done
     
     def __init__(self):
         super().__init__()
-        self._history = history.load_history()
         self._config = Config()
-        self.worker = None
+        self._history = HistoryListModel(parent=self)  # Filled by loadHistory()
+        self._engine = None  # Built on first use; see _ocr_engine
+        self._cache = None
+        self._images = None
+        self._streamed_text = ""
+        self._streamed_job = None
+        runner = None
+        concurrency = self._config.get_ocr_max_concurrency()
+        if self._config.get_async_ocr_enabled():
+            # Jobs become coroutines on one event loop rather than a thread each
+            from src.core import async_loop
+            runner = async_loop.get_runner()
+            concurrency = self._config.get_async_ocr_concurrency()
+        self._scheduler = OcrScheduler(
+            lambda: self._ocr_engine,
+            max_concurrency=concurrency,
+            supersede=self._config.get_supersede_stale_jobs(),
+            parent=self,
+            runner=runner,
+            deadline=self._config.get_ocr_job_deadline(),
+        )
+        self._scheduler.jobChunk.connect(self.on_ocr_chunk)
+        self._scheduler.resultReady.connect(self.on_job_finished)
+        self._scheduler.jobFailed.connect(self.on_job_failed)
+        self._scheduler.jobCancelled.connect(lambda job_id: self.captureDone.emit(job_id, "", "cancelled"))
+        self._scheduler.cancelledReport.connect(self.on_job_abandoned)
+        self._scheduler.queueDepthChanged.connect(self.queueDepthChanged)
         self._monitors = []  # Will be set by main.py
+        # The freeze, trace and engine warm-up all touch GUI-thread state
+        self.hotkeyActivated.connect(self.triggerCapture, Qt.ConnectionType.QueuedConnection)
+        self._frozen_frame = None  # Desktop grabbed at hotkey time
+        self._frozen_frame_id = 0
+        self._frame_provider = FrozenFrameProvider(lambda: self._frozen_frame)
+        self._trace = None  # Trace of the capture currently being selected
+        self._thumbnail_provider = ThumbnailProvider(lambda: self._image_store)
+        self._writes = 0  # Sequence number of background writes
+        self._persisted.connect(self._on_persisted)
+        self._watcher = None  # RegionWatcher while a region is being watched
+        self._watch_session = 0
+        self._watch_scheduler = None  # Separate from captures so neither supersedes the other
+        self._watch_job = None
+        self._watch_pending = None  # Newest changed frame waiting for the current watch job
+        self._watch_text = None  # Last text recorded from the region
+        self._watch_entries = 0
+        self._watchFrame.connect(self._on_watch_frame)
+        self._last_result = None  # Text and time of this session's latest OCR result
+        self._tokens_today = None  # Billed tokens today, updated after each usage write; None until read
+        self._tokens_day = ""  # Day _tokens_today counts
     
+    @property
+    def _ocr_engine(self):
+        """The OCR engine, importing the OCR stack on first access."""
+        if self._engine is None:
+            from src.core import ocr
+            self._engine = ocr.get_engine()
+            self._check_budget()
+        return self._engine
+
+    @property
+    def _ocr_cache(self):
+        if self._cache is None:
+            self._open_ocr_cache()
+        return self._cache
+
+    def _open_ocr_cache(self):
+        """Create the OCR cache and read its index on the persistence thread, ahead of the first lookup."""
+        from src.core.ocr_cache import OcrCache
+        self._cache = OcrCache(phash_distance=self._config.get_ocr_cache_phash_distance())
+        self._persist(self._cache.preload_index, lambda _: self.cacheStatsChanged.emit())
+
+    @property
+    def _image_store(self):
+        if self._images is None:
+            from src.core import image_store
+            self._images = image_store.get_store()
+        return self._images
+
+    def _store_image(self, img, cache_key=None) -> str:
+        """Keep the capture in the image store (written in the background); returns its digest or ''."""
+        if not self._config.get_image_store_enabled():
+            return ""
+        try:
+            return self._image_store.put(img, cache_key[0] if cache_key else None)
+        except Exception as e:
+            print(f"Could not keep capture image: {e}")
+            return ""
+
     def setMonitors(self, monitors):
         """Set monitor info from Qt screens."""
         self._monitors = monitors
+        self.monitorsChanged.emit()
+        # Grabbers cache monitor geometry; rebuild them for the new layout.
+        # Nothing to rebuild if nothing has been captured yet.
+        if "src.core.capture" in sys.modules:
+            _capture().get_capturer().invalidate()
     
-    @Property('QVariantList')
+    @Property('QVariantList', notify=monitorsChanged)
     def monitors(self):
-        """Get list of monitor geometries [{"x": 0, "y": 0, "width": 1920, "height": 1080}, ...]"""
+        """Get list of monitor geometries [{"x": 0, "y": 0, "width": 1920, "height": 1080, "scale": 1.0}, ...]"""
         return self._monitors
 
+    def loadHistory(self):
+        """Open the history database on the persistence thread (it may migrate or import), then list it."""
+        limit = self._config.get_history_limit()
+
+        def open_history():
+            try:
+                history.set_retention(limit)  # Opens the database and trims it to the limit
+            except Exception as e:
+                print(f"Error opening history: {e}")
+
+        self._persist(open_history, lambda _: self._reload_history())
+
+    def warmUpOcr(self):
+        """Pre-build the OCR client and cache index in the background so the first capture is fast."""
+        self._ocr_engine.warm_up_async()
+        if self._config.get_ocr_cache_enabled() and self._cache is None:
+            self._open_ocr_cache()
+
+    def frameProvider(self):
+        """Image provider for QML's image://frozen/ source."""
+        return self._frame_provider
+
+    def thumbnailProvider(self):
+        """Image provider for QML's image://thumbs/ source (history thumbnails)."""
+        return self._thumbnail_provider
+
+    @Property(str, notify=frozenFrameChanged)
+    def frozenFrameSource(self):
+        """QML image source of the frame grabbed at hotkey time ('' if none)."""
+        if self._frozen_frame is None:
+            return ""
+        return f"image://frozen/{self._frozen_frame_id}"
+
+    def _freeze_desktop(self):
+        """Grab the whole virtual desktop so the selection is cut from exactly what was on screen."""
+        self._frozen_frame = None
+        if self._config.get_freeze_frame_enabled():
+            try:
+                self._frozen_frame = _capture().get_capturer().grab_desktop()
+                self._frozen_frame_id += 1
+                print(f"Desktop frozen: {self._frozen_frame.size} in {self._frozen_frame.grab_ms:.1f}ms")
+            except Exception as e:
+                print(f"Freeze-frame grab failed, falling back to live capture: {e}")
+        self.frozenFrameChanged.emit()
+
+    def _logical_desktop(self):
+        """Bounding box of the monitors in Qt (logical) coordinates."""
+        if not self._monitors:
+            return None
+        left = min(m["x"] for m in self._monitors)
+        top = min(m["y"] for m in self._monitors)
+        right = max(m["x"] + m["width"] for m in self._monitors)
+        bottom = max(m["y"] + m["height"] for m in self._monitors)
+        return left, top, right - left, bottom - top
+
+    def _physical_screens(self, frame):
+        """
+        Each monitor's logical geometry with its scale and origin in the frozen frame's pixels.
+        
+        Qt keeps a screen's top-left in device pixels and scales only its size,
+        so on mixed-DPI setups every screen needs its own mapping. Returns None
+        if the screens' device-pixel layout does not line up with the frame
+        (e.g. where the platform scales positions too).
+        """
+        screens = []
+        for m in self._monitors:
+            scale = m.get("scale", 1.0) or 1.0
+            screens.append((m, scale, m["x"], m["y"], round(m["width"] * scale), round(m["height"] * scale)))
+        left = min(s[2] for s in screens)
+        top = min(s[3] for s in screens)
+        right = max(s[2] + s[4] for s in screens)
+        bottom = max(s[3] + s[5] for s in screens)
+        if (left, top, right - left, bottom - top) != (frame.left, frame.top, frame.width, frame.height):
+            return None
+        return screens
+
+    def _frame_box(self, frame, x, y, w, h):
+        """Map a logical selection to frame pixels (x, y, width, height)."""
+        screens = self._physical_screens(frame)
+        if screens is None:
+            # One scale for the whole desktop
+            left, top, width, height = self._logical_desktop()
+            sx, sy = frame.width / width, frame.height / height
+            return round((x - left) * sx), round((y - top) * sy), round(w * sx), round(h * sy)
+        # The screen holding the selection's center decides the scale
+        cx, cy = x + w / 2, y + h / 2
+        inside = [s for s in screens
+                  if s[0]["x"] <= cx < s[0]["x"] + s[0]["width"] and s[0]["y"] <= cy < s[0]["y"] + s[0]["height"]]
+        m, scale, px, py, _, _ = inside[0] if inside else screens[0]
+        return (round(px - frame.left + (x - m["x"]) * scale), round(py - frame.top + (y - m["y"]) * scale),
+                round(w * scale), round(h * scale))
+
+    def _grab_region(self, x, y, w, h):
+        """Return the selected region as a PIL image, from the frozen frame when there is one."""
+        frame = self._frozen_frame
+        if frame is not None and self._monitors:
+            # Overlay coordinates are logical pixels; the frame is in physical pixels
+            region = frame.crop(*self._frame_box(frame, x, y, w, h))
+            print(f"Cropped selection from frozen frame: {region.size}")
+            return region.to_image()
+        capture = _capture()
+        img = capture.capture_region(x, y, w, h)
+        timing = capture.get_capturer().last_timing
+        print(f"Image captured successfully: {img.size} "
+              f"(grab {timing['grab_ms']:.1f}ms, convert {timing['convert_ms']:.1f}ms)")
+        return img
+
+    def _release_frozen_frame(self):
+        if self._frozen_frame is not None:
+            self._frozen_frame = None
+            self.frozenFrameChanged.emit()
+
     @Slot()
     def triggerCapture(self):
         """Called by hotkey to show overlay."""
+        self._trace = tracing.Trace()
+        self._trace.mark(tracing.HOTKEY)
+        self._freeze_desktop()
         self.captureRequested.emit()
+        # Overlay selection takes a while; use it to warm the connection
+        self._ocr_engine.warm_up_async()
 
-    @Property('QVariantList', notify=historyChanged)
+    @Property(QObject, constant=True)
     def historyModel(self):
         return self._history
 
+    @Slot(str)
+    def markTraceStage(self, stage):
+        """Mark a pipeline stage observed in QML (e.g. 'overlay') on the current capture's trace."""
+        if self._trace is not None:
+            self._trace.mark(stage)
+
+    def _take_trace(self):
+        """Mark the selection release and hand the trace over to the capture being submitted."""
+        trace, self._trace = self._trace, None
+        if trace is None:
+            trace = tracing.Trace()  # Capture started without the hotkey
+        trace.mark(tracing.RELEASE)
+        return trace
+
     @Slot(int, int, int, int)
     def captureRegion(self, x, y, w, h):
+        """
+        Capture a region and queue it for OCR.
+        
+        Returns:
+            The OCR job id, or None if the capture failed
+        """
         print(f"Capturing region: {x}, {y}, {w}x{h}")
         # Removed blocking dialog
+        trace = self._take_trace()
         
         try:
-            img = capture.capture_region(x, y, w, h)
-            print(f"Image captured successfully: {img.size}")
+            img = self._grab_region(x, y, w, h)
+            self._release_frozen_frame()
+            trace.mark(tracing.CAPTURE)
+            return self._submit_capture(img, trace)
             
-            # Run OCR in background thread
+        except Exception as e:
+            self._release_frozen_frame()
+            error_msg = f"Capture error: {str(e)}\n\n{traceback.format_exc()}"
+            print(error_msg)
+            QMessageBox.critical(None, "Capture Error", error_msg)
+
+    def capture_screen_region(self, x, y, w, h):
+        """
+        Capture a region of the live screen for a script (used by the command channel).
+        
+        Unlike captureRegion this leaves the interactive capture alone (its
+        trace and frozen frame) and raises instead of showing a dialog.
+        
+        Returns:
+            The OCR job id
+        
+        Raises:
+            Exception: If the screen cannot be grabbed
+        """
+        print(f"Scripted capture of region: {x}, {y}, {w}x{h}")
+        trace = tracing.Trace()
+        img = _capture().capture_region(x, y, w, h)
+        trace.mark(tracing.CAPTURE)
+        return self._submit_capture(img, trace, scripted=True)
+
+    def ocr_file(self, path):
+        """
+        OCR an image file like a capture (used by the command channel).
+        
+        Returns:
+            The OCR job id
+        
+        Raises:
+            OSError: If the file cannot be read as an image
+        """
+        from PIL import Image
+        with Image.open(path) as img:
+            img.load()
+            image = img.convert("RGB")
+        print(f"OCR of file {path}: {image.size}")
+        trace = tracing.Trace()
+        trace.mark(tracing.CAPTURE)
+        return self._submit_capture(image, trace, source=path, scripted=True)
+
+    def _submit_capture(self, img, trace, source=None, scripted=False):
+        """
+        Queue one captured image for OCR, through the cache; returns the job id.
+        
+        Scripted captures neither supersede the user's OCR jobs nor are superseded by them.
+        """
+        self.captureStarted.emit()
+        
+        cache_key = None
+        cached = None
+        if self._config.get_ocr_cache_enabled():
+            cache_key = self._ocr_cache.image_key(img, self._ocr_engine.cache_variant)
+            cached = self._ocr_cache.get(cache_key)
+            self.cacheStatsChanged.emit()
+            if cached is not None:
+                print("OCR cache hit")
+        self._check_budget()
+        
+        # Run OCR on the job queue (cache hits complete immediately, still in order)
+        job_id = self._scheduler.submit(
+            img,
+            streaming=self._config.get_streaming_enabled(),
+            context={"cache_key": cache_key, "cached": cached is not None, "trace": trace,
+                     "image": img, "source": source},
+            cached_text=cached,
+            trace=trace,
+            supersede=not scripted,
+        )
+        print(f"OCR job {job_id} queued (depth {self._scheduler.queue_depth})")
+        return job_id
+
+    @Slot('QVariantList')
+    def captureRegions(self, regions):
+        """
+        Capture several regions and OCR them in a single batched request.
+        
+        Args:
+            regions: List of {x, y, width, height} in absolute screen coordinates
+        """
+        regions = [r for r in regions if r["width"] > 5 and r["height"] > 5]
+        if len(regions) <= 1:
+            if regions:
+                r = regions[0]
+                self.captureRegion(r["x"], r["y"], r["width"], r["height"])
+            else:
+                self.cancelCapture()
+            return
+        if self._config.get_region_join_order() == "reading":
+            regions = _capture().reading_order(regions)
+        print(f"Capturing {len(regions)} regions")
+        trace = self._take_trace()
+        trace.attributes["regions"] = len(regions)
+        
+        try:
+            images = [self._grab_region(r["x"], r["y"], r["width"], r["height"]) for r in regions]
+            self._release_frozen_frame()
+            trace.mark(tracing.CAPTURE)
             self.captureStarted.emit()
-            self.worker = Worker(img)
-            self.worker.finished.connect(self.on_ocr_finished)
-            self.worker.error.connect(self.on_ocr_error)
-            self.worker.start()
-            
+            self._check_budget()
+            job_id = self._scheduler.submit(images, context={"cache_key": None, "cached": False, "trace": trace},
+                                            trace=trace)
+            print(f"OCR job {job_id} queued with {len(images)} regions (depth {self._scheduler.queue_depth})")
         except Exception as e:
+            self._release_frozen_frame()
             error_msg = f"Capture error: {str(e)}\n\n{traceback.format_exc()}"
             print(error_msg)
             QMessageBox.critical(None, "Capture Error", error_msg)
 
-    def on_ocr_finished(self, text):
+    @Slot()
+    def cancelCapture(self):
+        """Called when the overlay is dismissed without a selection."""
+        self._trace = None
+        self._release_frozen_frame()
+
+    @staticmethod
+    def _call_metadata(report):
+        """History/trace summary of a remote call report (the per-request log only when retried or hedged)."""
+        if not report or "attempts" not in report:
+            return {}
+        summary = {key: report[key] for key in ("attempts", "hedged", "outcome", "elapsed_ms")}
+        if report["attempts"] > 1:
+            summary["requests"] = report["requests"]
+        return summary
+
+    def on_job_finished(self, job_id, text, context, report):
+        if context["cache_key"] is not None and not context["cached"]:
+            cache, key = self._ocr_cache, context["cache_key"]
+            usage = report.get("usage")
+            if usage:
+                # Stored under the backend that read it: a local fallback result is not served as Gemini's
+                key = key[:4] + (self._ocr_engine.result_variant(usage),)
+            self._persist(lambda: cache.put(key, text), lambda _: self.cacheStatsChanged.emit())
+        trace = context.get("trace")
+        call = self._call_metadata(report)
+        if trace is not None:
+            trace.attributes["cached"] = context["cached"]
+            if call:
+                trace.attributes["attempts"] = call["attempts"]
+        metadata = {"ocr": call} if call else {}
+        if context.get("rerun_of"):
+            metadata["rerunOf"] = context["rerun_of"]
+        if context.get("source"):
+            metadata["source"] = context["source"]
+        image_hash = context.get("image_hash", "")
+        if context.get("image") is not None:
+            # Kept only now that an entry will reference it; failed and cancelled captures leave nothing behind
+            image_hash = self._store_image(context["image"], context["cache_key"])
+        self.on_ocr_finished(text, trace, metadata or None, image_hash, report.get("usage"))
+        self.captureDone.emit(job_id, text, "")
+
+    def on_job_failed(self, job_id, err, context, report):
+        trace = context.get("trace")
+        if trace is not None and "attempts" in report:
+            trace.attributes["attempts"] = report["attempts"]
+        tracing.finish(trace, "error")
+        self.latencyChanged.emit()
+        self._record_usage(report.get("usage"))
+        self.on_ocr_error(err)
+        self.captureDone.emit(job_id, "", err)
+
+    def on_job_abandoned(self, job_id, report):
+        """Account the request of a job cancelled or superseded after it was sent."""
+        self._record_usage(report.get("usage"))
+
+    def _record_usage(self, usage):
+        """Account one OCR call that produced no entry and re-check the daily budget."""
+        if not usage:
+            return
+
+        def write():
+            history.record_usage(usage)
+            return history.tokens_used()
+
+        self._persist(write, self._on_usage_recorded)
+
+    def _on_usage_recorded(self, tokens_today):
+        self._tokens_today = tokens_today
+        self._check_budget()
+        self.usageChanged.emit()
+
+    def _billed_tokens_today(self):
+        """
+        Billed tokens today, kept in memory so captures never sum usage on the GUI thread.
+        
+        On first use and after midnight the total is read on the persistence
+        thread; until it arrives this returns None.
+        """
+        today = datetime.now().strftime("%Y-%m-%d")
+        if self._tokens_day != today:
+            self._tokens_day, self._tokens_today = today, None
+            self._persist(history.tokens_used, self._on_usage_recorded)
+        return self._tokens_today
+
+    def _persist(self, write, then=None):
+        """
+        Run a write on the persistence thread, then `then(result)` on the GUI thread.
+        
+        Each write gets its own key, so these are never coalesced and run in order.
+        """
+        self._writes += 1
+
+        def job():
+            result = write()
+            if then is not None:
+                self._persisted.emit(lambda: then(result))
+
+        persistence.get_worker().submit(f"write:{self._writes}", job)
+
+    @Slot(object)
+    def _on_persisted(self, callback):
+        callback()
+        self.ioStatsChanged.emit()
+
+    def _check_budget(self):
+        """Apply or lift the engine's budget settings according to today's billed tokens."""
+        if self._engine is None:
+            return
+        budget = self._config.get_daily_token_budget()
+        tokens_today = self._billed_tokens_today() if budget else 0
+        if tokens_today is None:
+            return  # Checked again once today's total has been read
+        over = bool(budget) and tokens_today >= budget
+        if over != self._engine.over_budget:
+            self._engine.set_over_budget(over)
+            self.usageChanged.emit()
+
+    @Property('QVariantList', notify=usageChanged)
+    def usageSummary(self):
+        """OCR usage per day and backend over the last week (requests, bytes, tokens, latency)."""
+        return history.usage_summary(7)
+
+    @Property('QVariantMap', notify=usageChanged)
+    def usageToday(self):
+        """Billed tokens today against the daily budget."""
+        return {
+            "tokens": self._billed_tokens_today() or 0,
+            "budget": self._config.get_daily_token_budget(),
+            "overBudget": self._engine is not None and self._engine.over_budget,
+        }
+
+    @Property(int, notify=usageChanged)
+    def dailyTokenBudget(self):
+        return self._config.get_daily_token_budget()
+
+    @Slot(int)
+    def setDailyTokenBudget(self, tokens):
+        """
+        Set the daily Gemini token budget.
+        
+        Args:
+            tokens: Prompt + response tokens per day, 0 for unlimited
+        """
+        self._config.set_daily_token_budget(tokens)
+        self._check_budget()
+        self.usageChanged.emit()
+
+    @Property(str, notify=usageChanged)
+    def budgetAction(self):
+        return self._config.get_budget_action()
+
+    @Slot(str)
+    def setBudgetAction(self, action):
+        """
+        Choose what happens once the budget is used up.
+        
+        Args:
+            action: 'cheaper' (budget model, smaller uploads) or 'local' (Tesseract only)
+        """
+        self._config.set_budget_action(action)
+        if self._engine is not None and self._engine.over_budget:
+            self._engine.configure(self._engine.remote.api_key, routing=self._engine.routing)
+        self.usageChanged.emit()
+
+    @Property(int, notify=queueDepthChanged)
+    def queueDepth(self):
+        """Number of OCR jobs queued or running."""
+        return self._scheduler.queue_depth
+
+    @Slot()
+    def cancelPendingOcr(self):
+        """Cancel all queued and running OCR jobs."""
+        self._scheduler.cancel_all()
+
+    def shutdown(self):
+        """Stop background work and write out everything still queued before the application quits."""
+        self.stopWatch()
+        self._scheduler.shutdown()
+        if self._images is not None:
+            self._images.flush()
+        if not persistence.flush(timeout=10):
+            print("Warning: some history or settings writes did not finish before quitting")
+        stats = persistence.get_io_stats().summary()
+        print(f"GUI thread blocked on disk I/O: {stats['totalMs']:.0f} ms in {stats['calls']} call(s), "
+              f"longest {stats['maxMs']:.0f} ms")
+
+    @Property('QVariantMap', notify=ioStatsChanged)
+    def ioStats(self):
+        """Time the GUI thread spent blocked on disk I/O (totals and per kind of access, in ms)."""
+        return persistence.get_io_stats().summary()
+
+    @Property('QVariantList', notify=latencyChanged)
+    def latencySummary(self):
+        """Per-stage p50/p95/p99 durations (ms) over recent captures."""
+        return tracing.get_buffer().summary()
+
+    @Slot(result=str)
+    def exportLatencyTraces(self):
+        """Write recent traces and their summary to a JSON file and return its path."""
+        path = os.path.join(history.DATA_DIR, "latency-traces.json")
+        try:
+            with persistence.gui_io("traces"):
+                return tracing.get_buffer().export(path)
+        except OSError as e:
+            print(f"Error exporting traces: {e}")
+            return ""
+
+    @Slot()
+    def clearLatencyTraces(self):
+        tracing.get_buffer().clear()
+        self.latencyChanged.emit()
+
+    @Property('QVariantMap', notify=cacheStatsChanged)
+    def cacheStats(self):
+        """OCR cache hit/miss counters and sizes."""
+        return self._ocr_cache.stats()
+
+    @Slot()
+    def clearOcrCache(self):
+        # Up to max_disk_entries files to delete; done on the persistence thread
+        self._persist(self._ocr_cache.clear, lambda _: self.cacheStatsChanged.emit())
+
+    def on_ocr_chunk(self, job_id, piece):
+        if job_id != self._streamed_job:
+            self._streamed_job = job_id
+            self._streamed_text = ""
+        self._streamed_text += piece
+        if self._config.get_progressive_clipboard():
+            clipboard.copy_to_clipboard(self._streamed_text)
+        self.ocrChunk.emit(piece)
+
+    def on_ocr_finished(self, text, trace=None, metadata=None, image_hash="", usage=None):
         print(f"OCR Finished: {text[:100]}...")
+        self._last_result = {"text": text, "timestamp": history.format_timestamp(datetime.now())}
         clipboard.copy_to_clipboard(text)
-        history.add_entry(text)
-        self._history = history.load_history()
-        self.historyChanged.emit()
-        self.ocrSuccess.emit(text)
+        if trace is not None:
+            trace.mark(tracing.CLIPBOARD)
         # Removed blocking success dialog
+        self.ocrSuccess.emit(text)
+
+        # The toast is up; the entry (and the call's usage) are written off the GUI thread
+        self._store_entry(text, trace, metadata, image_hash, usage)
+
+    def _store_entry(self, text, trace=None, metadata=None, image_hash="", usage=None, also=None):
+        """
+        Add a history entry and record the call's usage on the persistence thread.
+        
+        Args:
+            also: Extra write run with the stored entry, on the same thread
+        """
+        def write():
+            entry = history.add_entry(text, metadata, image_hash)
+            if trace is not None:
+                trace.mark(tracing.HISTORY)
+            # Images of entries dropped by the history limit (kept even if the store was disabled since)
+            released = history.released_images()
+            if released:
+                self._image_store.discard(released)
+            if also is not None:
+                also(entry)
+            if not usage:
+                return entry, None
+            history.record_usage(usage, entry.get("id"))
+            return entry, history.tokens_used()
+
+        self._persist(write, lambda result: self._on_entry_stored(trace, *result))
+
+    def _on_entry_stored(self, trace, entry, tokens_today):
+        if trace is not None:
+            tracing.finish(trace)
+            self.latencyChanged.emit()
+        self._history.prepend(entry)
+        self.historyChanged.emit()
+        if tokens_today is not None:
+            self._on_usage_recorded(tokens_today)
+
+    def last_result(self):
+        """Latest OCR result as {text, timestamp}: this session's, else the newest history entry."""
+        if self._last_result is not None:
+            return dict(self._last_result)
+        entries = history.load_history(1)
+        if entries:
+            return {"text": entries[0]["text"], "timestamp": entries[0]["timestamp"]}
+        return {"text": "", "timestamp": ""}
 
     def on_ocr_error(self, err):
         error_msg = f"OCR Error: {err}"
         print(error_msg)
-        QMessageBox.critical(None, "OCR Error", error_msg)
+        # A toast rather than a modal dialog: transient failures should not block the next capture
+        self.ocrError.emit(str(err))
 
     @Slot(int)
     def copyHistoryItem(self, index):
-        if 0 <= index < len(self._history):
-            text = self._history[index]['text']
+        if 0 <= index < self._history.rowCount():
+            text = self._history.textAt(index)
             clipboard.copy_to_clipboard(text)
             print("Copied from history")
 
+    @Slot(int)
+    def rerunOcr(self, index):
+        """
+        Run OCR again on the stored image of a history item; the result is added as a new entry.
+        
+        Args:
+            index: Row in the history list
+        """
+        entry_id = self._history.entryIdAt(index)
+        store = self._image_store
+        # Skip the cache lookup (the cached text is what is being redone) but refresh it with the new result
+        cache = self._ocr_cache if self._config.get_ocr_cache_enabled() else None
+        variant = self._ocr_engine.cache_variant
+
+        def load():
+            # Reading and decoding a full-size capture; done on the persistence thread
+            entry = history.get_entry(entry_id)
+            image = store.get(entry["imageHash"]) if entry and entry["imageHash"] else None
+            cache_key = cache.image_key(image, variant) if cache is not None and image is not None else None
+            return entry, image, cache_key
+
+        self._persist(load, lambda result: self._submit_rerun(*result))
+
+    def _submit_rerun(self, entry, image, cache_key):
+        if image is None:
+            self.ocrError.emit("The captured image for this entry is no longer stored")
+            return
+        self.captureStarted.emit()
+        self._check_budget()
+        job_id = self._scheduler.submit(
+            image,
+            streaming=self._config.get_streaming_enabled(),
+            context={"cache_key": cache_key, "cached": False, "trace": None,
+                     "image_hash": entry["imageHash"], "rerun_of": entry["id"]},
+        )
+        print(f"Re-running OCR for history entry {entry['id']} as job {job_id}")
+
+    @Slot(str)
+    def searchHistory(self, query):
+        """
+        Filter the history list by a full-text query (empty shows recent captures).
+        
+        Args:
+            query: Words (prefix matched) and/or "quoted phrases"
+        """
+        self._history.set_query(query)
+
+    # -- region watch --------------------------------------------------------------
+
+    @Slot()
+    def requestWatchRegion(self):
+        """Show the overlay to pick a region to watch (over the live desktop, not a frozen frame)."""
+        self._trace = None
+        self._release_frozen_frame()
+        self.watchRegionRequested.emit()
+
+    @Slot(int, int, int, int)
+    def startWatch(self, x, y, w, h):
+        """
+        Re-capture a region on an interval and OCR it whenever its content changes.
+        
+        New text is added to history (and appended to the watch output file,
+        if set) only when it differs from the last text read from the region.
+        """
+        self.stopWatch()
+        if w <= 5 or h <= 5:
+            return
+        from src.core import watch
+        if self._watch_scheduler is None:
+            self._watch_scheduler = OcrScheduler(lambda: self._ocr_engine, max_concurrency=1, supersede=False,
+                                                 parent=self)
+            self._watch_scheduler.resultReady.connect(self.on_watch_finished)
+            self._watch_scheduler.jobFailed.connect(self.on_watch_failed)
+            self._watch_scheduler.cancelledReport.connect(self.on_job_abandoned)
+        options = watch.WatchOptions(
+            interval=self._config.get_watch_interval(),
+            change_threshold=self._config.get_watch_change_threshold(),
+            debounce=self._config.get_watch_debounce(),
+        )
+        self._watch_session += 1
+        session = self._watch_session
+        self._watch_text = None
+        self._watch_entries = 0
+        self._watcher = watch.RegionWatcher((x, y, w, h), lambda image: self._watchFrame.emit(session, image),
+                                            options)
+        self._watcher.start()
+        print(f"Watching region {x}, {y}, {w}x{h} every {options.interval:.1f}s")
+        self.watchChanged.emit()
+
+    @Slot()
+    def stopWatch(self):
+        if self._watcher is None:
+            return
+        self._watcher.stop()
+        stats = self._watcher.stats
+        print(f"Stopped watching: OCRed {stats['changes']} of {stats['frames']} frame(s), "
+              f"{self._watch_entries} new text(s)")
+        self._watcher = None
+        self._watch_pending = None
+        self._watch_job = None
+        self._watch_scheduler.cancel_all()
+        self.watchChanged.emit()
+
+    @Property('QVariantMap', notify=watchChanged)
+    def watchStatus(self):
+        """Whether a region is watched, its geometry, and frames captured / OCRed / recorded."""
+        if self._watcher is None:
+            return {"active": False}
+        x, y, w, h = self._watcher.region
+        stats = self._watcher.stats
+        return {
+            "active": True,
+            "x": x, "y": y, "width": w, "height": h,
+            "frames": stats["frames"],
+            "changes": stats["changes"],
+            "entries": self._watch_entries,
+            "busy": self._watch_job is not None,
+        }
+
+    @Slot(int, object)
+    def _on_watch_frame(self, session, image):
+        if session != self._watch_session or self._watcher is None:
+            return  # From a watch that has since been stopped
+        if self._watch_job is not None:
+            self._watch_pending = image  # Only the newest frame is worth reading next
+            return
+        self._submit_watch(image)
+
+    def _submit_watch(self, image):
+        self._check_budget()
+        self._watch_job = self._watch_scheduler.submit(image, context={"image": image,
+                                                                       "region": list(self._watcher.region)})
+        self.watchChanged.emit()
+
+    def _next_watch(self):
+        self._watch_job = None
+        image, self._watch_pending = self._watch_pending, None
+        if image is not None and self._watcher is not None:
+            self._submit_watch(image)
+        else:
+            self.watchChanged.emit()
+
+    def on_watch_finished(self, job_id, text, context, report):
+        usage = report.get("usage")
+        text = text.strip()
+        if not text or " ".join(text.split()) == " ".join((self._watch_text or "").split()):
+            self._record_usage(usage)  # Same text as before: no new entry
+            self._next_watch()
+            return
+        self._watch_text = text
+        self._watch_entries += 1
+        metadata = {"watch": {"region": context["region"]}}
+        call = self._call_metadata(report)
+        if call:
+            metadata["ocr"] = call
+        path = self._config.get_watch_output_file()
+
+        def append(entry):
+            from src.core import watch
+            watch.append_to_file(path, text, entry["timestamp"])
+
+        self._store_entry(text, None, metadata, self._store_image(context["image"]), usage,
+                          also=append if path else None)
+        self.watchTextChanged.emit(text)
+        self._next_watch()
+
+    def on_watch_failed(self, job_id, err, context, report):
+        self._record_usage(report.get("usage"))
+        self.on_ocr_error(err)
+        self._next_watch()
+
+    @Property(int, notify=watchChanged)
+    def watchIntervalMs(self):
+        return round(self._config.get_watch_interval() * 1000)
+
+    @Slot(int)
+    def setWatchIntervalMs(self, ms):
+        """
+        Set how often a watched region is re-captured (applies to the next watch).
+        
+        Args:
+            ms: Interval in milliseconds
+        """
+        self._config.set_watch_interval(ms / 1000)
+        self.watchChanged.emit()
+
+    @Property(str, notify=watchChanged)
+    def watchOutputFile(self):
+        return self._config.get_watch_output_file()
+
+    @Slot(str)
+    def setWatchOutputFile(self, path):
+        """
+        Append text read from watched regions to a file as well as history.
+        
+        Args:
+            path: Text file path (~ is expanded), empty to disable
+        """
+        self._config.set_watch_output_file(path.strip())
+        self.watchChanged.emit()
+
     @Slot()
     def clearHistory(self):
-        history.clear_history()
-        self._history = []
+        # Also when the store is disabled now: images kept earlier must not outlive their entries
+        store = self._image_store
+
+        def write():
+            history.clear_history()
+            store.clear()
+
+        self._persist(write, lambda _: self._reload_history())
+
+    def _reload_history(self):
+        self._history.reload()
         self.historyChanged.emit()
     
     @Property(str, notify=hotkeyChanged)
@@ -136,6 +968,33 @@ class Controller(QObject):
             api_key: The API key to store
         """
         self._config.set_api_key(api_key.strip())
+        self._ocr_engine.configure(api_key.strip(), self._config.get_model_name())
+        self._ocr_engine.warm_up_async()
+    
+    @Property(str, notify=ocrRoutingChanged)
+    def ocrRouting(self):
+        """Get the OCR routing policy ('remote', 'local', 'auto', 'fallback')."""
+        if self._engine is None:
+            return self._config.get_ocr_routing()
+        return self._engine.routing
+    
+    @Slot(str)
+    def setOcrRouting(self, routing: str):
+        """
+        Select which OCR backend(s) handle captures.
+        
+        Args:
+            routing: 'remote', 'local', 'auto' or 'fallback'
+        """
+        self._config.set_ocr_routing(routing)
+        self._ocr_engine.configure(routing=routing)
+        self.ocrRoutingChanged.emit(self._ocr_engine.routing)
+        self._ocr_engine.warm_up_async()
+    
+    @Property(bool, constant=True)
+    def localOcrAvailable(self):
+        """Whether the local Tesseract engine is installed."""
+        return self._ocr_engine.local.is_available()
     
     @Property(bool, notify=autostartChanged)
     def autostartEnabled(self):
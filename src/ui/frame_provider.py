@@ -0,0 +1,34 @@
+"""Image provider that shows the frozen desktop frame behind the selection overlay."""
+
+from PySide6.QtGui import QImage
+from PySide6.QtQuick import QQuickImageProvider
+
+
+class FrozenFrameProvider(QQuickImageProvider):
+    """
+    Serves `image://frozen/<id>` from the frame grabbed at hotkey time.
+
+    The id only busts QML's cache; the provider always returns the current frame.
+    """
+
+    def __init__(self, frame_getter):
+        """
+        Args:
+            frame_getter: Callable returning the current capture.Frame or None
+        """
+        super().__init__(QQuickImageProvider.ImageType.Image)
+        self._frame_getter = frame_getter
+
+    def requestImage(self, image_id, size, requested_size):
+        frame = self._frame_getter()
+        if frame is None:
+            return QImage()
+        # Format_RGB32 is BGRA byte order on little-endian machines, matching the grab.
+        # Copy so QML owns its pixels independently of the frame's lifetime.
+        image = QImage(frame.raw, frame.width, frame.height, frame.width * 4, QImage.Format.Format_RGB32).copy()
+        if size is not None:
+            size.setWidth(image.width())
+            size.setHeight(image.height())
+        if requested_size.isValid() and requested_size.width() > 0 and requested_size.height() > 0:
+            image = image.scaled(requested_size)
+        return image
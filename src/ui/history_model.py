@@ -0,0 +1,157 @@
+"""Incremental list model exposing OCR history to QML."""
+
+from typing import Dict, List
+
+from PySide6.QtCore import QAbstractListModel, QByteArray, QModelIndex, Qt, Signal, Slot, Property
+
+from src.core import history
+
+
+class HistoryListModel(QAbstractListModel):
+    """
+    Paged, role-based view of the history store.
+
+    Rows hold only id, timestamp and snippet; the full text is fetched from
+    the store the first time the `text` role is read. New captures are
+    inserted at the top with row notifications instead of a full reset, and
+    older pages are loaded through canFetchMore()/fetchMore(). The model
+    starts empty; opening the store may migrate it, so the owner calls
+    reload() once that has been done off the GUI thread.
+    """
+
+    IdRole = Qt.UserRole + 1
+    TimestampRole = Qt.UserRole + 2
+    SnippetRole = Qt.UserRole + 3
+    TextRole = Qt.UserRole + 4
+    ThumbnailRole = Qt.UserRole + 5
+
+    countChanged = Signal()
+    queryChanged = Signal()
+
+    def __init__(self, page_size: int = history.PAGE_SIZE, parent=None):
+        super().__init__(parent)
+        self._page_size = page_size
+        self._rows: List[Dict] = []
+        self._query = ""
+        self._exhausted = True  # Nothing to fetch until reload()
+
+    # -- QAbstractListModel ---------------------------------------------------
+
+    def roleNames(self):
+        return {
+            self.IdRole: QByteArray(b"entryId"),
+            self.TimestampRole: QByteArray(b"timestamp"),
+            self.SnippetRole: QByteArray(b"snippet"),
+            self.TextRole: QByteArray(b"text"),
+            self.ThumbnailRole: QByteArray(b"thumbnail"),
+        }
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or not 0 <= index.row() < len(self._rows):
+            return None
+        row = self._rows[index.row()]
+        if role == self.IdRole:
+            return row["id"]
+        if role == self.TimestampRole:
+            return row["timestamp"]
+        if role in (self.SnippetRole, Qt.DisplayRole):
+            return row["snippet"]
+        if role == self.TextRole:
+            return self._text(row)
+        if role == self.ThumbnailRole:
+            digest = row.get("imageHash")
+            return f"image://thumbs/{digest}" if digest else ""
+        return None
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self._exhausted
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self._exhausted:
+            return
+        page = self._load(self._page_size, len(self._rows))
+        if len(page) < self._page_size:
+            self._exhausted = True
+        if not page:
+            return
+        first = len(self._rows)
+        self.beginInsertRows(QModelIndex(), first, first + len(page) - 1)
+        self._rows.extend(page)
+        self.endInsertRows()
+        self.countChanged.emit()
+
+    # -- API used by Controller / QML -------------------------------------------
+
+    @Property(int, notify=countChanged)
+    def count(self):
+        return len(self._rows)
+
+    @Property(str, notify=queryChanged)
+    def query(self):
+        return self._query
+
+    @Slot(int, result=str)
+    def textAt(self, row: int) -> str:
+        """Full text of a row, loaded lazily from the store."""
+        if 0 <= row < len(self._rows):
+            return self._text(self._rows[row])
+        return ""
+
+    @Slot(int, result=int)
+    def entryIdAt(self, row: int) -> int:
+        """History id of a row (-1 if out of range)."""
+        if 0 <= row < len(self._rows):
+            return self._rows[row]["id"]
+        return -1
+
+    def prepend(self, entry: Dict):
+        """Show a newly added entry at the top (ignored while a search is active)."""
+        if "id" not in entry:
+            return  # The entry could not be stored
+        if self._query:
+            self.set_query(self._query)
+            return
+        self.beginInsertRows(QModelIndex(), 0, 0)
+        self._rows.insert(0, entry)
+        self.endInsertRows()
+        limit = history.get_retention()
+        if limit:
+            # Drop the rows the store trimmed when this entry was added (ids only grow)
+            kept = next((i for i, row in enumerate(self._rows) if row["id"] <= entry["id"] - limit),
+                        len(self._rows))
+            if kept < len(self._rows):
+                self.beginRemoveRows(QModelIndex(), kept, len(self._rows) - 1)
+                del self._rows[kept:]
+                self.endRemoveRows()
+        self.countChanged.emit()
+
+    def set_query(self, query: str):
+        """Switch between recent history (empty query) and full-text search results."""
+        self._query = query.strip()
+        self.reload()
+        self.queryChanged.emit()
+
+    def reload(self):
+        """Drop all rows and load the first page again."""
+        self.beginResetModel()
+        self._rows = []
+        self._exhausted = False
+        self.endResetModel()
+        self.fetchMore(QModelIndex())
+        self.countChanged.emit()
+
+    # -- internals ----------------------------------------------------------------
+
+    def _load(self, limit: int, offset: int) -> List[Dict]:
+        if self._query:
+            return history.search(self._query, limit, offset, with_text=False)
+        return history.load_history(limit, offset, with_text=False)
+
+    @staticmethod
+    def _text(row: Dict) -> str:
+        if "text" not in row:
+            row["text"] = history.get_text(row["id"])
+        return row["text"]
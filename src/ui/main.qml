@@ -40,14 +40,25 @@ ApplicationWindow {
 
     // Processing state
     property bool isProcessing: false
+    property bool streamStarted: false
 
     Connections {
         target: bridge
         function onCaptureStarted() {
             isProcessing = true
+            streamStarted = false
+        }
+        function onOcrChunk(piece) {
+            // Show streamed text as it arrives
+            if (!streamStarted) {
+                streamStarted = true
+                capturedTextArea.text = ""
+            }
+            capturedTextArea.insert(capturedTextArea.length, piece)
         }
         function onOcrSuccess(text) {
-            isProcessing = false
+            isProcessing = bridge.queueDepth > 0
+            streamStarted = false  // The next queued job's chunks replace this result
             showSuccessToast()
             // Populate and select text in the new text box
             capturedTextArea.text = text
@@ -58,6 +69,63 @@ ApplicationWindow {
             window.raise()
             window.requestActivate()
         }
+        function onOcrError(message) {
+            isProcessing = bridge.queueDepth > 0
+            streamStarted = false
+            showErrorToast(message)
+        }
+    }
+
+    // Error Toast (non-blocking; click to dismiss)
+    Rectangle {
+        id: errorToast
+        anchors.horizontalCenter: parent.horizontalCenter
+        anchors.bottom: parent.bottom
+        anchors.bottomMargin: 24
+        width: Math.min(parent.width - 48, errorLabel.implicitWidth + 40)
+        height: errorLabel.implicitHeight + 24
+        radius: 12
+        color: "#c62828"  // Error red
+        visible: false
+        z: 1001
+
+        layer.enabled: true
+        layer.effect: DropShadow {
+            horizontalOffset: 0
+            verticalOffset: 2
+            radius: 8
+            samples: 16
+            color: Qt.rgba(0, 0, 0, 0.2)
+        }
+
+        Label {
+            id: errorLabel
+            anchors.centerIn: parent
+            width: Math.min(implicitWidth, errorToast.parent.width - 88)
+            color: "white"
+            font.pixelSize: 13
+            wrapMode: Text.Wrap
+            maximumLineCount: 4
+            elide: Text.ElideRight
+        }
+
+        MouseArea {
+            anchors.fill: parent
+            onClicked: errorToast.visible = false
+        }
+
+        Timer {
+            id: errorToastTimer
+            interval: 6000
+            onTriggered: errorToast.visible = false
+        }
+    }
+
+    function showErrorToast(message) {
+        errorLabel.text = "OCR failed: " + message
+        successToast.visible = false
+        errorToast.visible = true
+        errorToastTimer.restart()
     }
 
     // Success Toast
@@ -126,6 +194,12 @@ ApplicationWindow {
         }
     }
 
+    // Latency debug pane (Ctrl+Shift+L)
+    Shortcut {
+        sequence: "Ctrl+Shift+L"
+        onActivated: latencyPane.visible = !latencyPane.visible
+    }
+
     function showSuccessToast() {
         successToast.visible = true
         successToast.opacity = 0
@@ -192,7 +266,7 @@ ApplicationWindow {
         Button {
             Layout.fillWidth: true
             Layout.preferredHeight: 48  // Reduced from 56
-            text: isProcessing ? "Processing..." : "Capture Text"
+            text: isProcessing ? (bridge.queueDepth > 1 ? "Processing (" + bridge.queueDepth + ")..." : "Processing...") : "Capture Text"
             enabled: !isProcessing
             scale: down ? 0.98 : 1.0
             
@@ -293,6 +367,46 @@ ApplicationWindow {
             }
         }
 
+        // Region watch: re-read a region whenever its content changes
+        RowLayout {
+            Layout.fillWidth: true
+            spacing: 8
+
+            Rectangle {
+                visible: bridge.watchStatus.active
+                width: 8
+                height: 8
+                radius: 4
+                color: "#00AAFF"
+
+                SequentialAnimation on opacity {
+                    running: bridge.watchStatus.active
+                    loops: Animation.Infinite
+                    NumberAnimation { to: 0.3; duration: 700 }
+                    NumberAnimation { to: 1.0; duration: 700 }
+                }
+            }
+
+            Label {
+                property var watch: bridge.watchStatus
+                text: watch.active
+                      ? "Watching " + watch.width + "×" + watch.height + ": " + watch.entries + " new text(s), "
+                        + watch.changes + " of " + watch.frames + " frames read"
+                      : "Watch a region to capture its text whenever it changes"
+                font.pixelSize: 12
+                color: secondaryText
+                elide: Text.ElideRight
+                Layout.fillWidth: true
+            }
+
+            Button {
+                text: bridge.watchStatus.active ? "Stop" : "Watch Region"
+                flat: true
+                font.pixelSize: 12
+                onClicked: bridge.watchStatus.active ? bridge.stopWatch() : bridge.requestWatchRegion()
+            }
+        }
+
         // History Section
         ColumnLayout {
             Layout.fillWidth: true
@@ -332,6 +446,26 @@ ApplicationWindow {
                 }
             }
 
+            // Search box
+            TextField {
+                id: searchField
+                Layout.fillWidth: true
+                placeholderText: "Search history..."
+                color: surfaceTextColor
+                placeholderTextColor: secondaryText
+                font.pixelSize: 13
+                selectByMouse: true
+
+                onTextChanged: bridge.searchHistory(text)
+
+                background: Rectangle {
+                    color: surfaceVariant
+                    border.color: searchField.activeFocus ? primaryColor : outlineColor
+                    border.width: 1
+                    radius: 6
+                }
+            }
+
             // History Card (Top Half)
             Rectangle {
                 Layout.fillWidth: true
@@ -368,7 +502,7 @@ ApplicationWindow {
                         visible: historyList.count === 0
                         anchors.centerIn: parent
                         anchors.verticalCenterOffset: -20
-                        text: "No captures yet"
+                        text: searchField.text.length > 0 ? "No matches" : "No captures yet"
                         color: secondaryText
                         font.pixelSize: 14
                         horizontalAlignment: Text.AlignHCenter
@@ -392,8 +526,20 @@ ApplicationWindow {
                                 anchors.rightMargin: 8
                                 spacing: 8
 
+                                // Thumbnail of the captured region, loaded off the GUI thread
+                                Image {
+                                    visible: model.thumbnail !== ""
+                                    source: model.thumbnail
+                                    asynchronous: true
+                                    fillMode: Image.PreserveAspectFit
+                                    sourceSize.width: 96
+                                    sourceSize.height: 54
+                                    Layout.preferredWidth: 48
+                                    Layout.preferredHeight: 32
+                                }
+
                                 Text {
-                                    text: modelData.snippet
+                                    text: model.snippet
                                     font.pixelSize: 13
                                     elide: Text.ElideRight
                                     Layout.fillWidth: true
@@ -402,7 +548,7 @@ ApplicationWindow {
                                 }
                                 
                                 Text {
-                                    text: modelData.timestamp
+                                    text: model.timestamp
                                     font.pixelSize: 11
                                     color: secondaryText
                                 }
@@ -413,16 +559,38 @@ ApplicationWindow {
                                 anchors.fill: parent
                                 hoverEnabled: true
                                 cursorShape: Qt.PointingHandCursor
+                                acceptedButtons: Qt.LeftButton | Qt.RightButton
                                 
-                                onClicked: {
+                                onClicked: (mouse) => {
+                                    if (mouse.button === Qt.RightButton) {
+                                        itemMenu.popup()
+                                        return
+                                    }
                                     bridge.copyHistoryItem(index)
                                     // Also populate the text box
-                                    capturedTextArea.text = modelData.text
+                                    capturedTextArea.text = model.text
                                     capturedTextArea.selectAll()
                                     capturedTextArea.forceActiveFocus()
                                     showSuccessToast()
                                 }
                             }
+
+                            Menu {
+                                id: itemMenu
+
+                                MenuItem {
+                                    text: "Copy"
+                                    onTriggered: {
+                                        bridge.copyHistoryItem(index)
+                                        showSuccessToast()
+                                    }
+                                }
+                                MenuItem {
+                                    text: "Re-run OCR"
+                                    enabled: model.thumbnail !== ""
+                                    onTriggered: bridge.rerunOcr(index)
+                                }
+                            }
                         }
                     }
                 }
@@ -507,12 +675,100 @@ ApplicationWindow {
 
             // Helpful hint
             Label {
-                text: "Click any item to copy again"
+                text: "Click an item to copy it again, right-click to re-run OCR"
                 font.pixelSize: 12
                 color: secondaryText
                 Layout.alignment: Qt.AlignHCenter
                 visible: historyList.count > 0
             }
+
+            // Latency debug pane: per-stage percentiles of recent captures
+            Rectangle {
+                id: latencyPane
+                Layout.fillWidth: true
+                Layout.preferredHeight: latencyColumn.implicitHeight + 16
+                visible: false
+                color: surfaceVariant
+                radius: 8
+
+                ColumnLayout {
+                    id: latencyColumn
+                    anchors.fill: parent
+                    anchors.margins: 8
+                    spacing: 2
+
+                    RowLayout {
+                        Layout.fillWidth: true
+
+                        Label {
+                            text: "Latency (ms)"
+                            font.pixelSize: 12
+                            font.weight: Font.Medium
+                            color: secondaryText
+                            font.capitalization: Font.AllUppercase
+                            Layout.fillWidth: true
+                        }
+
+                        Button {
+                            text: "Export"
+                            flat: true
+                            font.pixelSize: 11
+                            onClicked: {
+                                var path = bridge.exportLatencyTraces()
+                                latencyStatus.text = path ? "Saved to " + path : "Export failed"
+                            }
+                        }
+
+                        Button {
+                            text: "Reset"
+                            flat: true
+                            font.pixelSize: 11
+                            onClicked: bridge.clearLatencyTraces()
+                        }
+                    }
+
+                    Repeater {
+                        model: [{ stage: "stage", count: "n", p50: "p50", p95: "p95", p99: "p99" }].concat(bridge.latencySummary)
+
+                        delegate: RowLayout {
+                            Layout.fillWidth: true
+                            spacing: 8
+
+                            Text { text: modelData.stage; color: surfaceTextColor; font.pixelSize: 11; font.family: "Monospace"; Layout.fillWidth: true }
+                            Text { text: modelData.count; color: secondaryText; font.pixelSize: 11; font.family: "Monospace"; Layout.preferredWidth: 36; horizontalAlignment: Text.AlignRight }
+                            Text { text: modelData.p50; color: surfaceTextColor; font.pixelSize: 11; font.family: "Monospace"; Layout.preferredWidth: 56; horizontalAlignment: Text.AlignRight }
+                            Text { text: modelData.p95; color: surfaceTextColor; font.pixelSize: 11; font.family: "Monospace"; Layout.preferredWidth: 56; horizontalAlignment: Text.AlignRight }
+                            Text { text: modelData.p99; color: surfaceTextColor; font.pixelSize: 11; font.family: "Monospace"; Layout.preferredWidth: 56; horizontalAlignment: Text.AlignRight }
+                        }
+                    }
+
+                    Label {
+                        visible: bridge.latencySummary.length === 0
+                        text: "No captures traced yet"
+                        color: secondaryText
+                        font.pixelSize: 11
+                    }
+
+                    Label {
+                        // Disk reads and writes still done on the GUI thread (history paging, search, ...)
+                        text: "UI blocked on disk I/O: " + bridge.ioStats.totalMs.toFixed(0) + " ms in "
+                              + bridge.ioStats.calls + " call(s), longest " + bridge.ioStats.maxMs.toFixed(0) + " ms"
+                        color: secondaryText
+                        font.pixelSize: 10
+                        Layout.fillWidth: true
+                        elide: Text.ElideRight
+                    }
+
+                    Label {
+                        id: latencyStatus
+                        visible: text.length > 0
+                        color: secondaryText
+                        font.pixelSize: 10
+                        elide: Text.ElideMiddle
+                        Layout.fillWidth: true
+                    }
+                }
+            }
         }
 
 
@@ -8,8 +8,10 @@ Window {
     // Frameless, StayOnTop, BypassWindowManager (for X11 overlay)
     flags: Qt.FramelessWindowHint | Qt.WindowStaysOnTopHint | Qt.X11BypassWindowManagerHint
     
-    // Cover entire virtual desktop (all monitors)
-    Component.onCompleted: {
+    // Cover entire virtual desktop (all monitors), again whenever the layout changes
+    Component.onCompleted: updateGeometry()
+
+    function updateGeometry() {
         // Get virtual desktop bounds
         var minX = 0, minY = 0, maxX = 0, maxY = 0;
         var monitors = bridge.monitors;
@@ -46,16 +48,77 @@ Window {
     property int startX: 0
     property int startY: 0
     property bool selecting: false
+    // Regions collected with Shift held (multi-region mode), absolute screen coordinates
+    property var regions: []
+    // Report the first frame presented after the hotkey to the latency trace
+    property bool overlayShownPending: false
+    // Picking a region to watch rather than to capture once
+    property bool watchMode: false
+
+    onFrameSwapped: {
+        if (overlay.overlayShownPending) {
+            overlay.overlayShownPending = false
+            bridge.markTraceStage("overlay")
+        }
+    }
+
+    function closeOverlay() {
+        overlay.selecting = false
+        overlay.visible = false
+        overlay.regions = []
+        overlay.watchMode = false
+    }
+
+    function commitRegions() {
+        var selected = overlay.regions
+        var watching = overlay.watchMode
+        overlay.closeOverlay()
+        if (watching) {
+            // A watch follows a single region
+            if (selected.length > 0) {
+                bridge.startWatch(selected[0].x, selected[0].y, selected[0].width, selected[0].height)
+            }
+        } else if (selected.length > 1) {
+            bridge.captureRegions(selected)
+        } else if (selected.length === 1) {
+            bridge.captureRegion(selected[0].x, selected[0].y, selected[0].width, selected[0].height)
+        } else {
+            bridge.cancelCapture()
+        }
+    }
 
     Connections {
         target: bridge
         function onCaptureRequested() {
+            overlay.overlayShownPending = true
             overlay.visible = true
             overlay.selecting = false
             overlay.startX = 0
             overlay.startY = 0
+            overlay.regions = []
+            overlay.watchMode = false
+            overlay.requestActivate()
+        }
+        function onWatchRegionRequested() {
+            overlay.visible = true
+            overlay.selecting = false
+            overlay.regions = []
+            overlay.watchMode = true
             overlay.requestActivate()
         }
+        function onMonitorsChanged() {
+            overlay.updateGeometry()
+        }
+    }
+
+    // Desktop as it was when the hotkey fired; the selection is cut from this frame
+    Image {
+        anchors.fill: parent
+        source: bridge.frozenFrameSource
+        visible: source != ""
+        cache: false
+        smooth: false
+        fillMode: Image.Stretch
     }
 
     // Dim background
@@ -64,6 +127,49 @@ Window {
         color: "#40000000" // Semi-transparent black
     }
 
+    // Regions already added in multi-region mode
+    Repeater {
+        model: overlay.regions
+        delegate: Rectangle {
+            x: modelData.x - overlay.x
+            y: modelData.y - overlay.y
+            width: modelData.width
+            height: modelData.height
+            color: "#20FFFFFF"
+            border.color: "#00AAFF"
+            border.width: 2
+
+            Text {
+                anchors.left: parent.left
+                anchors.top: parent.top
+                anchors.margins: 4
+                text: index + 1
+                color: "#00AAFF"
+                font.pixelSize: 14
+                font.bold: true
+            }
+        }
+    }
+
+    // Hint while picking a region to watch
+    Rectangle {
+        visible: overlay.watchMode
+        anchors.horizontalCenter: parent.horizontalCenter
+        y: 24
+        width: watchHint.implicitWidth + 24
+        height: watchHint.implicitHeight + 12
+        radius: 6
+        color: "#C0000000"
+
+        Text {
+            id: watchHint
+            anchors.centerIn: parent
+            text: "Select a region to watch — its text is read again whenever it changes"
+            color: "white"
+            font.pixelSize: 14
+        }
+    }
+
     Rectangle {
         id: selectionRect
         visible: overlay.selecting
@@ -83,16 +189,18 @@ Window {
         anchors.fill: parent
         cursorShape: Qt.CrossCursor
         
-        onPressed: {
+        onPressed: (mouse) => {
+            if (mouse.button !== Qt.LeftButton) {
+                return
+            }
             overlay.startX = mouseX
             overlay.startY = mouseY
             overlay.selecting = true
         }
         
-        onReleased: {
+        onReleased: (mouse) => {
             if (overlay.selecting) {
                 overlay.selecting = false
-                overlay.visible = false
                 
                 // Translate overlay-relative coordinates to absolute screen coordinates
                 var rx = selectionRect.x + overlay.x
@@ -104,7 +212,12 @@ Window {
                 
                 // Don't capture if too small
                 if (rw > 5 && rh > 5) {
-                    bridge.captureRegion(rx, ry, rw, rh)
+                    overlay.regions = overlay.regions.concat([{ x: rx, y: ry, width: rw, height: rh }])
+                }
+                
+                // Shift keeps the overlay open to add more regions; a plain release captures them all
+                if (overlay.watchMode || !(mouse.modifiers & Qt.ShiftModifier)) {
+                    overlay.commitRegions()
                 }
             }
         }
@@ -113,8 +226,8 @@ Window {
         acceptedButtons: Qt.LeftButton | Qt.RightButton
         onClicked: (mouse) => {
             if (mouse.button === Qt.RightButton) {
-                overlay.selecting = false
-                overlay.visible = false
+                overlay.closeOverlay()
+                bridge.cancelCapture()
             }
         }
     }
@@ -123,8 +236,14 @@ Window {
     Shortcut {
         sequence: "Esc"
         onActivated: {
-            overlay.selecting = false
-            overlay.visible = false
+            overlay.closeOverlay()
+            bridge.cancelCapture()
         }
     }
+
+    // Enter captures the regions added so far
+    Shortcut {
+        sequences: ["Return", "Enter"]
+        onActivated: overlay.commitRegions()
+    }
 }
@@ -0,0 +1,394 @@
+"""Bounded OCR job queue with ordered delivery and cancellation."""
+
+import asyncio
+import itertools
+import time
+from typing import Dict, List, Optional
+
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal, Slot
+
+from src.core import tracing
+
+# Joins per-region results of a multi-region job
+REGION_SEPARATOR = "\n\n"
+
+# Job states
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+
+class Job:
+    """Bookkeeping for one OCR request."""
+
+    def __init__(self, job_id: int, image, streaming: bool, context=None, trace=None):
+        self.id = job_id
+        self.image = image
+        self.streaming = streaming
+        self.context = context  # Opaque data for the submitter (e.g. cache key)
+        self.trace = trace  # tracing.Trace marked by the worker thread
+        self.supersedable = True  # Cancelled by newer superseding submissions
+        self.report: Dict = {}  # Engine call report (attempts, outcome, usage), set by the worker thread
+        self.state = PENDING
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.result: Optional[str] = None
+        self.error: Optional[str] = None
+        self.runnable: Optional["OcrJob"] = None
+        self.chunks: List[str] = []  # Streamed while an older job was still at the head, not yet emitted
+        self.future = None  # concurrent.futures.Future of the coroutine, on the asyncio path
+
+    @property
+    def cancelled(self) -> bool:
+        return self.state == CANCELLED
+
+    def to_dict(self) -> Dict:
+        return {
+            "id": self.id,
+            "state": self.state,
+            "createdAt": self.created_at,
+            "startedAt": self.started_at,
+            "finishedAt": self.finished_at,
+        }
+
+
+class JobSignals(QObject):
+    """Signals emitted from pool threads; delivered to the scheduler on the GUI thread."""
+
+    started = Signal(int)
+    chunk = Signal(int, str)
+    finished = Signal(int, str)
+    error = Signal(int, str)
+    done = Signal(object)  # The Job; always emitted last, even for cancelled jobs
+
+
+class OcrJob(QRunnable):
+    """Runs one OCR request on the scheduler's thread pool."""
+
+    def __init__(self, job: Job, engine, signals: JobSignals):
+        super().__init__()
+        self.setAutoDelete(False)
+        self.job = job
+        self.engine = engine
+        self.signals = signals
+
+    def run(self):
+        job = self.job
+        tracing.bind(job.trace)
+        try:
+            if job.cancelled:
+                return
+            self.signals.started.emit(job.id)
+            if isinstance(job.image, list):
+                # Multi-region selection: one batched request, results joined in the given order
+                text = REGION_SEPARATOR.join(t.strip() for t in self.engine.extract_regions(job.image))
+            elif job.streaming:
+                parts = []
+                stream = self.engine.stream_text(job.image)
+                for piece in stream:
+                    if job.cancelled:
+                        stream.close()
+                        job.report = self._call_report()  # The request was sent; its usage still counts
+                        return
+                    parts.append(piece)
+                    self.signals.chunk.emit(job.id, piece)
+                text = "".join(parts)
+            else:
+                text = self.engine.extract_text(job.image)
+            tracing.mark(tracing.COMPLETE)
+            job.report = self._call_report()
+            self.signals.finished.emit(job.id, text)
+        except Exception as e:
+            job.report = self._call_report()
+            self.signals.error.emit(job.id, str(e))
+        finally:
+            tracing.bind(None)
+            self.signals.done.emit(job)
+
+    def _call_report(self) -> Dict:
+        """Remote call report, with the engine's usage record for accounting under 'usage'."""
+        report = dict(getattr(self.engine, "last_call", None) or {})
+        usage = getattr(self.engine, "last_usage", None)
+        if usage:
+            report["usage"] = usage
+        return report
+
+
+class OcrScheduler(QObject):
+    """
+    Runs OCR jobs on a bounded thread pool and delivers results in submission order.
+
+    A newer submission optionally supersedes older unfinished jobs: queued ones
+    are removed from the pool and running ones have their results dropped.
+
+    Given an asyncio loop runner, jobs run as coroutines on that loop instead
+    of occupying a pool thread each: many can wait on the network at once,
+    cancelling a job cancels its request, and each job has a deadline.
+    """
+
+    jobStarted = Signal(int)
+    jobChunk = Signal(int, str)          # Only for the job at the head of the delivery order; others are buffered
+    resultReady = Signal(int, str, object, object)  # id, text, context, call report; in submission order
+    jobFailed = Signal(int, str, object, object)    # id, error, context, call report; in submission order
+    jobCancelled = Signal(int)
+    cancelledReport = Signal(int, object)  # id, call report of a cancelled job whose request was sent anyway
+    queueDepthChanged = Signal(int)
+
+    def __init__(self, engine, max_concurrency: int = 2, supersede: bool = True, parent=None,
+                 runner=None, deadline: Optional[float] = None):
+        """
+        Initialize the scheduler.
+
+        Args:
+            engine: OCR engine providing extract_text() / stream_text() (and the
+                *_async variants for the asyncio path), or a zero-argument
+                callable returning it (resolved on first submit)
+            max_concurrency: Maximum number of OCR requests in flight
+            supersede: Cancel older unfinished jobs when a new one is submitted
+            runner: async_loop.LoopRunner to run jobs as coroutines (None for the thread pool)
+            deadline: Seconds a job may run on the asyncio path before it fails
+                (None or <= 0 for no deadline)
+        """
+        super().__init__(parent)
+        self._engine = engine
+        self.supersede = supersede
+        self.deadline = deadline if deadline and deadline > 0 else None
+        self._runner = runner
+        self._async_limit = max(1, max_concurrency)
+        self._async_slots: Optional[asyncio.Semaphore] = None  # Created on the loop
+        self._pool = QThreadPool()
+        self._pool.setMaxThreadCount(max(1, max_concurrency))
+        self._ids = itertools.count(1)
+        self._jobs: Dict[int, Job] = {}  # Not yet delivered, keyed by id (insertion ordered)
+        self._runnables: Dict[int, OcrJob] = {}  # Kept alive until the pool is done with them
+        self._signals = JobSignals()
+        self._signals.started.connect(self._on_started)
+        self._signals.chunk.connect(self._on_chunk)
+        self._signals.finished.connect(self._on_finished)
+        self._signals.error.connect(self._on_error)
+        self._signals.done.connect(self._on_done)
+
+    @property
+    def engine(self):
+        if callable(self._engine):
+            self._engine = self._engine()
+        return self._engine
+
+    @property
+    def max_concurrency(self) -> int:
+        return self._async_limit if self._runner is not None else self._pool.maxThreadCount()
+
+    @max_concurrency.setter
+    def max_concurrency(self, value: int):
+        self._pool.setMaxThreadCount(max(1, value))
+        self._async_limit = max(1, value)
+        self._async_slots = None  # Recreated with the new limit by the next job
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of jobs queued or running."""
+        return sum(1 for job in self._jobs.values() if job.state in (PENDING, RUNNING))
+
+    def jobs(self):
+        """Snapshot of undelivered jobs."""
+        return [job.to_dict() for job in self._jobs.values()]
+
+    def job(self, job_id: int) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def submit(self, image, streaming: bool = False, context=None, cached_text: Optional[str] = None,
+               trace=None, supersede: bool = True) -> int:
+        """
+        Queue an OCR job.
+
+        Args:
+            image: Captured image, or a list of images for a multi-region job
+            streaming: Emit jobChunk while the result arrives
+            context: Opaque data returned with the job
+            cached_text: Already known result (e.g. cache hit); the job completes
+                immediately but is still delivered in order
+            trace: tracing.Trace to mark the worker-side stages on
+            supersede: With the scheduler's supersede on, cancel older supersedable
+                jobs and be cancelled by newer ones; False for work that must not
+                replace (or be replaced by) the user's captures, e.g. scripted requests
+
+        Returns:
+            Job id
+        """
+        if self.supersede and supersede:
+            for job_id in [j.id for j in self._jobs.values() if j.supersedable]:
+                self.cancel(job_id)
+        job = Job(next(self._ids), image, streaming, context, trace)
+        job.supersedable = supersede
+        self._jobs[job.id] = job
+        if cached_text is not None:
+            if trace is not None:
+                trace.mark(tracing.COMPLETE)
+            job.state = DONE
+            job.result = cached_text
+            job.finished_at = time.time()
+            job.image = None
+        elif self._runner is not None:
+            job.future = self._runner.submit(self._run_async(job, self.engine))
+        else:
+            job.runnable = OcrJob(job, self.engine, self._signals)
+            self._runnables[job.id] = job.runnable
+            self._pool.start(job.runnable)
+        self.queueDepthChanged.emit(self.queue_depth)
+        self._deliver()
+        return job.id
+
+    def cancel(self, job_id: int):
+        """Cancel a job; queued jobs never run, running jobs have their result dropped."""
+        job = self._jobs.get(job_id)
+        if job is None or job.state in (DONE, FAILED, CANCELLED):
+            return
+        if job.state == PENDING and job.runnable is not None and self._pool.tryTake(job.runnable):
+            self._runnables.pop(job.id, None)
+        if job.future is not None:
+            job.future.cancel()  # Raises CancelledError inside the coroutine, aborting its request
+        job.state = CANCELLED
+        job.finished_at = time.time()
+        print(f"OCR job {job.id} cancelled")
+        self.jobCancelled.emit(job.id)
+        self.queueDepthChanged.emit(self.queue_depth)
+        self._deliver()
+
+    def cancel_all(self):
+        for job_id in list(self._jobs):
+            self.cancel(job_id)
+
+    def shutdown(self, timeout_ms: int = 3000):
+        """Cancel everything and wait briefly for running requests to return."""
+        self.cancel_all()
+        self._pool.waitForDone(timeout_ms)
+
+    # -- asyncio path (event loop) ------------------------------------------------
+
+    async def _run_async(self, job: Job, engine):
+        """Coroutine counterpart of OcrJob.run(); reports through the same signals."""
+        if self._async_slots is None:
+            self._async_slots = asyncio.Semaphore(self._async_limit)
+        tracing.bind(job.trace)  # Per task: concurrent jobs on the loop keep their own traces
+        try:
+            async with self._async_slots:
+                if job.cancelled:
+                    return
+                self._signals.started.emit(job.id)
+                work = asyncio.ensure_future(self._ocr_async(job, engine))
+                try:
+                    done, _ = await asyncio.wait({work}, timeout=self.deadline)
+                except asyncio.CancelledError:
+                    job.report = await self._abandon(work)
+                    raise
+                if not done:
+                    error = TimeoutError(f"OCR timed out after {self.deadline:.0f}s")
+                    error.report = await self._abandon(work)
+                    raise error
+                text, job.report = work.result()
+                tracing.mark(tracing.COMPLETE)
+                self._signals.finished.emit(job.id, text)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            job.report = getattr(e, "report", None) or {}
+            self._signals.error.emit(job.id, str(e))
+        finally:
+            self._signals.done.emit(job)
+
+    @staticmethod
+    async def _abandon(work) -> Dict:
+        """Cancel a job's OCR task and return the report of the requests it had already sent."""
+        work.cancel()
+        try:
+            return (await work)[1]  # Finished before the cancellation reached it
+        except (Exception, asyncio.CancelledError) as e:
+            return getattr(e, "report", None) or {}
+
+    async def _ocr_async(self, job: Job, engine):
+        if isinstance(job.image, list):
+            texts, report = await engine.extract_regions_async(job.image)
+            return REGION_SEPARATOR.join(t.strip() for t in texts), report
+        if job.streaming:
+            def on_chunk(piece):
+                if not job.cancelled:
+                    self._signals.chunk.emit(job.id, piece)
+            return await engine.stream_text_async(job.image, on_chunk)
+        return await engine.extract_text_async(job.image)
+
+    # -- pool callbacks (GUI thread) --------------------------------------------
+
+    @Slot(int)
+    def _on_started(self, job_id):
+        job = self._jobs.get(job_id)
+        if job is None or job.cancelled:
+            return
+        job.state = RUNNING
+        job.started_at = time.time()
+        self.jobStarted.emit(job_id)
+
+    @Slot(int, str)
+    def _on_chunk(self, job_id, piece):
+        job = self._jobs.get(job_id)
+        if job is None or job.cancelled:
+            return
+        if job_id == self._head():
+            self.jobChunk.emit(job_id, piece)
+        else:
+            job.chunks.append(piece)  # Emitted once the job reaches the head
+
+    @Slot(object)
+    def _on_done(self, job):
+        self._runnables.pop(job.id, None)
+        if job.cancelled and job.report.get("usage"):
+            # Its result is dropped, but the request was made and billed
+            self.cancelledReport.emit(job.id, job.report)
+
+    @Slot(int, str)
+    def _on_finished(self, job_id, text):
+        self._complete(job_id, DONE, result=text)
+
+    @Slot(int, str)
+    def _on_error(self, job_id, err):
+        self._complete(job_id, FAILED, error=err)
+
+    def _complete(self, job_id, state, result=None, error=None):
+        job = self._jobs.get(job_id)
+        if job is None or job.cancelled:
+            return
+        job.state = state
+        job.result = result
+        job.error = error
+        job.finished_at = time.time()
+        job.image = None
+        job.runnable = None
+        self.queueDepthChanged.emit(self.queue_depth)
+        self._deliver()
+
+    def _head(self) -> Optional[int]:
+        """Oldest job that has not been delivered or cancelled."""
+        for job in self._jobs.values():
+            if not job.cancelled:
+                return job.id
+        return None
+
+    def _deliver(self):
+        """Emit finished jobs from the front of the queue, preserving submission order."""
+        while self._jobs:
+            job = next(iter(self._jobs.values()))
+            if job.state in (PENDING, RUNNING):
+                break
+            del self._jobs[job.id]
+            if job.state == DONE:
+                self.resultReady.emit(job.id, job.result, job.context, job.report)
+            elif job.state == FAILED:
+                self.jobFailed.emit(job.id, job.error, job.context, job.report)
+        head = self._jobs.get(self._head())
+        if head is not None and head.chunks:
+            # A running job just reached the head: catch up on what it streamed meanwhile
+            chunks, head.chunks = head.chunks, []
+            for piece in chunks:
+                self.jobChunk.emit(head.id, piece)
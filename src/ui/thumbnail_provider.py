@@ -0,0 +1,71 @@
+"""Asynchronous image provider for history thumbnails."""
+
+from PySide6.QtCore import QObject, QRunnable, QSize, Qt, QThreadPool, Signal
+from PySide6.QtGui import QImage
+from PySide6.QtQuick import QQuickAsyncImageProvider, QQuickImageResponse, QQuickTextureFactory
+
+
+class _LoadSignals(QObject):
+    done = Signal(QImage)
+
+
+class _LoadThumbnail(QRunnable):
+    """Creates (if needed) and reads one thumbnail on the provider's pool."""
+
+    def __init__(self, store_getter, digest: str, requested: QSize):
+        super().__init__()
+        self.setAutoDelete(False)  # Owned by the ThumbnailResponse
+        self.signals = _LoadSignals()
+        self._store_getter = store_getter
+        self._digest = digest
+        self._requested = requested
+
+    def run(self):
+        image = QImage()
+        try:
+            path = self._store_getter().thumbnail(self._digest)
+            if path:
+                image = QImage(path)
+                if self._requested.isValid() and not image.isNull():
+                    image = image.scaled(self._requested, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+        except Exception as e:
+            print(f"Error loading thumbnail: {e}")
+        self.signals.done.emit(image)
+
+
+class ThumbnailResponse(QQuickImageResponse):
+    def __init__(self, runnable: _LoadThumbnail, pool: QThreadPool):
+        super().__init__()
+        self._image = QImage()
+        self._runnable = runnable  # Keep the Python wrapper alive until the response is gone
+        runnable.signals.done.connect(self._on_done)
+        pool.start(runnable)
+
+    def _on_done(self, image: QImage):
+        self._image = image
+        self.finished.emit()
+
+    def textureFactory(self):
+        return QQuickTextureFactory.textureFactoryForImage(self._image)
+
+
+class ThumbnailProvider(QQuickAsyncImageProvider):
+    """
+    Serves `image://thumbs/<digest>` from the capture image store.
+
+    Thumbnails are made and decoded on a small dedicated pool so scrolling the
+    history never waits on disk or image decoding.
+    """
+
+    def __init__(self, store_getter):
+        """
+        Args:
+            store_getter: Callable returning the ImageStore (resolved on first request)
+        """
+        super().__init__()
+        self._store_getter = store_getter
+        self._pool = QThreadPool()
+        self._pool.setMaxThreadCount(2)
+
+    def requestImageResponse(self, image_id: str, requested_size: QSize):
+        return ThumbnailResponse(_LoadThumbnail(self._store_getter, image_id, requested_size), self._pool)